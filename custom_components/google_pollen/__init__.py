@@ -1,55 +1,232 @@
 """The Google Pollen integration."""
 
 import asyncio
+from functools import partial
+from typing import Any
 
-from homeassistant.const import CONF_API_KEY, Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE, Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.aiohttp_client import (
+    async_create_clientsession,
+    async_get_clientsession,
+)
+from homeassistant.helpers.typing import ConfigType
 
-from .const import CONF_REFERRER
+from .budget import DEFAULT_PRIORITY, reserved_calls, solve_update_intervals
+from .const import (
+    CONF_DAILY_CALL_BUDGET,
+    CONF_HEDGE_REQUESTS,
+    CONF_PRIORITY,
+    CONF_REFERRER,
+    CONF_TRACE_REQUESTS,
+    DOMAIN,
+    PARSE_OFFLOAD_THRESHOLD,
+    SUBENTRY_TYPE_LOCATION,
+    SUBENTRY_TYPE_TRACKER,
+)
 from .coordinator import (
     GooglePollenConfigEntry,
     GooglePollenRuntimeData,
     GooglePollenUpdateCoordinator,
 )
-from .google_pollen_api import GooglePollenApi
+from .coverage import DATA_COVERAGE, GooglePollenCoverageCache
+from .deadlines import async_track_deadlines
+from .forecast_statistics import (
+    ForecastStatisticsImporter,
+    async_clear_forecast_statistics,
+)
+from .google_pollen_api import HEDGE_MAX_RATE, GooglePollenApi
+from .locations import DATA_LOCATIONS, GooglePollenLocationRegistry
+from .services import async_setup_services
+from .tracing import RequestTracer
+from .tracker import GooglePollenTrackerCoordinator
+from .usage import DATA_USAGE_LEDGER, GooglePollenUsageLedger, usage_key_id
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Google Pollen integration."""
+    ledger = GooglePollenUsageLedger(hass)
+    await ledger.async_load()
+    hass.data[DATA_USAGE_LEDGER] = ledger
+    coverage = GooglePollenCoverageCache(hass)
+    await coverage.async_load()
+    hass.data[DATA_COVERAGE] = coverage
+    hass.data[DATA_LOCATIONS] = GooglePollenLocationRegistry(hass)
+    async_setup_services(hass)
+    return True
+
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: GooglePollenConfigEntry
 ) -> bool:
     """Set up Google Pollen from a config entry."""
-    session = async_get_clientsession(hass)
+    tracer: RequestTracer | None = None
+    if entry.options.get(CONF_TRACE_REQUESTS):
+        # Trace configs are fixed when a session is created, so tracing
+        # needs a session of its own, detached from the shared connector
+        # once the entry is unloaded
+        tracer = RequestTracer()
+        session = async_create_clientsession(
+            hass, auto_cleanup=False, trace_configs=[tracer.trace_config]
+        )
+        entry.async_on_unload(session.detach)
+    else:
+        session = async_get_clientsession(hass)
     api_key = entry.data[CONF_API_KEY]
     referrer = entry.data.get(CONF_REFERRER)
-    client = GooglePollenApi(session, api_key, referrer=referrer)
+    key_id = usage_key_id(api_key)
+    client = GooglePollenApi(
+        session,
+        api_key,
+        referrer=referrer,
+        on_request=partial(hass.data[DATA_USAGE_LEDGER].async_record, key_id),
+        offload_threshold=PARSE_OFFLOAD_THRESHOLD,
+        tracer=tracer,
+        coverage=hass.data[DATA_COVERAGE],
+        hedge=entry.options.get(CONF_HEDGE_REQUESTS, False),
+    )
+    statistics = ForecastStatisticsImporter(hass)
+    entry.async_on_unload(statistics.async_shutdown)
+    locations = hass.data[DATA_LOCATIONS]
     coordinators: dict[str, GooglePollenUpdateCoordinator] = {}
-    for subentry_id in entry.subentries:
-        coordinators[subentry_id] = GooglePollenUpdateCoordinator(
-            hass, entry, subentry_id, client
+    for subentry_id, subentry in entry.subentries.items():
+        coordinator: GooglePollenUpdateCoordinator
+        if subentry.subentry_type == SUBENTRY_TYPE_TRACKER:
+            coordinator = GooglePollenTrackerCoordinator(
+                hass, entry, subentry_id, client
+            )
+            entry.async_on_unload(coordinator.async_start_tracking(locations))
+        else:
+            coordinator = GooglePollenUpdateCoordinator(
+                hass, entry, subentry_id, client
+            )
+            entry.async_on_unload(
+                locations.async_subscribe(
+                    coordinator,
+                    subentry.data[CONF_LATITUDE],
+                    subentry.data[CONF_LONGITUDE],
+                )
+            )
+        entry.async_on_unload(
+            coordinator.async_add_listener(
+                partial(statistics.async_schedule_import, coordinator)
+            )
+        )
+        coordinators[subentry_id] = coordinator
+    if (budget := entry.options.get(CONF_DAILY_CALL_BUDGET)) and coordinators:
+        reserved = reserved_calls(
+            int(budget),
+            locations=len(coordinators),
+            deadlines=sum(len(c.deadlines) for c in coordinators.values()),
+            hedge_rate=HEDGE_MAX_RATE if entry.options.get(CONF_HEDGE_REQUESTS) else 0,
+            unscheduled_calls=hass.data[DATA_USAGE_LEDGER].daily_unscheduled_calls(
+                key_id
+            ),
+        )
+        intervals = solve_update_intervals(
+            int(budget),
+            {
+                subentry_id: int(
+                    entry.subentries[subentry_id].data.get(
+                        CONF_PRIORITY, DEFAULT_PRIORITY
+                    )
+                )
+                for subentry_id in coordinators
+            },
+            reserved,
         )
+        for subentry_id, interval in intervals.items():
+            coordinators[subentry_id].async_set_base_interval(interval)
+    # A tracker without a known position is refreshed once it reports one
     await asyncio.gather(
-        *[c.async_config_entry_first_refresh() for c in coordinators.values()]
+        *[
+            c.async_config_entry_first_refresh()
+            for c in coordinators.values()
+            if c.lat is not None
+        ]
     )
+    entry.async_on_unload(async_track_deadlines(hass, coordinators.values()))
     entry.runtime_data = GooglePollenRuntimeData(
-        api=client, subentries_runtime_data=coordinators
+        api=client, key_id=key_id, subentries_runtime_data=coordinators
     )
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     entry.async_on_unload(entry.add_update_listener(async_update_options))
     return True
 
 
+async def async_migrate_entry(
+    hass: HomeAssistant, entry: GooglePollenConfigEntry
+) -> bool:
+    """Migrate an entry to the current version."""
+    if entry.version == 1 and entry.minor_version < 2:
+        # The sensors of a location were identified by its coordinates, which
+        # the locations of other entries may share
+        @callback
+        def _migrate_unique_id(entity: er.RegistryEntry) -> dict[str, Any] | None:
+            if (subentry_id := entity.config_subentry_id) is None or (
+                subentry := entry.subentries.get(subentry_id)
+            ) is None:
+                return None
+            if subentry.subentry_type != SUBENTRY_TYPE_LOCATION:
+                return None
+            suffix = f"_{subentry.data[CONF_LATITUDE]}_{subentry.data[CONF_LONGITUDE]}"
+            if not entity.unique_id.endswith(suffix):
+                return None
+            return {
+                "new_unique_id": f"{entity.unique_id.removesuffix(suffix)}_{subentry_id}"
+            }
+
+        await er.async_migrate_entries(hass, entry.entry_id, _migrate_unique_id)
+        hass.config_entries.async_update_entry(entry, minor_version=2)
+    return True
+
+
 async def async_unload_entry(
     hass: HomeAssistant, entry: GooglePollenConfigEntry
 ) -> bool:
     """Unload a config entry."""
+    for coordinator in entry.runtime_data.subentries_runtime_data.values():
+        if coordinator.refresh_profiler is not None:
+            coordinator.refresh_profiler.async_stop()
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
 
+async def async_remove_entry(
+    hass: HomeAssistant, entry: GooglePollenConfigEntry
+) -> None:
+    """Remove the forecast statistics and coverage of the entry's locations."""
+    async_clear_forecast_statistics(hass, entry.subentries)
+    # Adding the locations again asks the API about them
+    coverage = hass.data[DATA_COVERAGE]
+    for subentry in entry.subentries.values():
+        if subentry.subentry_type == SUBENTRY_TYPE_LOCATION:
+            coverage.async_clear(
+                subentry.data[CONF_LATITUDE], subentry.data[CONF_LONGITUDE]
+            )
+
+
 async def async_update_options(
     hass: HomeAssistant, entry: GooglePollenConfigEntry
 ) -> None:
-    """Update options."""
+    """Reload the entry, unless a reload is already scheduled."""
+    ledger = hass.data[DATA_USAGE_LEDGER]
+    removed = [
+        subentry_id
+        for subentry_id in entry.runtime_data.subentries_runtime_data
+        if subentry_id not in entry.subentries
+    ]
+    for subentry_id in removed:
+        coordinator = entry.runtime_data.subentries_runtime_data[subentry_id]
+        if coordinator.lat is not None and coordinator.long is not None:
+            ledger.async_remove_location(coordinator.lat, coordinator.long)
+    async_clear_forecast_statistics(hass, removed)
+    if entry.runtime_data.reload_pending:
+        return
+    entry.runtime_data.reload_pending = True
     await hass.config_entries.async_reload(entry.entry_id)
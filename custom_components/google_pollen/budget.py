@@ -0,0 +1,80 @@
+"""Spread a daily API call budget over the locations of a key."""
+
+from __future__ import annotations
+
+import math
+from datetime import timedelta
+from typing import Final
+
+DAY: Final = timedelta(days=1)
+
+# Pollen data changes at most hourly, refreshing more often is wasted
+MIN_UPDATE_INTERVAL: Final = timedelta(hours=1)
+
+# Weight of a location that has no priority set
+DEFAULT_PRIORITY: Final = 3
+
+# Calls held back for unscheduled calls never take more of the budget
+MAX_RESERVED_SHARE: Final = 0.5
+
+
+def reserved_calls(
+    daily_budget: int,
+    *,
+    locations: int,
+    deadlines: int,
+    hedge_rate: float,
+    unscheduled_calls: float,
+) -> float:
+    """Return the calls per day to hold back for calls outside the schedule.
+
+    Every setup refreshes all locations, every deadline may prefetch its
+    location, and hedging duplicates up to ``hedge_rate`` of the requests.
+    When the key recently made more ``unscheduled_calls`` a day, such as
+    the refetches of tracked entities moving around, those are held back
+    instead. Scheduled refreshes are not part of them, they are what is
+    left of the budget.
+    """
+    known = locations + deadlines + hedge_rate * daily_budget
+    return min(max(known, unscheduled_calls), MAX_RESERVED_SHARE * daily_budget)
+
+
+def solve_update_intervals(
+    daily_budget: int, priorities: dict[str, int], reserved: float = 0.0
+) -> dict[str, timedelta]:
+    """Return the update interval of every location.
+
+    What is left of the budget once the ``reserved`` calls are held back is
+    shared in proportion to the priorities, which must be positive.
+    A location that would get more than one call per MIN_UPDATE_INTERVAL is
+    capped, and what it leaves is shared among the others, until every
+    location either is capped or has its share. Intervals are rounded up to
+    whole seconds, so the calls of a day never add up to more than the budget.
+    """
+    max_calls = DAY / MIN_UPDATE_INTERVAL
+    calls: dict[str, float] = {}
+    remaining = dict(priorities)
+    budget = float(daily_budget) - reserved
+    while remaining:
+        total_priority = sum(remaining.values())
+        capped = {
+            location
+            for location, priority in remaining.items()
+            if budget * priority / total_priority >= max_calls
+        }
+        if not capped:
+            for location, priority in remaining.items():
+                calls[location] = budget * priority / total_priority
+            break
+        for location in capped:
+            calls[location] = max_calls
+            budget -= max_calls
+            del remaining[location]
+
+    return {
+        location: max(
+            timedelta(seconds=math.ceil(DAY.total_seconds() / count)),
+            MIN_UPDATE_INTERVAL,
+        )
+        for location, count in calls.items()
+    }
@@ -0,0 +1,247 @@
+"""Import many locations into a config entry at once."""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Final
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigSubentry
+from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE, CONF_NAME
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+from homeassistant.util.yaml import load_yaml
+
+from .const import DOMAIN, SUBENTRY_TYPE_LOCATION
+from .coordinator import GooglePollenConfigEntry
+from .google_pollen_api import (
+    ALL_POLLEN_TYPES,
+    GooglePollenApi,
+    GooglePollenApiError,
+    GooglePollenAuthError,
+    GooglePollenQuotaError,
+    GooglePollenUnsupportedRegionError,
+    PollenCurrentConditionsData,
+)
+from .locations import DATA_LOCATIONS, location_ids
+from .usage import usage_location_id
+
+# Upper bounds of concurrent validation requests and of requests per second
+IMPORT_MAX_CONCURRENT: Final = 4
+IMPORT_MAX_RATE: Final = 10
+
+IMPORT_LOCATION_SCHEMA: Final = vol.Schema(
+    {
+        vol.Required(CONF_NAME): cv.string,
+        vol.Required(CONF_LATITUDE): cv.latitude,
+        vol.Required(CONF_LONGITUDE): cv.longitude,
+    },
+    extra=vol.REMOVE_EXTRA,
+)
+
+
+@dataclass
+class ImportResult:
+    """Outcome of a bulk import."""
+
+    added: list[str] = field(default_factory=list)
+    # Name and reason of every location that was not added
+    skipped: list[dict[str, str]] = field(default_factory=list)
+
+
+def load_import_file(path: str) -> list[Any]:
+    """Read the locations of a CSV file with a header row or a YAML list."""
+    if path.endswith(".csv"):
+        with open(path, encoding="utf-8", newline="") as file:
+            return list(csv.DictReader(file))
+    if (data := load_yaml(Path(path))) is None:
+        return []
+    if not isinstance(data, list):
+        raise vol.Invalid("The file must contain a list of locations")
+    return data
+
+
+class _RateLimiter:
+    """Space the start of requests to at most a number per second."""
+
+    def __init__(self, rate: float) -> None:
+        """Initialize the limiter."""
+        self._interval = 1 / rate
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def async_wait(self) -> None:
+        """Wait until the next request may start."""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            if (delay := self._next_start - loop.time()) > 0:
+                await asyncio.sleep(delay)
+            self._next_start = loop.time() + self._interval
+
+
+@callback
+def _async_deduplicate(
+    hass: HomeAssistant,
+    entry: GooglePollenConfigEntry,
+    locations: list[dict[str, Any]],
+    result: ImportResult,
+) -> list[dict[str, Any]]:
+    """Drop locations whose coordinates or name are configured or repeated.
+
+    Coordinates are only compared with the locations of the entry, other
+    entries share the data of the same coordinates.
+    """
+    coordinates = location_ids(entry)
+    names = {
+        subentry.title.lower()
+        for config_entry in hass.config_entries.async_entries(DOMAIN)
+        for subentry in config_entry.subentries.values()
+    }
+
+    unique: list[dict[str, Any]] = []
+    for location in locations:
+        location_id = usage_location_id(
+            location[CONF_LATITUDE], location[CONF_LONGITUDE]
+        )
+        if location_id in coordinates:
+            reason = "location_already_configured"
+        elif location[CONF_NAME].lower() in names:
+            reason = "location_name_already_configured"
+        else:
+            coordinates.add(location_id)
+            names.add(location[CONF_NAME].lower())
+            unique.append(location)
+            continue
+        result.skipped.append({CONF_NAME: location[CONF_NAME], "reason": reason})
+    return unique
+
+
+async def _async_validate(
+    api: GooglePollenApi, locations: list[dict[str, Any]], result: ImportResult
+) -> list[tuple[dict[str, Any], PollenCurrentConditionsData]]:
+    """Return the locations the API has pollen data for, with their data.
+
+    A rejected key or an exhausted quota fails the whole import, since no
+    other location could be validated either.
+    """
+    semaphore = asyncio.Semaphore(IMPORT_MAX_CONCURRENT)
+    limiter = _RateLimiter(IMPORT_MAX_RATE)
+
+    async def _async_validate_one(
+        location: dict[str, Any],
+    ) -> PollenCurrentConditionsData | str:
+        async with semaphore:
+            await limiter.async_wait()
+            try:
+                return await api.async_get_current_conditions(
+                    location[CONF_LATITUDE], location[CONF_LONGITUDE]
+                )
+            except GooglePollenAuthError as err:
+                raise HomeAssistantError(
+                    translation_domain=DOMAIN,
+                    translation_key="invalid_api_key",
+                ) from err
+            except GooglePollenQuotaError as err:
+                raise HomeAssistantError(
+                    translation_domain=DOMAIN,
+                    translation_key="quota_exceeded",
+                ) from err
+            except GooglePollenUnsupportedRegionError:
+                return "unsupported_region"
+            except GooglePollenApiError:
+                return "cannot_connect"
+
+    outcomes = await asyncio.gather(
+        *(_async_validate_one(location) for location in locations)
+    )
+    valid: list[tuple[dict[str, Any], PollenCurrentConditionsData]] = []
+    for location, outcome in zip(locations, outcomes, strict=True):
+        if isinstance(outcome, str):
+            result.skipped.append({CONF_NAME: location[CONF_NAME], "reason": outcome})
+        else:
+            valid.append((location, outcome))
+    return valid
+
+
+@callback
+def _async_seed_locations(
+    hass: HomeAssistant,
+    entry: GooglePollenConfigEntry,
+    valid: list[tuple[dict[str, Any], PollenCurrentConditionsData]],
+) -> None:
+    """Let the reload start from the data of the validation and the entry."""
+    registry = hass.data[DATA_LOCATIONS]
+    now = dt_util.utcnow()
+    for location, data in valid:
+        registry.async_seed(
+            location[CONF_LATITUDE],
+            location[CONF_LONGITUDE],
+            data,
+            ALL_POLLEN_TYPES,
+            now,
+        )
+    for coordinator in entry.runtime_data.subentries_runtime_data.values():
+        if (
+            (shared := coordinator.shared_location) is not None
+            and shared.data is not None
+            and shared.selection is not None
+            and shared.fetched_at is not None
+        ):
+            registry.async_seed(
+                shared.lat, shared.lon, shared.data, shared.selection, shared.fetched_at
+            )
+
+
+async def async_import_locations(
+    hass: HomeAssistant, entry: GooglePollenConfigEntry, locations: list[Any]
+) -> ImportResult:
+    """Validate and add locations to a config entry.
+
+    Locations whose coordinates or name are already configured, or that
+    repeat an earlier location, are dropped before any request is sent.
+    The rest are validated with a bounded number of concurrent requests,
+    and all valid locations are added together, so the entry is reloaded
+    once. The reload serves the data fetched for the validation and the
+    data the entry already had, so no location is fetched again.
+    """
+    try:
+        parsed = [IMPORT_LOCATION_SCHEMA(location) for location in locations]
+    except vol.Invalid as err:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="invalid_import",
+            translation_placeholders={"error": str(err)},
+        ) from err
+
+    result = ImportResult()
+    unique = _async_deduplicate(hass, entry, parsed, result)
+    valid = await _async_validate(entry.runtime_data.api, unique, result)
+    if not valid:
+        return result
+    _async_seed_locations(hass, entry, valid)
+    # Keep the update listener from reloading the entry for every location
+    entry.runtime_data.reload_pending = True
+    for location, _ in valid:
+        hass.config_entries.async_add_subentry(
+            entry,
+            ConfigSubentry(
+                data=MappingProxyType(
+                    {
+                        CONF_LATITUDE: location[CONF_LATITUDE],
+                        CONF_LONGITUDE: location[CONF_LONGITUDE],
+                    }
+                ),
+                subentry_type=SUBENTRY_TYPE_LOCATION,
+                title=location[CONF_NAME],
+                unique_id=None,
+            ),
+        )
+        result.added.append(location[CONF_NAME])
+    hass.config_entries.async_schedule_reload(entry.entry_id)
+    return result
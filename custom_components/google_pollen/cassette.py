@@ -0,0 +1,186 @@
+"""
+Record and replay Google Pollen API responses.
+
+A cassette is a compact JSON file with the status, body and duration of
+every recorded request, keyed by its coordinates. Error responses are
+recorded as well and raise the same errors when replayed. The API key is
+never written.
+Replaying a cassette makes parser and refresh benchmarks reproducible and
+lets tests run against real response shapes without network access::
+
+    recorder = CassetteRecorder(SessionTransport(session))
+    api = GooglePollenApi(session, api_key, transport=recorder)
+    ...
+    recorder.save(path)
+
+    api = GooglePollenApi(session, api_key, transport=CassetteReplayer.load(path))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from .google_pollen_api import (
+    FORECAST_DAYS,
+    GooglePollenApiError,
+    PollenTransport,
+    error_from_response,
+)
+
+CASSETTE_VERSION = 1
+
+REDACTED = "**REDACTED**"
+
+
+def _location_key(lat: float, lon: float) -> str:
+    """Return the key recorded requests are looked up by."""
+    return f"{lat:.4f},{lon:.4f}"
+
+
+@dataclass(slots=True)
+class CassetteInteraction:
+    """One recorded request."""
+
+    latitude: float
+    longitude: float
+    days: int
+    elapsed: float
+    body: str
+    status: int = 200
+    retry_after: str | None = None
+
+
+class CassetteRecorder:
+    """Transport recording the responses of another transport."""
+
+    def __init__(self, transport: PollenTransport) -> None:
+        """Initialize the recorder."""
+        self._transport = transport
+        self.interactions: list[CassetteInteraction] = []
+
+    async def async_request(
+        self,
+        params: dict[str, Any],
+        headers: dict[str, str],
+        trace_request_ctx: Any = None,
+    ) -> bytes:
+        """Forward a request and record its response."""
+        start = time.perf_counter()
+        try:
+            body = await self._transport.async_request(
+                params, headers, trace_request_ctx
+            )
+        except GooglePollenApiError as err:
+            # Failures without a response, like timeouts, are not recorded
+            if err.status is not None:
+                self._record(
+                    params,
+                    time.perf_counter() - start,
+                    err.body,
+                    err.status,
+                    err.retry_after,
+                )
+            raise
+        self._record(params, time.perf_counter() - start, body)
+        return body
+
+    def _record(
+        self,
+        params: dict[str, Any],
+        elapsed: float,
+        body: bytes,
+        status: int = 200,
+        retry_after: str | None = None,
+    ) -> None:
+        """Record a response without the API key.
+
+        Bytes that are not UTF-8, such as in a truncated error page, are
+        replaced, so they cannot fail the request being recorded.
+        """
+        text = body.decode(errors="replace")
+        if key := params.get("key"):
+            text = text.replace(key, REDACTED)
+        self.interactions.append(
+            CassetteInteraction(
+                latitude=params["location.latitude"],
+                longitude=params["location.longitude"],
+                days=params.get("days", FORECAST_DAYS),
+                elapsed=round(elapsed, 4),
+                body=text,
+                status=status,
+                retry_after=retry_after,
+            )
+        )
+
+    def save(self, path: str | Path) -> None:
+        """Write the recorded requests to a cassette file."""
+        Path(path).write_text(
+            json.dumps(
+                {
+                    "version": CASSETTE_VERSION,
+                    "interactions": [asdict(item) for item in self.interactions],
+                },
+                separators=(",", ":"),
+            ),
+            encoding="utf-8",
+        )
+
+
+class CassetteReplayer:
+    """Transport answering requests from recorded responses.
+
+    Requests for the same coordinates get the responses recorded for them in
+    turn, recorded error responses raise the error they did when recorded.
+    With ``realtime`` every response takes as long as it did when it was
+    recorded, otherwise it is returned right away.
+    """
+
+    def __init__(
+        self, interactions: list[CassetteInteraction], realtime: bool = False
+    ) -> None:
+        """Initialize the replayer."""
+        self.realtime = realtime
+        self._interactions: dict[str, deque[CassetteInteraction]] = {}
+        for interaction in interactions:
+            self._interactions.setdefault(
+                _location_key(interaction.latitude, interaction.longitude), deque()
+            ).append(interaction)
+
+    @classmethod
+    def load(cls, path: str | Path, realtime: bool = False) -> CassetteReplayer:
+        """Load a cassette file."""
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version {data.get('version')}")
+        return cls(
+            [CassetteInteraction(**item) for item in data["interactions"]],
+            realtime=realtime,
+        )
+
+    async def async_request(
+        self,
+        params: dict[str, Any],
+        headers: dict[str, str],
+        trace_request_ctx: Any = None,
+    ) -> bytes:
+        """Return the next response recorded for the coordinates."""
+        key = _location_key(params["location.latitude"], params["location.longitude"])
+        if not (recorded := self._interactions.get(key)):
+            raise GooglePollenApiError(f"No recorded response for {key}")
+        interaction = recorded[0]
+        recorded.rotate(-1)
+        if self.realtime:
+            await asyncio.sleep(interaction.elapsed)
+        if interaction.status >= 400:
+            raise error_from_response(
+                interaction.status,
+                interaction.body.encode(),
+                interaction.retry_after,
+            )
+        return interaction.body.encode()
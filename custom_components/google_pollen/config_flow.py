@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import Mapping
+from functools import cache, partial
 from typing import Any
 
 import voluptuous as vol
@@ -12,10 +14,12 @@ from homeassistant.config_entries import (
     ConfigFlow,
     ConfigFlowResult,
     ConfigSubentryFlow,
+    OptionsFlow,
     SubentryFlowResult,
 )
 from homeassistant.const import (
     CONF_API_KEY,
+    CONF_ENTITY_ID,
     CONF_LATITUDE,
     CONF_LOCATION,
     CONF_LONGITUDE,
@@ -24,22 +28,164 @@ from homeassistant.const import (
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import SectionConfig, section
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.selector import LocationSelector, LocationSelectorConfig
+from homeassistant.helpers.selector import (
+    EntitySelector,
+    EntitySelectorConfig,
+    LocationSelector,
+    LocationSelectorConfig,
+    NumberSelector,
+    NumberSelectorConfig,
+    NumberSelectorMode,
+    SelectSelector,
+    SelectSelectorConfig,
+    TextSelector,
+    TextSelectorConfig,
+    TextSelectorType,
+)
+from homeassistant.util import dt as dt_util
 
-from .const import CONF_REFERRER, DOMAIN, SECTION_API_KEY_OPTIONS
-from .google_pollen_api import GooglePollenApi, GooglePollenApiError
+from .budget import DEFAULT_PRIORITY
+from .const import (
+    CONF_DAILY_CALL_BUDGET,
+    CONF_DEADLINES,
+    CONF_HEDGE_REQUESTS,
+    CONF_MAX_STALENESS,
+    CONF_PLANTS,
+    CONF_POLLEN_TYPES,
+    CONF_PRIORITY,
+    CONF_REFERRER,
+    CONF_THRESHOLDS,
+    CONF_TRACE_REQUESTS,
+    DEFAULT_MAX_STALENESS,
+    DOMAIN,
+    SECTION_API_KEY_OPTIONS,
+    SUBENTRY_TYPE_LOCATION,
+    SUBENTRY_TYPE_TRACKER,
+)
+from .coverage import DATA_COVERAGE
+from .google_pollen_api import (
+    CODE_MAP,
+    PLANT_CODE_MAP,
+    GooglePollenApi,
+    GooglePollenApiError,
+    GooglePollenAuthError,
+    GooglePollenUnsupportedRegionError,
+)
+from .locations import location_ids
+from .usage import DATA_USAGE_LEDGER, usage_key_id, usage_location_id
 
 _LOGGER = logging.getLogger(__name__)
 
-STEP_USER_DATA_SCHEMA = vol.Schema(
-    {
-        vol.Required(CONF_API_KEY): str,
-        vol.Optional(SECTION_API_KEY_OPTIONS): section(
-            vol.Schema({vol.Optional(CONF_REFERRER): str}),
-            SectionConfig(collapsed=True),
-        ),
-    }
-)
+_API_KEY_PLACEHOLDERS: dict[str, str] = {
+    "api_key_url": "https://developers.google.com/maps/documentation/pollen/get-api-key",
+    "restricting_api_keys_url": "https://developers.google.com/maps/api-security-best-practices#restricting-api-keys",
+}
+
+
+@cache
+def _get_user_schema() -> vol.Schema:
+    """Return the schema for the API key, built the first time a flow needs it."""
+    return vol.Schema(
+        {
+            vol.Required(CONF_API_KEY): str,
+            vol.Optional(SECTION_API_KEY_OPTIONS): section(
+                vol.Schema({vol.Optional(CONF_REFERRER): str}),
+                SectionConfig(collapsed=True),
+            ),
+        }
+    )
+
+
+@cache
+def _get_options_schema() -> vol.Schema:
+    """Return the schema for the config entry options."""
+    return vol.Schema(
+        {
+            vol.Optional(
+                CONF_MAX_STALENESS, default=DEFAULT_MAX_STALENESS
+            ): NumberSelector(
+                NumberSelectorConfig(
+                    min=0,
+                    max=168,
+                    step=1,
+                    unit_of_measurement="h",
+                    mode=NumberSelectorMode.BOX,
+                )
+            ),
+            vol.Optional(CONF_DAILY_CALL_BUDGET): NumberSelector(
+                NumberSelectorConfig(
+                    min=1,
+                    max=10000,
+                    step=1,
+                    unit_of_measurement="calls",
+                    mode=NumberSelectorMode.BOX,
+                )
+            ),
+            vol.Optional(CONF_HEDGE_REQUESTS, default=False): bool,
+            vol.Optional(CONF_TRACE_REQUESTS, default=False): bool,
+        }
+    )
+
+
+@cache
+def _get_reconfigure_schema() -> vol.Schema:
+    """Return the schema for the settings and alert thresholds of a location."""
+    selector = NumberSelector(
+        NumberSelectorConfig(min=1, max=5, step=1, mode=NumberSelectorMode.SLIDER)
+    )
+    return vol.Schema(
+        {
+            vol.Optional(CONF_PRIORITY, default=DEFAULT_PRIORITY): selector,
+            vol.Optional(
+                CONF_POLLEN_TYPES, default=list(CODE_MAP.values())
+            ): SelectSelector(
+                SelectSelectorConfig(
+                    options=list(CODE_MAP.values()),
+                    multiple=True,
+                    translation_key=CONF_POLLEN_TYPES,
+                )
+            ),
+            vol.Optional(CONF_PLANTS, default=[]): SelectSelector(
+                SelectSelectorConfig(
+                    options=sorted(PLANT_CODE_MAP.values()),
+                    multiple=True,
+                    translation_key=CONF_PLANTS,
+                )
+            ),
+            vol.Optional(CONF_DEADLINES, default=[]): TextSelector(
+                TextSelectorConfig(type=TextSelectorType.TIME, multiple=True)
+            ),
+            **{vol.Optional(key): selector for key in ("index", *CODE_MAP.values())},
+        }
+    )
+
+
+def _parse_deadlines(values: list[str]) -> list[str] | None:
+    """Return the sorted distinct deadlines as HH:MM, None if one is invalid."""
+    deadlines: set[str] = set()
+    for value in values:
+        if not value:
+            continue
+        if (deadline := dt_util.parse_time(value)) is None:
+            return None
+        deadlines.add(deadline.strftime("%H:%M"))
+    return sorted(deadlines)
+
+
+def _create_api(
+    hass: HomeAssistant, api_key: str, referrer: str | None
+) -> GooglePollenApi:
+    """Return a client sharing the usage ledger and coverage cache of setup."""
+    on_request = None
+    if (ledger := hass.data.get(DATA_USAGE_LEDGER)) is not None:
+        on_request = partial(ledger.async_record, usage_key_id(api_key))
+    return GooglePollenApi(
+        async_get_clientsession(hass),
+        api_key,
+        referrer=referrer,
+        on_request=on_request,
+        coverage=hass.data.get(DATA_COVERAGE),
+    )
 
 
 async def _validate_input(
@@ -53,6 +199,10 @@ async def _validate_input(
             lat=user_input[CONF_LOCATION][CONF_LATITUDE],
             lon=user_input[CONF_LOCATION][CONF_LONGITUDE],
         )
+    except GooglePollenAuthError:
+        errors["base"] = "invalid_auth"
+    except GooglePollenUnsupportedRegionError:
+        errors["base"] = "unsupported_region"
     except GooglePollenApiError as err:
         errors["base"] = "cannot_connect"
         description_placeholders["error_message"] = str(err)
@@ -80,19 +230,39 @@ def _get_location_schema(hass: HomeAssistant) -> vol.Schema:
     )
 
 
+@cache
+def _get_tracker_schema() -> vol.Schema:
+    """Return the schema for a location following a tracked entity."""
+    return vol.Schema(
+        {
+            vol.Required(CONF_NAME): str,
+            vol.Required(CONF_ENTITY_ID): EntitySelector(
+                EntitySelectorConfig(domain=["person", "device_tracker"])
+            ),
+        }
+    )
+
+
 def _is_location_already_configured(
-    hass: HomeAssistant, new_data: dict[str, float], epsilon: float = 1e-4
+    entry: ConfigEntry, new_data: dict[str, float]
 ) -> bool:
-    """Check if the location is already configured."""
-    for entry in hass.config_entries.async_entries(DOMAIN):
-        for subentry in entry.subentries.values():
-            if (
-                abs(subentry.data[CONF_LATITUDE] - new_data[CONF_LATITUDE]) <= epsilon
-                and abs(subentry.data[CONF_LONGITUDE] - new_data[CONF_LONGITUDE])
-                <= epsilon
-            ):
-                return True
-    return False
+    """Check if the location is already configured for the entry.
+
+    Other entries may have the same location, it is fetched once for all.
+    """
+    return usage_location_id(
+        new_data[CONF_LATITUDE], new_data[CONF_LONGITUDE]
+    ) in location_ids(entry)
+
+
+def _is_tracker_already_configured(hass: HomeAssistant, entity_id: str) -> bool:
+    """Check if the entity is already followed by a location."""
+    return any(
+        subentry.subentry_type == SUBENTRY_TYPE_TRACKER
+        and subentry.data[CONF_ENTITY_ID] == entity_id
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        for subentry in entry.subentries.values()
+    )
 
 
 def _is_location_name_already_configured(hass: HomeAssistant, new_data: str) -> bool:
@@ -108,24 +278,19 @@ class GooglePollenConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Google Pollen."""
 
     VERSION = 1
+    MINOR_VERSION = 2
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
         """Handle the initial step."""
         errors: dict[str, str] = {}
-        description_placeholders: dict[str, str] = {
-            "api_key_url": "https://developers.google.com/maps/documentation/pollen/get-api-key",
-            "restricting_api_keys_url": "https://developers.google.com/maps/api-security-best-practices#restricting-api-keys",
-        }
+        description_placeholders: dict[str, str] = dict(_API_KEY_PLACEHOLDERS)
         if user_input is not None:
             api_key = user_input[CONF_API_KEY]
             referrer = user_input.get(SECTION_API_KEY_OPTIONS, {}).get(CONF_REFERRER)
             self._async_abort_entries_match({CONF_API_KEY: api_key})
-            if _is_location_already_configured(self.hass, user_input[CONF_LOCATION]):
-                return self.async_abort(reason="already_configured")
-            session = async_get_clientsession(self.hass)
-            api = GooglePollenApi(session, api_key, referrer=referrer)
+            api = _create_api(self.hass, api_key, referrer)
             if await _validate_input(user_input, api, errors, description_placeholders):
                 return self.async_create_entry(
                     title="Google Pollen",
@@ -135,7 +300,7 @@ class GooglePollenConfigFlow(ConfigFlow, domain=DOMAIN):
                     },
                     subentries=[
                         {
-                            "subentry_type": "location",
+                            "subentry_type": SUBENTRY_TYPE_LOCATION,
                             "data": user_input[CONF_LOCATION],
                             "title": user_input[CONF_NAME],
                             "unique_id": None,
@@ -144,7 +309,7 @@ class GooglePollenConfigFlow(ConfigFlow, domain=DOMAIN):
                 )
         else:
             user_input = {}
-        schema = STEP_USER_DATA_SCHEMA.schema.copy()
+        schema = _get_user_schema().schema.copy()
         schema.update(_get_location_schema(self.hass).schema)
         return self.async_show_form(
             step_id="user",
@@ -155,13 +320,90 @@ class GooglePollenConfigFlow(ConfigFlow, domain=DOMAIN):
             description_placeholders=description_placeholders,
         )
 
+    async def async_step_reauth(
+        self, entry_data: Mapping[str, Any]
+    ) -> ConfigFlowResult:
+        """Handle an API key rejected by the API."""
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Ask for a new API key, or a referrer the key is allowed from."""
+        reauth_entry = self._get_reauth_entry()
+        errors: dict[str, str] = {}
+        description_placeholders: dict[str, str] = dict(_API_KEY_PLACEHOLDERS)
+        if user_input is not None:
+            api_key = user_input[CONF_API_KEY]
+            referrer = user_input.get(SECTION_API_KEY_OPTIONS, {}).get(CONF_REFERRER)
+            location = {
+                CONF_LATITUDE: self.hass.config.latitude,
+                CONF_LONGITUDE: self.hass.config.longitude,
+            }
+            for subentry in reauth_entry.subentries.values():
+                if subentry.subentry_type == SUBENTRY_TYPE_LOCATION:
+                    location = {
+                        CONF_LATITUDE: subentry.data[CONF_LATITUDE],
+                        CONF_LONGITUDE: subentry.data[CONF_LONGITUDE],
+                    }
+                    break
+            api = _create_api(self.hass, api_key, referrer)
+            if await _validate_input(
+                {CONF_LOCATION: location}, api, errors, description_placeholders
+            ):
+                return self.async_update_reload_and_abort(
+                    reauth_entry,
+                    data_updates={CONF_API_KEY: api_key, CONF_REFERRER: referrer},
+                )
+        else:
+            user_input = {
+                CONF_API_KEY: reauth_entry.data[CONF_API_KEY],
+                SECTION_API_KEY_OPTIONS: {
+                    CONF_REFERRER: reauth_entry.data.get(CONF_REFERRER)
+                },
+            }
+        return self.async_show_form(
+            step_id="reauth_confirm",
+            data_schema=self.add_suggested_values_to_schema(
+                _get_user_schema(), user_input
+            ),
+            errors=errors,
+            description_placeholders=description_placeholders,
+        )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Create the options flow."""
+        return GooglePollenOptionsFlow()
+
     @classmethod
     @callback
     def async_get_supported_subentry_types(
         cls, config_entry: ConfigEntry
     ) -> dict[str, type[ConfigSubentryFlow]]:
         """Return subentries supported by this integration."""
-        return {"location": LocationSubentryFlowHandler}
+        return {
+            SUBENTRY_TYPE_LOCATION: LocationSubentryFlowHandler,
+            SUBENTRY_TYPE_TRACKER: TrackerSubentryFlowHandler,
+        }
+
+
+class GooglePollenOptionsFlow(OptionsFlow):
+    """Handle the options of a Google Pollen config entry."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(
+                _get_options_schema(), self.config_entry.options
+            ),
+        )
 
 
 class LocationSubentryFlowHandler(ConfigSubentryFlow):
@@ -177,7 +419,9 @@ class LocationSubentryFlowHandler(ConfigSubentryFlow):
         errors: dict[str, str] = {}
         description_placeholders: dict[str, str] = {}
         if user_input is not None:
-            if _is_location_already_configured(self.hass, user_input[CONF_LOCATION]):
+            if _is_location_already_configured(
+                self._get_entry(), user_input[CONF_LOCATION]
+            ):
                 errors["base"] = "location_already_configured"
             if _is_location_name_already_configured(self.hass, user_input[CONF_NAME]):
                 errors["base"] = "location_name_already_configured"
@@ -207,3 +451,92 @@ class LocationSubentryFlowHandler(ConfigSubentryFlow):
         )
 
     async_step_user = async_step_location
+
+    async def async_step_reconfigure(
+        self, user_input: dict[str, Any] | None = None
+    ) -> SubentryFlowResult:
+        """Configure the settings and alert thresholds of a location."""
+        subentry = self._get_reconfigure_subentry()
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            deadlines = _parse_deadlines(user_input.get(CONF_DEADLINES, []))
+            if deadlines is None:
+                errors[CONF_DEADLINES] = "invalid_deadline"
+            else:
+                thresholds = dict(user_input)
+                priority = int(thresholds.pop(CONF_PRIORITY, DEFAULT_PRIORITY))
+                pollen_types = thresholds.pop(
+                    CONF_POLLEN_TYPES, list(CODE_MAP.values())
+                )
+                plants = thresholds.pop(CONF_PLANTS, [])
+                thresholds.pop(CONF_DEADLINES, None)
+                if (
+                    subentry.subentry_type == SUBENTRY_TYPE_LOCATION
+                    and (coverage := self.hass.data.get(DATA_COVERAGE)) is not None
+                ):
+                    # Reconfiguring a location asks the API about it again
+                    coverage.async_clear(
+                        subentry.data[CONF_LATITUDE], subentry.data[CONF_LONGITUDE]
+                    )
+                return self.async_update_and_abort(
+                    self._get_entry(),
+                    subentry,
+                    data_updates={
+                        CONF_PRIORITY: priority,
+                        CONF_POLLEN_TYPES: pollen_types,
+                        CONF_PLANTS: plants,
+                        CONF_DEADLINES: deadlines,
+                        CONF_THRESHOLDS: {
+                            key: int(value) for key, value in thresholds.items()
+                        },
+                    },
+                )
+        else:
+            user_input = {
+                CONF_PRIORITY: subentry.data.get(CONF_PRIORITY, DEFAULT_PRIORITY),
+                CONF_POLLEN_TYPES: subentry.data.get(
+                    CONF_POLLEN_TYPES, list(CODE_MAP.values())
+                ),
+                CONF_PLANTS: subentry.data.get(CONF_PLANTS, []),
+                CONF_DEADLINES: subentry.data.get(CONF_DEADLINES, []),
+                **subentry.data.get(CONF_THRESHOLDS, {}),
+            }
+        return self.async_show_form(
+            step_id="reconfigure",
+            data_schema=self.add_suggested_values_to_schema(
+                _get_reconfigure_schema(), user_input
+            ),
+            errors=errors,
+        )
+
+
+class TrackerSubentryFlowHandler(LocationSubentryFlowHandler):
+    """Handle a subentry flow for a location following a tracked entity."""
+
+    async def async_step_user(
+        self, user_input: dict[str, Any] | None = None
+    ) -> SubentryFlowResult:
+        """Handle the tracked entity step."""
+        if self._get_entry().state != ConfigEntryState.LOADED:
+            return self.async_abort(reason="entry_not_loaded")
+
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            if _is_tracker_already_configured(self.hass, user_input[CONF_ENTITY_ID]):
+                errors["base"] = "tracker_already_configured"
+            if _is_location_name_already_configured(self.hass, user_input[CONF_NAME]):
+                errors["base"] = "location_name_already_configured"
+            if not errors:
+                return self.async_create_entry(
+                    title=user_input[CONF_NAME],
+                    data={CONF_ENTITY_ID: user_input[CONF_ENTITY_ID]},
+                )
+        else:
+            user_input = {}
+        return self.async_show_form(
+            step_id="user",
+            data_schema=self.add_suggested_values_to_schema(
+                _get_tracker_schema(), user_input
+            ),
+            errors=errors,
+        )
@@ -5,3 +5,28 @@ from typing import Final
 DOMAIN = "google_pollen"
 SECTION_API_KEY_OPTIONS: Final = "api_key_options"
 CONF_REFERRER: Final = "referrer"
+CONF_TRACE_REQUESTS: Final = "trace_requests"
+CONF_HEDGE_REQUESTS: Final = "hedge_requests"
+CONF_MAX_STALENESS: Final = "max_staleness"
+CONF_THRESHOLDS: Final = "thresholds"
+CONF_DAILY_CALL_BUDGET: Final = "daily_call_budget"
+CONF_PRIORITY: Final = "priority"
+CONF_POLLEN_TYPES: Final = "pollen_types"
+CONF_PLANTS: Final = "plants"
+CONF_DEADLINES: Final = "deadlines"
+
+SUBENTRY_TYPE_LOCATION: Final = "location"
+SUBENTRY_TYPE_TRACKER: Final = "tracker"
+
+# Hours the last good data is served for when updates fail
+DEFAULT_MAX_STALENESS: Final = 24
+
+ATTR_CONFIG_ENTRY_ID: Final = "config_entry_id"
+ATTR_LOCATIONS: Final = "locations"
+ATTR_CYCLES: Final = "cycles"
+ATTR_FILENAME: Final = "filename"
+
+# Responses larger than this many bytes are parsed outside the event loop
+PARSE_OFFLOAD_THRESHOLD: Final = 16 * 1024
+
+EVENT_THRESHOLD_CROSSED: Final = f"{DOMAIN}_threshold_crossed"
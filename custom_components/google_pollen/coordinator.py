@@ -1,30 +1,76 @@
 """Coordinator for fetching data from Google Pollen API."""
 
+import asyncio
 import logging
+import random
 from dataclasses import dataclass
-from datetime import timedelta
-from typing import Final
+from datetime import datetime, time, timedelta
+from typing import TYPE_CHECKING, Final
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers.update_coordinator import (
+    TimestampDataUpdateCoordinator,
+    UpdateFailed,
+)
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .const import (
+    CONF_DEADLINES,
+    CONF_MAX_STALENESS,
+    CONF_PLANTS,
+    CONF_POLLEN_TYPES,
+    CONF_THRESHOLDS,
+    DEFAULT_MAX_STALENESS,
+    DOMAIN,
+    EVENT_THRESHOLD_CROSSED,
+)
 from .google_pollen_api import (
     GooglePollenApi,
     GooglePollenApiError,
+    GooglePollenAuthError,
+    GooglePollenQuotaError,
+    GooglePollenUnsupportedRegionError,
     PollenCurrentConditionsData,
+    PollenSelection,
 )
+from .locations import SharedPollenLocation
+from .trend import PollenTrendBuffer
+from .usage import DATA_USAGE_LEDGER, usage_key_id
+
+if TYPE_CHECKING:
+    from .profiling import RefreshProfiler
 
 _LOGGER = logging.getLogger(__name__)
 
 UPDATE_INTERVAL: Final = timedelta(hours=6)
+# Retry cadence while the last good data is served after a failed update
+STALE_RETRY_INTERVAL: Final = timedelta(minutes=15)
+
+# Scheduled refreshes are deferred while the event loop takes longer than
+# this many seconds to get back to a task
+LOOP_LAG_THRESHOLD: Final = 0.1
+# Deferred refreshes are retried after 1 to 2 times this delay, spreading
+# them out, and run anyway once they were deferred for the maximum
+LOOP_LAG_DEFER_DELAY: Final = timedelta(seconds=30)
+MAX_LOOP_LAG_DEFERRAL: Final = timedelta(minutes=10)
 
 type GooglePollenConfigEntry = ConfigEntry["GooglePollenRuntimeData"]
 
 
-class GooglePollenUpdateCoordinator(DataUpdateCoordinator[PollenCurrentConditionsData]):
+async def _async_measure_loop_lag() -> float:
+    """Return how long the event loop took to resume a yielding task."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.sleep(0)
+    return loop.time() - start
+
+
+class GooglePollenUpdateCoordinator(
+    TimestampDataUpdateCoordinator[PollenCurrentConditionsData]
+):
     """Coordinator for fetching Google Pollen data."""
 
     config_entry: GooglePollenConfigEntry
@@ -43,22 +89,252 @@ class GooglePollenUpdateCoordinator(DataUpdateCoordinator[PollenCurrentCondition
             config_entry=config_entry,
             name=f"{DOMAIN}_{subentry_id}",
             update_interval=UPDATE_INTERVAL,
+            # An unchanged response returns the same data object, which the
+            # entities need not be told about
+            always_update=False,
         )
         self.client = client
+        self.subentry_id = subentry_id
+        self._key_id = usage_key_id(config_entry.data[CONF_API_KEY])
         subentry = config_entry.subentries[subentry_id]
-        self.lat = subentry.data[CONF_LATITUDE]
-        self.long = subentry.data[CONF_LONGITUDE]
+        # None while the position of a tracked entity is unknown
+        self.lat: float | None = subentry.data.get(CONF_LATITUDE)
+        self.long: float | None = subentry.data.get(CONF_LONGITUDE)
+        self.max_staleness = timedelta(
+            hours=config_entry.options.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS)
+        )
+        # Interval between successful updates, see async_set_base_interval
+        self.base_interval = UPDATE_INTERVAL
+        self.stale = False
+        # Set while the location is shared with other config entries
+        self.shared_location: SharedPollenLocation | None = None
+        self.thresholds: dict[str, int] = dict(subentry.data.get(CONF_THRESHOLDS, {}))
+        self.selection = PollenSelection(
+            types=frozenset(subentry.data[CONF_POLLEN_TYPES])
+            if CONF_POLLEN_TYPES in subentry.data
+            else None,
+            plants=frozenset(subentry.data.get(CONF_PLANTS, ())),
+        )
+        # Local times at which the data must be fresh, see deadlines.py
+        self.deadlines: list[time] = [
+            deadline
+            for value in subentry.data.get(CONF_DEADLINES, ())
+            if (deadline := dt_util.parse_time(value)) is not None
+        ]
+        # Values of the last day, for the trend sensors
+        self.trend = PollenTrendBuffer()
+        # Whether each monitored value was at or above its threshold
+        self._above_threshold: dict[str, bool] = {}
+        # Scheduled refreshes deferred because the event loop lagged
+        self.deferred_refreshes = 0
+        self._deferred_for = timedelta()
+        # Set while the next scheduled refreshes are profiled
+        self.refresh_profiler: RefreshProfiler | None = None
+
+    @property
+    def position(self) -> tuple[float, float] | None:
+        """Return the coordinates data is fetched for, None while unknown."""
+        if self.lat is None or self.long is None:
+            return None
+        return self.lat, self.long
+
+    @property
+    def data_age(self) -> timedelta | None:
+        """Return the age of the data, None when it was fetched on the last update."""
+        if not self.stale or self.last_update_success_time is None:
+            return None
+        return dt_util.utcnow() - self.last_update_success_time
+
+    @callback
+    def async_set_base_interval(self, interval: timedelta) -> None:
+        """Set the interval between successful updates."""
+        if self.update_interval == self.base_interval:
+            self.update_interval = interval
+        self.base_interval = interval
+
+    async def _handle_refresh_interval(self, _now: datetime | None = None) -> None:
+        """Defer a scheduled refresh while the event loop lags.
+
+        Refreshes requested otherwise, such as the first one, always run.
+        """
+        self._unsub_refresh = None
+        if (
+            self._deferred_for < MAX_LOOP_LAG_DEFERRAL
+            and await _async_measure_loop_lag() > LOOP_LAG_THRESHOLD
+        ):
+            if self._unsub_refresh is not None:
+                # Another refresh ran while the lag was measured
+                return
+            delay = LOOP_LAG_DEFER_DELAY * random.uniform(1, 2)
+            self.deferred_refreshes += 1
+            self._deferred_for += delay
+            _LOGGER.debug("Event loop lags, deferring refresh by %s", delay)
+            self._unsub_refresh = self.hass.loop.call_later(
+                delay.total_seconds(), self._async_resume_refresh
+            ).cancel
+            return
+        self._deferred_for = timedelta()
+        if self.position is not None and (
+            ledger := self.hass.data.get(DATA_USAGE_LEDGER)
+        ):
+            # Calls outside the schedule are held back from the call budget
+            ledger.async_record_scheduled(self._key_id)
+        if self.refresh_profiler is not None:
+            await self.refresh_profiler.async_profile(
+                self, super()._handle_refresh_interval(_now)
+            )
+        else:
+            await super()._handle_refresh_interval(_now)
+
+    @callback
+    def _async_resume_refresh(self) -> None:
+        """Run a deferred refresh."""
+        self.config_entry.async_create_background_task(
+            self.hass,
+            self._handle_refresh_interval(),
+            name=f"{self.name} - {self.config_entry.title} - deferred refresh",
+            eager_start=True,
+        )
+
+    def _can_serve_stale(self, now: datetime) -> bool:
+        """Return if the last good data may still be served.
+
+        There is no good data before the first successful update, which is
+        when the success time is set.
+        """
+        return (
+            self.last_update_success_time is not None
+            and now - self.last_update_success_time < self.max_staleness
+        )
+
+    async def async_config_entry_first_refresh(self) -> None:
+        """Refresh the data when the entry is set up.
+
+        A location the API has no data for does not keep the other locations
+        of the entry from being set up. It stays without data and is tried
+        again on its next refresh.
+        """
+        try:
+            await super().async_config_entry_first_refresh()
+        except ConfigEntryNotReady:
+            if not isinstance(self.last_exception, UpdateFailed) or not isinstance(
+                self.last_exception.__cause__, GooglePollenUnsupportedRegionError
+            ):
+                raise
+
+    @callback
+    def _async_refresh_finished(self) -> None:
+        """Only move the last update time when fresh data was fetched."""
+        if not self.stale:
+            super()._async_refresh_finished()
 
     async def _async_update_data(self) -> PollenCurrentConditionsData:
         """Fetch pollen data for this coordinate."""
         try:
-            return await self.client.async_get_current_conditions(self.lat, self.long)
-        except GooglePollenApiError as ex:
-            _LOGGER.debug("Cannot fetch pollen data: %s", str(ex))
-            raise UpdateFailed(
+            if self.shared_location is not None:
+                data = await self.shared_location.async_get(self)
+            elif (position := self.position) is not None:
+                data = await self.client.async_get_current_conditions(
+                    *position, self.selection, self.data
+                )
+            else:
+                raise UpdateFailed(
+                    translation_domain=DOMAIN,
+                    translation_key="position_unknown",
+                    translation_placeholders={
+                        "location": self.config_entry.subentries[self.subentry_id].title
+                    },
+                )
+        except GooglePollenAuthError as ex:
+            # No further updates are scheduled until the reauth flow reloads
+            # the entry, and the client fails the other locations right away
+            raise ConfigEntryAuthFailed(
                 translation_domain=DOMAIN,
-                translation_key="unable_to_fetch",
+                translation_key="invalid_api_key",
             ) from ex
+        except GooglePollenQuotaError as ex:
+            # Nothing is sent for this key until the quota resets
+            pause = self.base_interval
+            if ex.reset is not None:
+                pause = max(ex.reset - dt_util.utcnow(), STALE_RETRY_INTERVAL)
+            return self._handle_update_error(ex, pause, pause, "quota_exceeded")
+        except GooglePollenUnsupportedRegionError as ex:
+            return self._handle_update_error(
+                ex, self.base_interval, self.base_interval, "unsupported_region"
+            )
+        except GooglePollenApiError as ex:
+            return self._handle_update_error(
+                ex,
+                min(STALE_RETRY_INTERVAL, self.base_interval),
+                self.base_interval,
+                "unable_to_fetch",
+            )
+        trend_moved = self.trend.add(dt_util.utcnow(), data)
+        # Even unchanged data clears the data age attribute or moves the trend
+        self.always_update = self.stale or trend_moved
+        self.stale = False
+        self.update_interval = self.base_interval
+        if self.thresholds:
+            self._async_check_thresholds(data)
+        return data
+
+    def _handle_update_error(
+        self,
+        ex: GooglePollenApiError,
+        stale_interval: timedelta,
+        failed_interval: timedelta,
+        translation_key: str,
+    ) -> PollenCurrentConditionsData:
+        """Serve the last good data or raise UpdateFailed after a failed update."""
+        if self._can_serve_stale(dt_util.utcnow()):
+            _LOGGER.debug(
+                "Cannot fetch pollen data, keeping data from %s: %s",
+                self.last_update_success_time,
+                str(ex),
+            )
+            self.stale = True
+            self.update_interval = stale_interval
+            # The data age attribute moves on with every failed update
+            self.always_update = True
+            return self.data
+        _LOGGER.debug("Cannot fetch pollen data: %s", str(ex))
+        self.stale = False
+        self.update_interval = failed_interval
+        raise UpdateFailed(
+            translation_domain=DOMAIN,
+            translation_key=translation_key,
+        ) from ex
+
+    @callback
+    def _async_check_thresholds(self, data: PollenCurrentConditionsData) -> None:
+        """Fire an event for every monitored value that crossed its threshold.
+
+        The first update only records where each value stands, so a restart
+        does not fire events for levels that were already reached.
+        """
+        for key, threshold in self.thresholds.items():
+            if key == "index":
+                value, category = data.index, data.category
+            else:
+                type_data = data.types.get(key, {})
+                value, category = type_data.get("value"), type_data.get("category")
+            above = value is not None and value >= threshold
+            previous = self._above_threshold.get(key)
+            self._above_threshold[key] = above
+            if previous is None or previous == above:
+                continue
+            self.hass.bus.async_fire(
+                EVENT_THRESHOLD_CROSSED,
+                {
+                    "config_entry_id": self.config_entry.entry_id,
+                    "subentry_id": self.subentry_id,
+                    "pollen_type": key,
+                    "value": value,
+                    "category": category,
+                    "threshold": threshold,
+                    "direction": "above" if above else "below",
+                },
+            )
 
 
 @dataclass
@@ -66,4 +342,7 @@ class GooglePollenRuntimeData:
     """Runtime data for the Google Pollen integration."""
 
     api: GooglePollenApi
+    key_id: str
     subentries_runtime_data: dict[str, GooglePollenUpdateCoordinator]
+    # Set once a reload is scheduled, further updates are picked up by it
+    reload_pending: bool = False
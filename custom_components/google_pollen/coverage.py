@@ -0,0 +1,84 @@
+"""Persistent cache of regions without Google Pollen API coverage."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Final
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DOMAIN
+
+STORAGE_VERSION: Final = 1
+STORAGE_KEY: Final = f"{DOMAIN}.coverage"
+SAVE_DELAY: Final = 10
+
+# Coverage changes rarely, a region is only asked about again after this
+UNSUPPORTED_REGION_TTL: Final = timedelta(days=30)
+
+
+def coverage_region_id(lat: float, lon: float) -> str:
+    """Return the region of a pair of coordinates, about 10 km across."""
+    return f"{lat:.1f},{lon:.1f}"
+
+
+class GooglePollenCoverageCache:
+    """Remember the regions the API has no pollen data for."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, str]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        # Time each region was found unsupported
+        self._unsupported: dict[str, datetime] = {}
+
+    async def async_load(self) -> None:
+        """Load the unexpired regions from storage."""
+        if (data := await self._store.async_load()) is None:
+            return
+        now = dt_util.utcnow()
+        for region, raw in data.items():
+            if (
+                found := dt_util.parse_datetime(raw)
+            ) is not None and now - found < UNSUPPORTED_REGION_TTL:
+                self._unsupported[region] = found
+
+    @callback
+    def _data_to_save(self) -> dict[str, str]:
+        """Return the data to store."""
+        return {
+            region: found.isoformat() for region, found in self._unsupported.items()
+        }
+
+    @callback
+    def is_unsupported(self, lat: float, lon: float) -> bool:
+        """Return if the coordinates are in a region known to be unsupported."""
+        region = coverage_region_id(lat, lon)
+        if (found := self._unsupported.get(region)) is None:
+            return False
+        if dt_util.utcnow() - found < UNSUPPORTED_REGION_TTL:
+            return True
+        del self._unsupported[region]
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return False
+
+    @callback
+    def async_mark_unsupported(self, lat: float, lon: float) -> None:
+        """Remember that the API has no data for the region of the coordinates."""
+        self._unsupported[coverage_region_id(lat, lon)] = dt_util.utcnow()
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_clear(self, lat: float, lon: float) -> None:
+        """Forget the region of the coordinates, so it is asked about again."""
+        if self._unsupported.pop(coverage_region_id(lat, lon), None) is not None:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    def __len__(self) -> int:
+        """Return the number of regions known to be unsupported."""
+        return len(self._unsupported)
+
+
+DATA_COVERAGE: HassKey[GooglePollenCoverageCache] = HassKey(f"{DOMAIN}_coverage")
@@ -0,0 +1,88 @@
+"""Prefetch pollen data shortly before the deadlines of locations."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import date, datetime, time, timedelta
+from functools import partial
+from typing import Final
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_change
+
+from .budget import MIN_UPDATE_INTERVAL
+from .coordinator import GooglePollenUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Prefetches start this long before a deadline, leaving time for retries
+PREFETCH_LEAD: Final = timedelta(minutes=10)
+
+
+def prefetch_time(deadline: time) -> time:
+    """Return the local time the prefetch for a deadline starts at."""
+    # Any date works, the day before is reached for early deadlines
+    return (datetime.combine(date(2000, 1, 2), deadline) - PREFETCH_LEAD).time()
+
+
+def _is_fresh(coordinator: GooglePollenUpdateCoordinator, now: datetime) -> bool:
+    """Return if the data of a location is recent enough for a deadline."""
+    if coordinator.shared_location is not None:
+        fetched_at = coordinator.shared_location.fetched_at
+    else:
+        fetched_at = coordinator.last_update_success_time
+    return fetched_at is not None and now - fetched_at < MIN_UPDATE_INTERVAL
+
+
+async def _async_prefetch(
+    coordinators: list[GooglePollenUpdateCoordinator], now: datetime
+) -> None:
+    """Refresh the locations sharing a deadline whose data is not fresh."""
+    due = [
+        coordinator
+        for coordinator in coordinators
+        if coordinator.lat is not None and not _is_fresh(coordinator, now)
+    ]
+    _LOGGER.debug("Prefetching %s of %s locations", len(due), len(coordinators))
+    for coordinator in due:
+        if coordinator.shared_location is not None:
+            coordinator.shared_location.async_invalidate()
+    # The next periodic refresh is scheduled from the prefetch, so it does
+    # not land right at the deadline
+    await asyncio.gather(*(coordinator.async_refresh() for coordinator in due))
+
+
+@callback
+def async_track_deadlines(
+    hass: HomeAssistant, coordinators: Iterable[GooglePollenUpdateCoordinator]
+) -> CALLBACK_TYPE:
+    """Prefetch data before the deadlines, return a callback to stop.
+
+    Locations sharing a deadline are prefetched in one batch, so shared
+    locations are fetched once. Locations with data younger than the
+    minimum update interval are left out.
+    """
+    batches: defaultdict[time, list[GooglePollenUpdateCoordinator]] = defaultdict(list)
+    for coordinator in coordinators:
+        for deadline in coordinator.deadlines:
+            batches[prefetch_time(deadline)].append(coordinator)
+    unsubscribes = [
+        async_track_time_change(
+            hass,
+            partial(_async_prefetch, batch),
+            hour=start.hour,
+            minute=start.minute,
+            second=start.second,
+        )
+        for start, batch in batches.items()
+    ]
+
+    @callback
+    def stop_tracking() -> None:
+        for unsubscribe in unsubscribes:
+            unsubscribe()
+
+    return stop_tracking
@@ -0,0 +1,43 @@
+"""Diagnostics support for Google Pollen."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from .coordinator import GooglePollenConfigEntry
+from .coverage import DATA_COVERAGE
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: GooglePollenConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    runtime_data = entry.runtime_data
+    tracer = runtime_data.api.tracer
+    parse_stats = runtime_data.api.parse_stats
+    return {
+        "locations": len(runtime_data.subentries_runtime_data),
+        "shared_locations": sum(
+            len(coordinator.shared_location.subscribers) > 1
+            for coordinator in runtime_data.subentries_runtime_data.values()
+            if coordinator.shared_location is not None
+        ),
+        "deferred_refreshes": sum(
+            coordinator.deferred_refreshes
+            for coordinator in runtime_data.subentries_runtime_data.values()
+        ),
+        "update_intervals": {
+            subentry_id: coordinator.base_interval.total_seconds()
+            for subentry_id, coordinator in runtime_data.subentries_runtime_data.items()
+        },
+        "unsupported_regions": len(hass.data[DATA_COVERAGE]),
+        "parse_stats": {
+            **asdict(parse_stats),
+            "unchanged_rate": parse_stats.unchanged_rate,
+        },
+        "hedge_stats": asdict(runtime_data.api.hedge_stats),
+        "request_timings": tracer.as_dict() if tracer is not None else None,
+    }
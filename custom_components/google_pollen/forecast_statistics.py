@@ -0,0 +1,130 @@
+"""Import the Google Pollen forecast into long-term statistics."""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Final
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.recorder import get_instance
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .google_pollen_api import CODE_MAP
+
+if TYPE_CHECKING:
+    from .coordinator import GooglePollenUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Refreshes landing within this window are written in the same batch
+IMPORT_COOLDOWN: Final = 30
+
+FORECAST_STATISTIC_KEYS: Final = ("index", *CODE_MAP.values())
+FORECAST_STATISTIC_NAMES: Final = {
+    "index": "pollen index forecast",
+    **{key: f"{key} pollen forecast" for key in CODE_MAP.values()},
+}
+
+
+def forecast_statistic_id(subentry_id: str, key: str) -> str:
+    """Return the external statistic id of a location's forecast."""
+    return f"{DOMAIN}:{subentry_id.lower()}_{key}_forecast"
+
+
+class ForecastStatisticsImporter:
+    """Batch the forecasts of all locations into one statistics import."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the importer."""
+        self.hass = hass
+        self._pending: dict[str, GooglePollenUpdateCoordinator] = {}
+        self._debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=IMPORT_COOLDOWN,
+            immediate=False,
+            function=self._async_import,
+        )
+
+    @callback
+    def async_schedule_import(self, coordinator: GooglePollenUpdateCoordinator) -> None:
+        """Queue the forecast of a coordinator for the next batch."""
+        if not coordinator.last_update_success or not coordinator.data.forecast:
+            return
+        self._pending[coordinator.subentry_id] = coordinator
+        self._debouncer.async_schedule_call()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel any pending import."""
+        self._debouncer.async_shutdown()
+        self._pending.clear()
+
+    async def _async_import(self) -> None:
+        """Import the forecasts queued since the last batch."""
+        pending, self._pending = self._pending, {}
+        if "recorder" not in self.hass.config.components:
+            return
+        # The recorder pulls in SQLAlchemy, only import it once it is running
+        from homeassistant.components.recorder.models import (
+            StatisticData,
+            StatisticMeanType,
+            StatisticMetaData,
+        )
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+        )
+
+        for subentry_id, coordinator in pending.items():
+            title = coordinator.config_entry.subentries[subentry_id].title
+            statistics: dict[str, list[StatisticData]] = {
+                key: [] for key in FORECAST_STATISTIC_KEYS
+            }
+            for day in coordinator.data.forecast:
+                # Statistics start on the hour, which local midnight is not
+                # in zones with offsets of part of an hour
+                start = dt_util.as_utc(dt_util.start_of_local_day(day.date)).replace(
+                    minute=0, second=0, microsecond=0
+                )
+                if day.index is not None:
+                    statistics["index"].append(
+                        StatisticData(
+                            start=start, mean=day.index, min=day.index, max=day.index
+                        )
+                    )
+                for key, values in day.types.items():
+                    if (value := values.get("value")) is not None:
+                        statistics[key].append(
+                            StatisticData(start=start, mean=value, min=value, max=value)
+                        )
+            for key, rows in statistics.items():
+                if not rows:
+                    continue
+                metadata = StatisticMetaData(
+                    mean_type=StatisticMeanType.ARITHMETIC,
+                    has_sum=False,
+                    name=f"{title} {FORECAST_STATISTIC_NAMES[key]}",
+                    source=DOMAIN,
+                    statistic_id=forecast_statistic_id(subentry_id, key),
+                    unit_of_measurement=None,
+                )
+                async_add_external_statistics(self.hass, metadata, rows)
+
+
+@callback
+def async_clear_forecast_statistics(
+    hass: HomeAssistant, subentry_ids: Iterable[str]
+) -> None:
+    """Remove the forecast statistics of locations that no longer exist."""
+    if "recorder" not in hass.config.components:
+        return
+    statistic_ids = [
+        forecast_statistic_id(subentry_id, key)
+        for subentry_id in subentry_ids
+        for key in FORECAST_STATISTIC_KEYS
+    ]
+    if statistic_ids:
+        get_instance(hass).async_clear_statistics(statistic_ids)
@@ -6,14 +6,259 @@ This is a lightweight client for the Google Pollen v1 forecast API.
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any
+import asyncio
+import contextlib
+import hashlib
+import json
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime, timedelta
+from datetime import time as dt_time
+from typing import TYPE_CHECKING, Any, Protocol
+from zoneinfo import ZoneInfo
 
 import aiohttp
 
+from .tracing import RollingPercentiles
+
+if TYPE_CHECKING:
+    from .coverage import GooglePollenCoverageCache
+    from .tracing import RequestTiming, RequestTracer
+
+# Number of days requested from the forecast endpoint, the API allows 1 to 5
+FORECAST_DAYS = 5
+
+REQUEST_TIMEOUT_SECONDS = 20
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS)
+
+# A duplicate request is sent when no response arrived by this percentile of
+# the latency of the last HEDGE_WINDOW requests, once HEDGE_MIN_SAMPLES are
+# known, for at most HEDGE_MAX_RATE of the requests in the window
+HEDGE_PERCENTILE = 95
+HEDGE_WINDOW = 100
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MAX_RATE = 0.05
+
+# Daily quotas of Google Maps Platform APIs reset at midnight Pacific time
+QUOTA_RESET_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+# Map API codes to lowercase keys used by sensor entities
+CODE_MAP = {"GRASS": "grass", "TREE": "tree", "WEED": "weed"}
+
+# Map API plant codes to lowercase keys used by plant sensor entities
+PLANT_CODE_MAP = {
+    code: code.lower()
+    for code in (
+        "ALDER",
+        "ASH",
+        "BIRCH",
+        "COTTONWOOD",
+        "CYPRESS_PINE",
+        "ELM",
+        "GRAMINALES",
+        "HAZEL",
+        "JAPANESE_CEDAR",
+        "JAPANESE_CYPRESS",
+        "JUNIPER",
+        "MAPLE",
+        "MUGWORT",
+        "OAK",
+        "OLIVE",
+        "PINE",
+        "RAGWEED",
+    )
+}
+
 
 class GooglePollenApiError(Exception):
-    """Generic error from Google Pollen client."""
+    """Generic error from Google Pollen client.
+
+    Errors raised for an error response keep its status, body and
+    Retry-After header, so the response can be recorded.
+    """
+
+    status: int | None = None
+    body: bytes = b""
+    retry_after: str | None = None
+
+
+class GooglePollenAuthError(GooglePollenApiError):
+    """The API key is invalid, restricted or not allowed from the referrer."""
+
+
+class GooglePollenQuotaError(GooglePollenApiError):
+    """The quota of the API key is exhausted."""
+
+    def __init__(self, message: str, reset: datetime | None = None) -> None:
+        """Initialize the error with the time the quota is expected to reset."""
+        super().__init__(message)
+        self.reset = reset
+
+
+class GooglePollenUnsupportedRegionError(GooglePollenApiError):
+    """The API has no pollen data for the location.
+
+    ``cacheable`` is only set when the response says so about the region,
+    not for a request the API rejected because of its location.
+    """
+
+    cacheable: bool = True
+
+
+class GooglePollenBadRequestError(GooglePollenApiError):
+    """The API rejected the request."""
+
+
+class GooglePollenTransientError(GooglePollenApiError):
+    """The request failed for a reason that may go away on a retry."""
+
+
+def _quota_reset(now: datetime, retry_after: str | None) -> datetime:
+    """Return when a request may be retried after a quota error.
+
+    Without a Retry-After header the daily quota is assumed, which Google
+    resets at midnight Pacific time.
+    """
+    if retry_after is not None:
+        with contextlib.suppress(ValueError):
+            return now + timedelta(seconds=max(float(retry_after), 0))
+    pacific_now = now.astimezone(QUOTA_RESET_TIMEZONE)
+    reset = datetime.combine(
+        pacific_now.date() + timedelta(days=1), dt_time(), QUOTA_RESET_TIMEZONE
+    )
+    return reset.astimezone(UTC)
+
+
+def error_from_response(
+    status: int, body: bytes, retry_after: str | None = None
+) -> GooglePollenApiError:
+    """Return the error raised for an error response of the API."""
+    error = _classify_error(status, body, retry_after)
+    error.status = status
+    error.body = body
+    error.retry_after = retry_after
+    return error
+
+
+def _classify_error(
+    status: int, body: bytes, retry_after: str | None
+) -> GooglePollenApiError:
+    """Classify an error response of the API."""
+    error: dict[str, Any] = {}
+    with contextlib.suppress(ValueError):
+        if isinstance(payload := json.loads(body), dict):
+            error = payload.get("error") or {}
+    message: str = error.get("message") or f"HTTP {status}"
+    reasons = {
+        detail.get("reason")
+        for detail in error.get("details") or []
+        if isinstance(detail, dict)
+    }
+    api_status = error.get("status")
+
+    if (
+        status in (401, 403)
+        or api_status in ("UNAUTHENTICATED", "PERMISSION_DENIED")
+        or any(reason and reason.startswith("API_KEY") for reason in reasons)
+    ):
+        return GooglePollenAuthError(message)
+    if status == 429 or api_status == "RESOURCE_EXHAUSTED":
+        return GooglePollenQuotaError(
+            message, _quota_reset(datetime.now(UTC), retry_after)
+        )
+    if status == 404 or (status == 400 and "location" in message.lower()):
+        region_error = GooglePollenUnsupportedRegionError(message)
+        region_error.cacheable = status == 404 or any(
+            reason and "REGION" in reason for reason in reasons
+        )
+        return region_error
+    if 400 <= status < 500:
+        return GooglePollenBadRequestError(message)
+    return GooglePollenTransientError(message)
+
+
+class SessionTransport:
+    """Send forecast requests with an aiohttp session."""
+
+    def __init__(self, session: aiohttp.ClientSession) -> None:
+        """Initialize the transport."""
+        self._session = session
+
+    async def async_request(
+        self,
+        params: dict[str, Any],
+        headers: dict[str, str],
+        trace_request_ctx: Any = None,
+    ) -> bytes:
+        """Return the body of a successful forecast response."""
+        async with self._session.get(
+            GooglePollenApi.BASE_URL,
+            params=params,
+            headers=headers,
+            timeout=REQUEST_TIMEOUT,
+            trace_request_ctx=trace_request_ctx,
+        ) as resp:
+            body = await resp.read()
+            if resp.status >= 400:
+                raise error_from_response(
+                    resp.status, body, resp.headers.get("Retry-After")
+                )
+            return body
+
+
+class PollenTransport(Protocol):
+    """Anything that can answer forecast requests, see ``SessionTransport``."""
+
+    async def async_request(
+        self,
+        params: dict[str, Any],
+        headers: dict[str, str],
+        trace_request_ctx: Any = None,
+    ) -> bytes:
+        """Return the body of a successful forecast response."""
+
+
+@dataclass(frozen=True, slots=True)
+class PollenSelection:
+    """Pollen types and plants to parse from a response.
+
+    ``types`` of None selects every type. Plants are only parsed for the
+    current conditions, and only those selected.
+    """
+
+    types: frozenset[str] | None = None
+    plants: frozenset[str] = frozenset()
+
+    def covers(self, other: PollenSelection) -> bool:
+        """Return if everything selected by the other selection is selected."""
+        return (
+            self.types is None
+            or (other.types is not None and other.types <= self.types)
+        ) and other.plants <= self.plants
+
+    def union(self, other: PollenSelection) -> PollenSelection:
+        """Return the selection of what either selection selects."""
+        return PollenSelection(
+            types=None
+            if self.types is None or other.types is None
+            else self.types | other.types,
+            plants=self.plants | other.plants,
+        )
+
+
+ALL_POLLEN_TYPES = PollenSelection()
+
+
+@dataclass
+class PollenForecastDay:
+    """Parsed pollen data for one forecast day."""
+
+    date: date
+    index: int | None
+    category: str | None
+    types: dict[str, dict[str, Any]]
 
 
 @dataclass
@@ -23,6 +268,158 @@ class PollenCurrentConditionsData:
     index: int | None
     category: str | None
     types: dict[str, dict[str, Any]]
+    forecast: list[PollenForecastDay] = field(default_factory=list)
+    plants: dict[str, dict[str, Any]] = field(default_factory=dict)
+    # Digest of the response and selection the data was parsed from
+    content_hash: bytes | None = field(default=None, compare=False, repr=False)
+
+
+@dataclass
+class ParseStats:
+    """Time the event loop spent decoding and parsing responses."""
+
+    parses: int = 0
+    # Responses identical to the previous one of their location, not parsed
+    unchanged: int = 0
+    offloaded: int = 0
+    loop_blocking_total: float = 0.0
+    loop_blocking_max: float = 0.0
+    loop_blocking_last: float = 0.0
+
+    def record(self, blocking: float, offloaded: bool) -> None:
+        """Record one parsed response."""
+        self.parses += 1
+        if offloaded:
+            self.offloaded += 1
+        self.loop_blocking_total += blocking
+        self.loop_blocking_max = max(self.loop_blocking_max, blocking)
+        self.loop_blocking_last = blocking
+
+    @property
+    def unchanged_rate(self) -> float | None:
+        """Return the share of responses that were not parsed."""
+        if not (responses := self.parses + self.unchanged):
+            return None
+        return self.unchanged / responses
+
+
+@dataclass
+class HedgeStats:
+    """Requests answered by a duplicate sent after the learned latency."""
+
+    requests: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    delay: float | None = None
+
+
+def _parse_day(
+    pollen_type_info: list[dict[str, Any]],
+    types_selected: frozenset[str] | None = None,
+) -> tuple[int | None, str | None, dict[str, dict[str, Any]]]:
+    """Parse the pollen types of one day into an overall index and per-type values.
+
+    The overall index covers every type, values are only kept for the
+    selected types.
+    """
+    types: dict[str, dict[str, Any]] = {}
+    max_value: int | None = None
+    max_category: str | None = None
+
+    for entry in pollen_type_info:
+        code = entry.get("code", "")
+        key = CODE_MAP.get(code)
+        if key is None:
+            continue
+
+        index_info = entry.get("indexInfo") or {}
+        value = index_info.get("value")
+        category = index_info.get("category")
+
+        if types_selected is None or key in types_selected:
+            types[key] = {"value": value, "category": category}
+
+        # Track the highest index across in-season types for the overall reading
+        if entry.get("inSeason") and value is not None:
+            if max_value is None or value > max_value:
+                max_value = value
+                max_category = category
+
+    return max_value, max_category, types
+
+
+def _parse_plants(
+    plant_info: list[dict[str, Any]], plants_selected: frozenset[str]
+) -> dict[str, dict[str, Any]]:
+    """Parse the selected plants of one day."""
+    plants: dict[str, dict[str, Any]] = {}
+    for entry in plant_info:
+        key = PLANT_CODE_MAP.get(entry.get("code", ""))
+        if key is None or key not in plants_selected:
+            continue
+        index_info = entry.get("indexInfo") or {}
+        plants[key] = {
+            "name": entry.get("displayName") or key,
+            "value": index_info.get("value"),
+            "category": index_info.get("category"),
+        }
+    return plants
+
+
+def _parse_date(raw: dict[str, Any] | None) -> date | None:
+    """Parse a google.type.Date into a date."""
+    if not raw:
+        return None
+    try:
+        return date(raw["year"], raw["month"], raw["day"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _content_hash(body: bytes, selection: PollenSelection) -> bytes:
+    """Return a digest of a response and the selection it is parsed for."""
+    digest = hashlib.blake2b(body, digest_size=16)
+    types = None if selection.types is None else sorted(selection.types)
+    digest.update(repr((types, sorted(selection.plants))).encode())
+    return digest.digest()
+
+
+def _parse_payload(
+    body: bytes, selection: PollenSelection = ALL_POLLEN_TYPES
+) -> PollenCurrentConditionsData:
+    """Decode a forecast response and parse the selection into the data model."""
+    data = json.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError("Response is not a JSON object")
+
+    daily_info = data.get("dailyInfo") or []
+    if not isinstance(daily_info, list) or not daily_info:
+        raise GooglePollenUnsupportedRegionError("No pollen data for the location")
+
+    forecast: list[PollenForecastDay] = []
+    for day_info in daily_info:
+        if (day := _parse_date(day_info.get("date"))) is None:
+            continue
+        index, category, types = _parse_day(
+            day_info.get("pollenTypeInfo") or [], selection.types
+        )
+        forecast.append(PollenForecastDay(day, index, category, types))
+
+    # Current conditions come from the first day's entry
+    index, category, types = _parse_day(
+        daily_info[0].get("pollenTypeInfo") or [], selection.types
+    )
+    plants: dict[str, dict[str, Any]] = {}
+    if selection.plants:
+        plants = _parse_plants(daily_info[0].get("plantInfo") or [], selection.plants)
+
+    return PollenCurrentConditionsData(
+        index=index,
+        category=category,
+        types=types,
+        forecast=forecast,
+        plants=plants,
+    )
 
 
 class GooglePollenApi:
@@ -31,83 +428,229 @@ class GooglePollenApi:
 
     The client expects an aiohttp session and an API key. It makes a single
     GET request to the v1 forecast endpoint and returns a parsed data model.
+    An optional ``on_request`` callback is invoked with the coordinates of
+    every outgoing request, e.g. to account for API usage. Responses larger
+    than ``offload_threshold`` bytes are decoded and parsed in the default
+    executor instead of the event loop. When a ``tracer`` is given, the
+    phases of every request are timed; the session must then be created
+    with the tracer's trace config. Requests go through the session unless
+    another ``transport`` is given, such as a cassette recorder or replayer.
+
+    Errors are raised as subclasses of ``GooglePollenApiError``. Once the key
+    is rejected, or its quota is exhausted until the reset, further calls
+    fail right away without sending a request. The same goes for coordinates
+    in regions the ``coverage`` cache knows to have no pollen data.
+
+    Only the pollen types and plants of the ``selection`` are parsed, every
+    type and no plant by default.
+
+    With ``hedge``, a request that is slower than the learned p95 latency is
+    raced against one duplicate request, for a capped share of the requests.
     """
 
     BASE_URL = "https://pollen.googleapis.com/v1/forecast:lookup"
 
     def __init__(
-        self, session: aiohttp.ClientSession, api_key: str, referrer: str | None = None
+        self,
+        session: aiohttp.ClientSession,
+        api_key: str,
+        referrer: str | None = None,
+        on_request: Callable[[float, float], None] | None = None,
+        offload_threshold: int | None = None,
+        tracer: RequestTracer | None = None,
+        transport: PollenTransport | None = None,
+        coverage: GooglePollenCoverageCache | None = None,
+        hedge: bool = False,
     ) -> None:
         """Initialize the API client."""
-        self._session = session
+        self._transport = transport or SessionTransport(session)
         self._api_key = api_key
         self._referrer = referrer
+        self._on_request = on_request
+        self._offload_threshold = offload_threshold
+        self.parse_stats = ParseStats()
+        self.tracer = tracer
+        self._coverage = coverage
+        self._hedge = hedge
+        self._latencies = RollingPercentiles(HEDGE_WINDOW)
+        self._hedged: deque[bool] = deque(maxlen=HEDGE_WINDOW)
+        self.hedge_stats = HedgeStats()
+        self.auth_error: GooglePollenAuthError | None = None
+        self.quota_error: GooglePollenQuotaError | None = None
 
     async def async_get_current_conditions(
-        self, lat: float, lon: float
+        self,
+        lat: float,
+        lon: float,
+        selection: PollenSelection = ALL_POLLEN_TYPES,
+        previous: PollenCurrentConditionsData | None = None,
     ) -> PollenCurrentConditionsData:
         """
         Fetch current pollen conditions for the given coordinates.
 
         Parses the first day of the v1 forecast response and extracts
         an overall index (max across in-season types) and per-type values
-        for tree, grass, and weed pollen.
+        for tree, grass, and weed pollen. Every day of the response is also
+        parsed the same way into the forecast.
+
+        When the response and selection are the same as those ``previous``
+        was parsed from, ``previous`` is returned without parsing.
         """
         params = {
             "key": self._api_key,
             "location.latitude": lat,
             "location.longitude": lon,
-            "days": 1,
+            "days": FORECAST_DAYS,
+            # Plant descriptions and photos are never used and make up most
+            # of the response
+            "plantsDescription": "false",
         }
         headers = {}
         if self._referrer:
             headers["Referer"] = self._referrer
 
+        if self.auth_error is not None:
+            raise GooglePollenAuthError(str(self.auth_error))
+        if self.quota_error is not None:
+            reset = self.quota_error.reset
+            if reset is not None and reset > datetime.now(UTC):
+                raise GooglePollenQuotaError(str(self.quota_error), reset)
+            self.quota_error = None
+        if self._coverage is not None and self._coverage.is_unsupported(lat, lon):
+            raise GooglePollenUnsupportedRegionError(
+                "No pollen data for the region of the location"
+            )
+
+        if self._on_request is not None:
+            self._on_request(lat, lon)
         try:
-            async with self._session.get(
-                self.BASE_URL,
-                params=params,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=20),
-            ) as resp:
-                resp.raise_for_status()
-                data = await resp.json()
+            body = await self._async_request(lat, lon, params, headers)
+        except GooglePollenAuthError as err:
+            self.auth_error = err
+            raise
+        except GooglePollenQuotaError as err:
+            self.quota_error = err
+            raise
+        except GooglePollenUnsupportedRegionError as err:
+            self._mark_unsupported(lat, lon, err)
+            raise
+        except GooglePollenApiError:
+            raise
         except Exception as err:
-            raise GooglePollenApiError(str(err)) from err
+            raise GooglePollenTransientError(str(err)) from err
 
-        # Navigate to pollenTypeInfo from the first day's entry
-        daily_info = data.get("dailyInfo") or []
-        pollen_type_info: list[dict[str, Any]] = []
-        if daily_info and isinstance(daily_info, list):
-            pollen_type_info = daily_info[0].get("pollenTypeInfo") or []
+        content_hash = _content_hash(body, selection)
+        if previous is not None and previous.content_hash == content_hash:
+            self.parse_stats.unchanged += 1
+            return previous
+        try:
+            if (
+                self._offload_threshold is not None
+                and len(body) > self._offload_threshold
+            ):
+                result = await asyncio.get_running_loop().run_in_executor(
+                    None, _parse_payload, body, selection
+                )
+                self.parse_stats.record(0.0, offloaded=True)
+            else:
+                start = time.perf_counter()
+                result = _parse_payload(body, selection)
+                self.parse_stats.record(time.perf_counter() - start, offloaded=False)
+        except GooglePollenUnsupportedRegionError as err:
+            self._mark_unsupported(lat, lon, err)
+            raise
+        except ValueError as err:
+            raise GooglePollenApiError(f"Invalid response: {err}") from err
+        result.content_hash = content_hash
+        return result
 
-        # Map API codes to lowercase keys used by sensor entities
-        code_map = {"GRASS": "grass", "TREE": "tree", "WEED": "weed"}
+    def _hedge_delay(self) -> float | None:
+        """Return after how long a request may be hedged, None if it may not."""
+        if not self._hedge or len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        if sum(self._hedged) >= HEDGE_MAX_RATE * HEDGE_WINDOW:
+            return None
+        delay = self._latencies.percentile(HEDGE_PERCENTILE)
+        if delay is None or delay >= REQUEST_TIMEOUT_SECONDS:
+            return None
+        return delay
 
-        types: dict[str, dict[str, Any]] = {}
-        max_value: int | None = None
-        max_category: str | None = None
+    async def _async_request(
+        self,
+        lat: float,
+        lon: float,
+        params: dict[str, Any],
+        headers: dict[str, str],
+    ) -> bytes:
+        """Send a request, and a duplicate if it is slower than usual.
 
-        for entry in pollen_type_info:
-            code = entry.get("code", "")
-            key = code_map.get(code)
-            if key is None:
-                continue
+        Every request is traced on its own, and only the timing of the
+        response that is returned is recorded.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        self.hedge_stats.requests += 1
+        timing = self.tracer.start() if self.tracer is not None else None
+        if (delay := self._hedge_delay()) is None:
+            body = await self._transport.async_request(params, headers, timing)
+            self._latencies.add(loop.time() - start)
+            self._hedged.append(False)
+            self._record_timing(timing)
+            return body
 
-            index_info = entry.get("indexInfo") or {}
-            value = index_info.get("value")
-            category = index_info.get("category")
+        self.hedge_stats.delay = delay
+        primary = asyncio.create_task(
+            self._transport.async_request(params, headers, timing)
+        )
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                body = primary.result()
+                self._latencies.add(loop.time() - start)
+                self._hedged.append(False)
+                self._record_timing(timing)
+                return body
 
-            types[key] = {"value": value, "category": category}
+            if self._on_request is not None:
+                self._on_request(lat, lon)
+            self.hedge_stats.hedged += 1
+            self._hedged.append(True)
+            hedge_timing = self.tracer.start() if self.tracer is not None else None
+            hedge = asyncio.create_task(
+                self._transport.async_request(params, headers, hedge_timing)
+            )
+            tasks.append(hedge)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_stats.hedge_wins += 1
+                        self._latencies.add(loop.time() - start)
+                        self._record_timing(hedge_timing if task is hedge else timing)
+                        return task.result()
+            # Both failed, report the error of the original request
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # Mark the error of the slower request as retrieved
+                    task.exception()
 
-            # Track the highest index across in-season types for the overall reading
-            if entry.get("inSeason") and value is not None:
-                if max_value is None or value > max_value:
-                    max_value = value
-                    max_category = category
+    def _record_timing(self, timing: RequestTiming | None) -> None:
+        """Record the timing of a response that was returned."""
+        if self.tracer is not None and timing is not None:
+            self.tracer.record(timing)
 
-        return PollenCurrentConditionsData(
-            index=max_value,
-            category=max_category,
-            types=types,
-        )
+    def _mark_unsupported(
+        self, lat: float, lon: float, err: GooglePollenUnsupportedRegionError
+    ) -> None:
+        """Remember the API has no data for the region of the coordinates."""
+        if self._coverage is not None and err.cacheable:
+            self._coverage.async_mark_unsupported(lat, lon)
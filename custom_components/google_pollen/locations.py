@@ -0,0 +1,183 @@
+"""Pollen data shared by the locations of all config entries."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DOMAIN, SUBENTRY_TYPE_LOCATION
+from .google_pollen_api import (
+    GooglePollenApi,
+    GooglePollenAuthError,
+    GooglePollenQuotaError,
+    PollenCurrentConditionsData,
+    PollenSelection,
+)
+from .usage import usage_location_id
+
+if TYPE_CHECKING:
+    from .coordinator import GooglePollenUpdateCoordinator
+
+
+class SharedPollenLocation:
+    """Pollen data of one location, fetched once for all its subscribers."""
+
+    def __init__(self, hass: HomeAssistant, lat: float, lon: float) -> None:
+        """Initialize the location."""
+        self.hass = hass
+        self.lat = lat
+        self.lon = lon
+        self.subscribers: set[GooglePollenUpdateCoordinator] = set()
+        self.data: PollenCurrentConditionsData | None = None
+        self.fetched_at: datetime | None = None
+        # What the data was parsed for, the union of the subscribers' selections
+        self.selection: PollenSelection | None = None
+        self._fetch: asyncio.Task[PollenCurrentConditionsData] | None = None
+        self._fetch_client: GooglePollenApi | None = None
+        # Subscribers waiting for the running fetch
+        self._waiting: set[GooglePollenUpdateCoordinator] = set()
+
+    async def async_get(
+        self, coordinator: GooglePollenUpdateCoordinator
+    ) -> PollenCurrentConditionsData:
+        """Return data no older than the update interval of the coordinator.
+
+        Requests made while a fetch is running wait for that fetch instead of
+        starting their own.
+        """
+        if (
+            self.data is not None
+            and self.fetched_at is not None
+            and self.selection is not None
+            and self.selection.covers(coordinator.selection)
+            and coordinator.update_interval is not None
+            and dt_util.utcnow() - self.fetched_at < coordinator.update_interval
+        ):
+            return self.data
+        if self._fetch is None:
+            self._fetch_client = coordinator.client
+            self._fetch = self.hass.async_create_task(
+                self._async_fetch(coordinator.client), eager_start=False
+            )
+        fetch, client = self._fetch, self._fetch_client
+        self._waiting.add(coordinator)
+        try:
+            data = await asyncio.shield(fetch)
+        except (GooglePollenAuthError, GooglePollenQuotaError):
+            if client is coordinator.client:
+                raise
+            # The key of another entry failed, try again with this entry's key
+            return await self.async_get(coordinator)
+        if self.selection is not None and self.selection.covers(coordinator.selection):
+            return data
+        # The coordinator subscribed after the fetch started
+        return await self.async_get(coordinator)
+
+    @callback
+    def async_invalidate(self) -> None:
+        """Make the next request fetch new data."""
+        self.fetched_at = None
+
+    async def _async_fetch(
+        self, client: GooglePollenApi
+    ) -> PollenCurrentConditionsData:
+        """Fetch the data with the client of the first waiting subscriber."""
+        selection = PollenSelection(types=frozenset())
+        for subscriber in self.subscribers:
+            selection = selection.union(subscriber.selection)
+        try:
+            data = await client.async_get_current_conditions(
+                self.lat, self.lon, selection, self.data
+            )
+        finally:
+            self._fetch = None
+            waiting, self._waiting = self._waiting, set()
+        self.data = data
+        self.selection = selection
+        self.fetched_at = dt_util.utcnow()
+        # Let the other subscribers pick up the new data from the cache
+        for subscriber in self.subscribers - waiting:
+            self.hass.async_create_task(subscriber.async_request_refresh())
+        return data
+
+
+class GooglePollenLocationRegistry:
+    """Reference counted registry of the locations of all config entries."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the registry."""
+        self.hass = hass
+        self._locations: dict[str, SharedPollenLocation] = {}
+        # Data kept for the next subscriber of a location, see async_seed
+        self._seeds: dict[str, SharedPollenLocation] = {}
+
+    @callback
+    def async_seed(
+        self,
+        lat: float,
+        lon: float,
+        data: PollenCurrentConditionsData,
+        selection: PollenSelection,
+        fetched_at: datetime,
+    ) -> None:
+        """Serve data fetched before to the next subscriber of a location.
+
+        Locations set up again by a reload start from this data instead of
+        fetching it on their first refresh. It is only served while it is
+        no older than the update interval of the subscriber.
+        """
+        location = SharedPollenLocation(self.hass, lat, lon)
+        location.data = data
+        location.selection = selection
+        location.fetched_at = fetched_at
+        self._seeds[usage_location_id(lat, lon)] = location
+
+    @callback
+    def async_subscribe(
+        self, coordinator: GooglePollenUpdateCoordinator, lat: float, lon: float
+    ) -> CALLBACK_TYPE:
+        """Serve the data of a coordinator from the location at its position."""
+        location_id = usage_location_id(lat, lon)
+        seed = self._seeds.pop(location_id, None)
+        if (location := self._locations.get(location_id)) is None:
+            location = self._locations[location_id] = seed or SharedPollenLocation(
+                self.hass, lat, lon
+            )
+        location.subscribers.add(coordinator)
+        coordinator.shared_location = location
+
+        @callback
+        def unsubscribe() -> None:
+            coordinator.shared_location = None
+            location.subscribers.discard(coordinator)
+            if not location.subscribers:
+                del self._locations[location_id]
+
+        return unsubscribe
+
+    def __len__(self) -> int:
+        """Return the number of locations with subscribers."""
+        return len(self._locations)
+
+
+def location_ids(entry: ConfigEntry) -> set[str]:
+    """Return the identifiers of the coordinates of the locations of an entry.
+
+    Coordinates with the same identifier are served the same data, so an
+    entry has one location for each at most.
+    """
+    return {
+        usage_location_id(subentry.data[CONF_LATITUDE], subentry.data[CONF_LONGITUDE])
+        for subentry in entry.subentries.values()
+        if subentry.subentry_type == SUBENTRY_TYPE_LOCATION
+    }
+
+
+DATA_LOCATIONS: HassKey[GooglePollenLocationRegistry] = HassKey(f"{DOMAIN}_locations")
@@ -0,0 +1,153 @@
+"""On-demand profiling of location refreshes."""
+
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import pstats
+from collections.abc import Awaitable, Iterable
+from typing import Final
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .coordinator import GooglePollenUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Number of functions listed in each table of the summary
+PROFILE_TOP_FUNCTIONS: Final = 30
+
+
+def _write_profile(profiler: cProfile.Profile, path: str) -> None:
+    """Write the profile and a summary of the most expensive functions."""
+    profiler.dump_stats(f"{path}.prof")
+    stream = io.StringIO()
+    for sort_key, title in (
+        (pstats.SortKey.CUMULATIVE, "cumulative time"),
+        (pstats.SortKey.TIME, "own time"),
+    ):
+        stream.write(f"Top {PROFILE_TOP_FUNCTIONS} functions by {title}\n")
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats(sort_key).print_stats(PROFILE_TOP_FUNCTIONS)
+    with open(f"{path}.txt", "w", encoding="utf-8") as file:
+        file.write(stream.getvalue())
+
+
+class RefreshProfiler:
+    """Profiler of the next scheduled refreshes of some locations.
+
+    The profiler only runs while one of these refreshes runs, so nothing is
+    fetched for the profile. It covers the event loop during the refreshes,
+    including the parsing of responses that are not offloaded and the state
+    writes of the sensors. cProfile follows the whole event loop thread, so
+    other tasks that run while a refresh waits for the API are included as
+    well. The profile is written to ``<path>.prof`` with a summary in
+    ``<path>.txt`` once every location was refreshed the given number of
+    times, or with the refreshes so far when the entry is unloaded first.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinators: Iterable[GooglePollenUpdateCoordinator],
+        cycles: int,
+    ) -> None:
+        """Initialize the profiler."""
+        self.hass = hass
+        self.path = hass.config.path(
+            f"{DOMAIN}_profile_{dt_util.now().strftime('%Y%m%d_%H%M%S')}"
+        )
+        self._remaining = {coordinator: cycles for coordinator in coordinators}
+        self._profiler = cProfile.Profile()
+        # Refreshes of the locations running at the moment
+        self._running = 0
+        # Refreshes profiled so far
+        self._profiled = 0
+        self._stopped = False
+
+    @callback
+    def async_start(self) -> None:
+        """Profile the next scheduled refreshes of the locations."""
+        if any(
+            coordinator.refresh_profiler is not None for coordinator in self._remaining
+        ):
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="profiler_busy",
+            )
+        try:
+            # Fail right away while another profiler is active
+            self._profiler.enable()
+        except ValueError as err:
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="profiler_busy",
+            ) from err
+        self._profiler.disable()
+        for coordinator in self._remaining:
+            coordinator.refresh_profiler = self
+
+    async def async_profile(
+        self, coordinator: GooglePollenUpdateCoordinator, refresh: Awaitable[None]
+    ) -> None:
+        """Run a scheduled refresh of a location under the profiler."""
+        if self._stopped:
+            await refresh
+            return
+        if self._running == 0:
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # Another profiler started since, this refresh is not counted
+                await refresh
+                return
+        self._running += 1
+        try:
+            await refresh
+        finally:
+            self._running -= 1
+            if self._running == 0:
+                self._profiler.disable()
+
+        if self._stopped:
+            return
+        self._profiled += 1
+        self._remaining[coordinator] -= 1
+        if self._remaining[coordinator] == 0:
+            del self._remaining[coordinator]
+            coordinator.refresh_profiler = None
+            if not self._remaining:
+                self._stopped = True
+                coordinator.config_entry.async_create_task(
+                    self.hass, self._async_write(), f"{DOMAIN} profile"
+                )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop before every location was refreshed, as the entry unloads.
+
+        The refreshes profiled so far are written, if there are any.
+        """
+        if self._stopped:
+            return
+        self._stopped = True
+        self._profiler.disable()
+        for coordinator in self._remaining:
+            coordinator.refresh_profiler = None
+        self._remaining.clear()
+        if not self._profiled:
+            _LOGGER.info("Profile cancelled, no refresh ran before the unload")
+            return
+        # The entry is unloading, the write must outlive its tasks
+        self.hass.async_create_task(self._async_write(), f"{DOMAIN} profile")
+
+    async def _async_write(self) -> None:
+        """Write the profile of the refreshes."""
+        await self.hass.async_add_executor_job(
+            _write_profile, self._profiler, self.path
+        )
+        _LOGGER.info("Profile of the refreshes written to %s.prof", self.path)
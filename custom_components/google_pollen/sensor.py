@@ -3,23 +3,37 @@
 import logging
 from collections.abc import Callable
 from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Final
 
 from homeassistant.components.sensor import (
+    SensorDeviceClass,
     SensorEntity,
     SensorEntityDescription,
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigSubentry
-from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    EntityCategory,
+    Platform,
+)
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+from homeassistant.helpers.event import async_track_time_change
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DOMAIN
 from .coordinator import GooglePollenConfigEntry, GooglePollenUpdateCoordinator
-from .google_pollen_api import PollenCurrentConditionsData
+from .google_pollen_api import (
+    PLANT_CODE_MAP,
+    PollenCurrentConditionsData,
+    PollenSelection,
+)
+from .trend import TREND_FALLING, TREND_RISING, TREND_STEADY
+from .usage import DATA_USAGE_LEDGER, FREE_TIER_MONTHLY_CALLS, GooglePollenUsageLedger
 
 _LOGGER = logging.getLogger(__name__)
 PARALLEL_UPDATES = 0
@@ -31,6 +45,8 @@ class PollenSensorEntityDescription(SensorEntityDescription):
 
     exists_fn: Callable[[PollenCurrentConditionsData], bool] = lambda _: True
     value_fn: Callable[[PollenCurrentConditionsData], StateType]
+    # The sensor is only created when the pollen type is selected
+    pollen_type: str | None = None
 
 
 POLLEN_SENSOR_TYPES: tuple[PollenSensorEntityDescription, ...] = (
@@ -49,6 +65,7 @@ POLLEN_SENSOR_TYPES: tuple[PollenSensorEntityDescription, ...] = (
         key="tree_pollen",
         translation_key="tree_pollen",
         state_class=SensorStateClass.MEASUREMENT,
+        pollen_type="tree",
         exists_fn=lambda x: "tree" in x.types,
         value_fn=lambda x: x.types.get("tree", {}).get("value"),
     ),
@@ -56,6 +73,7 @@ POLLEN_SENSOR_TYPES: tuple[PollenSensorEntityDescription, ...] = (
         key="grass_pollen",
         translation_key="grass_pollen",
         state_class=SensorStateClass.MEASUREMENT,
+        pollen_type="grass",
         exists_fn=lambda x: "grass" in x.types,
         value_fn=lambda x: x.types.get("grass", {}).get("value"),
     ),
@@ -63,12 +81,71 @@ POLLEN_SENSOR_TYPES: tuple[PollenSensorEntityDescription, ...] = (
         key="weed_pollen",
         translation_key="weed_pollen",
         state_class=SensorStateClass.MEASUREMENT,
+        pollen_type="weed",
         exists_fn=lambda x: "weed" in x.types,
         value_fn=lambda x: x.types.get("weed", {}).get("value"),
     ),
 )
 
 
+def _plant_sensor_description(plant: str, name: str) -> PollenSensorEntityDescription:
+    """Return the description of the sensor of a selected plant."""
+    return PollenSensorEntityDescription(
+        key=f"{plant}_pollen",
+        translation_key="plant_pollen",
+        translation_placeholders={"plant": name},
+        state_class=SensorStateClass.MEASUREMENT,
+        exists_fn=lambda x: plant in x.plants,
+        value_fn=lambda x: x.plants.get(plant, {}).get("value"),
+    )
+
+
+# One sensor per location, the trends of the pollen types are attributes
+TREND_SENSOR_DESCRIPTION = SensorEntityDescription(
+    key="pollen_index_trend",
+    translation_key="pollen_index_trend",
+)
+
+# Keys of the trend sensors of the pollen types the attributes replaced
+_REPLACED_TREND_SENSOR_KEYS: Final = tuple(
+    f"{description.pollen_type}_pollen_trend"
+    for description in POLLEN_SENSOR_TYPES
+    if description.pollen_type is not None
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class UsageSensorEntityDescription(SensorEntityDescription):
+    """Describes API usage sensor entity."""
+
+    value_fn: Callable[[GooglePollenUsageLedger, str], int]
+
+
+USAGE_SENSOR_TYPES: tuple[UsageSensorEntityDescription, ...] = (
+    UsageSensorEntityDescription(
+        key="api_calls_today",
+        translation_key="api_calls_today",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda ledger, key_id: ledger.calls_today(key_id),
+    ),
+    UsageSensorEntityDescription(
+        key="api_calls_this_month",
+        translation_key="api_calls_this_month",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda ledger, key_id: ledger.calls_this_month(key_id),
+    ),
+    UsageSensorEntityDescription(
+        key="api_calls_projected",
+        translation_key="api_calls_projected",
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        value_fn=lambda ledger, key_id: ledger.projected_month_calls(key_id),
+    ),
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: GooglePollenConfigEntry,
@@ -76,20 +153,136 @@ async def async_setup_entry(
 ) -> None:
     """Set up sensor platform."""
     coordinators = entry.runtime_data.subentries_runtime_data
+    ledger = hass.data[DATA_USAGE_LEDGER]
+
+    async_add_entities(
+        UsageSensorEntity(ledger, entry, description)
+        for description in USAGE_SENSOR_TYPES
+    )
 
     for subentry_id, subentry in entry.subentries.items():
-        coordinator: GooglePollenUpdateCoordinator = coordinators[subentry_id]
         _LOGGER.debug("subentry.data: %s", subentry.data)
-        async_add_entities(
-            (
-                PollenSensorEntity(coordinator, description, subentry_id, subentry)
-                for description in POLLEN_SENSOR_TYPES
-                if description.exists_fn(coordinator.data)
-            ),
-            config_subentry_id=subentry_id,
+        _async_remove_unselected_sensors(hass, coordinators[subentry_id], subentry_id)
+        entry.async_on_unload(
+            _async_track_pollen_types(
+                coordinators[subentry_id], subentry_id, subentry, async_add_entities
+            )
         )
 
 
+def _pollen_sensor_unique_id(key: str, subentry_id: str) -> str:
+    """Return the unique ID of a pollen sensor of a location.
+
+    Locations of different entries may have the same coordinates, so the
+    sensors are identified by their subentry.
+    """
+    return f"{key}_{subentry_id}"
+
+
+def _is_selected(pollen_type: str | None, selection: PollenSelection) -> bool:
+    """Return if the sensors of a pollen type are selected, or of no type."""
+    return (
+        pollen_type is None or selection.types is None or pollen_type in selection.types
+    )
+
+
+@callback
+def _async_remove_unselected_sensors(
+    hass: HomeAssistant,
+    coordinator: GooglePollenUpdateCoordinator,
+    subentry_id: str,
+) -> None:
+    """Remove the sensors of pollen types and plants no longer selected.
+
+    The trend sensors the pollen types had are removed as well.
+    """
+    selection = coordinator.selection
+    keys = [
+        description.key
+        for description in POLLEN_SENSOR_TYPES
+        if not _is_selected(description.pollen_type, selection)
+    ]
+    keys.extend(_REPLACED_TREND_SENSOR_KEYS)
+    keys.extend(
+        f"{plant}_pollen"
+        for plant in PLANT_CODE_MAP.values()
+        if plant not in selection.plants
+    )
+    entity_registry = er.async_get(hass)
+    for key in keys:
+        if entity_id := entity_registry.async_get_entity_id(
+            Platform.SENSOR,
+            DOMAIN,
+            _pollen_sensor_unique_id(key, subentry_id),
+        ):
+            entity_registry.async_remove(entity_id)
+
+
+@callback
+def _async_track_pollen_types(
+    coordinator: GooglePollenUpdateCoordinator,
+    subentry_id: str,
+    subentry: ConfigSubentry,
+    async_add_entities: AddConfigEntryEntitiesCallback,
+) -> CALLBACK_TYPE:
+    """Add the sensors of a location, and those of types showing up later.
+
+    Pollen types appear in the data when their season starts, so the data
+    of every update is checked for types the location has no sensor for.
+    Only the pollen types and plants selected for the location get sensors.
+    """
+    added: set[str] = set()
+    selection = coordinator.selection
+    # Shared by the sensors of the location
+    device_info = _location_device_info(coordinator, subentry_id, subentry)
+
+    @callback
+    def _async_add_new_sensors() -> None:
+        if (data := coordinator.data) is None:
+            return
+        descriptions = [
+            description
+            for description in POLLEN_SENSOR_TYPES
+            if description.key not in added
+            and _is_selected(description.pollen_type, selection)
+            and description.exists_fn(data)
+        ]
+        descriptions.extend(
+            _plant_sensor_description(plant, data.plants[plant]["name"])
+            for plant in sorted(selection.plants)
+            if f"{plant}_pollen" not in added and plant in data.plants
+        )
+        entities: list[SensorEntity] = [
+            PollenSensorEntity(coordinator, description, subentry_id, device_info)
+            for description in descriptions
+        ]
+        if TREND_SENSOR_DESCRIPTION.key not in added:
+            entities.append(
+                PollenTrendSensorEntity(coordinator, subentry_id, device_info)
+            )
+        if not entities:
+            return
+        added.update(description.key for description in descriptions)
+        added.add(TREND_SENSOR_DESCRIPTION.key)
+        async_add_entities(entities, config_subentry_id=subentry_id)
+
+    _async_add_new_sensors()
+    return coordinator.async_add_listener(_async_add_new_sensors)
+
+
+def _location_device_info(
+    coordinator: GooglePollenUpdateCoordinator,
+    subentry_id: str,
+    subentry: ConfigSubentry,
+) -> DeviceInfo:
+    """Return the device the sensors of a location belong to."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, f"{coordinator.config_entry.entry_id}_{subentry_id}")},
+        name=subentry.title,
+        entry_type=DeviceEntryType.SERVICE,
+    )
+
+
 class PollenSensorEntity(
     CoordinatorEntity[GooglePollenUpdateCoordinator], SensorEntity
 ):
@@ -104,21 +297,134 @@ class PollenSensorEntity(
         coordinator: GooglePollenUpdateCoordinator,
         description: PollenSensorEntityDescription,
         subentry_id: str,
-        subentry: ConfigSubentry,
+        device_info: DeviceInfo,
     ) -> None:
         """Set up Pollen Sensors."""
         super().__init__(coordinator)
         self.entity_description = description
-        self._attr_unique_id = f"{description.key}_{subentry.data[CONF_LATITUDE]}_{subentry.data[CONF_LONGITUDE]}"
-        self._attr_device_info = DeviceInfo(
-            identifiers={
-                (DOMAIN, f"{self.coordinator.config_entry.entry_id}_{subentry_id}")
-            },
-            name=subentry.title,
-            entry_type=DeviceEntryType.SERVICE,
+        self._attr_unique_id = _pollen_sensor_unique_id(description.key, subentry_id)
+        self._attr_device_info = device_info
+
+    @property
+    def available(self) -> bool:
+        """Return if the pollen type of the sensor is still in the data."""
+        return super().available and self.entity_description.exists_fn(
+            self.coordinator.data
         )
 
     @property
     def native_value(self) -> StateType:
         """Return the state of the sensor."""
         return self.entity_description.value_fn(self.coordinator.data)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the age of the data while the last good data is served."""
+        if (data_age := self.coordinator.data_age) is None:
+            return None
+        return {"data_age": int(data_age.total_seconds())}
+
+
+class PollenTrendSensorEntity(
+    CoordinatorEntity[GooglePollenUpdateCoordinator], SensorEntity
+):
+    """Pollen trend sensor entity.
+
+    The trend comes from the values the coordinator kept of the last day,
+    so it is unknown until the location has been updated for a day. The
+    state is the trend of the overall index, the trends of the selected
+    pollen types in the data are attributes.
+    """
+
+    _attr_attribution = "Data provided by Google Pollen"
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_has_entity_name = True
+    _attr_options = [TREND_RISING, TREND_FALLING, TREND_STEADY]
+    entity_description = TREND_SENSOR_DESCRIPTION
+
+    def __init__(
+        self,
+        coordinator: GooglePollenUpdateCoordinator,
+        subentry_id: str,
+        device_info: DeviceInfo,
+    ) -> None:
+        """Set up Pollen trend sensors."""
+        super().__init__(coordinator)
+        self._attr_unique_id = _pollen_sensor_unique_id(
+            TREND_SENSOR_DESCRIPTION.key, subentry_id
+        )
+        self._attr_device_info = device_info
+        self._pollen_types = [
+            description.pollen_type
+            for description in POLLEN_SENSOR_TYPES
+            if description.pollen_type is not None
+            and _is_selected(description.pollen_type, coordinator.selection)
+        ]
+
+    @property
+    def native_value(self) -> str | None:
+        """Return the state of the sensor."""
+        return self.coordinator.trend.trend("index")
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return how much the values moved over the last day."""
+        trend = self.coordinator.trend
+        attributes: dict[str, Any] = {"change": trend.change("index")}
+        for pollen_type in self._pollen_types:
+            if pollen_type in self.coordinator.data.types:
+                attributes[f"{pollen_type}_trend"] = trend.trend(pollen_type)
+                attributes[f"{pollen_type}_change"] = trend.change(pollen_type)
+        return attributes
+
+
+class UsageSensorEntity(SensorEntity):
+    """API usage sensor entity.
+
+    The state is written when a call is recorded, and at local midnight,
+    when the counts of the day and the month start over without one.
+    """
+
+    entity_description: UsageSensorEntityDescription
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    def __init__(
+        self,
+        ledger: GooglePollenUsageLedger,
+        entry: GooglePollenConfigEntry,
+        description: UsageSensorEntityDescription,
+    ) -> None:
+        """Set up API usage sensors."""
+        self.entity_description = description
+        self._ledger = ledger
+        self._key_id = entry.runtime_data.key_id
+        self._attr_unique_id = f"{description.key}_{self._key_id}"
+        self._attr_extra_state_attributes = {"free_tier_limit": FREE_TIER_MONTHLY_CALLS}
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+            name=entry.title,
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the usage ledger."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self._ledger.async_add_listener(self._key_id, self.async_write_ha_state)
+        )
+        self.async_on_remove(
+            async_track_time_change(
+                self.hass, self._async_midnight, hour=0, minute=0, second=0
+            )
+        )
+
+    @callback
+    def _async_midnight(self, _now: datetime) -> None:
+        """Write the state once the day changed."""
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> int:
+        """Return the state of the sensor."""
+        return self.entity_description.value_fn(self._ledger, self._key_id)
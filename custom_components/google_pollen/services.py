@@ -0,0 +1,486 @@
+"""Service actions for the Google Pollen integration."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Final
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import ATTR_DEVICE_ID, CONF_LATITUDE, CONF_LONGITUDE
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import device_registry as dr
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json import JsonValueType
+
+from .const import (
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_CYCLES,
+    ATTR_FILENAME,
+    ATTR_LOCATIONS,
+    DOMAIN,
+)
+from .coordinator import GooglePollenConfigEntry, GooglePollenUpdateCoordinator
+from .google_pollen_api import (
+    GooglePollenApi,
+    PollenCurrentConditionsData,
+)
+
+SERVICE_GET_FORECAST: Final = "get_forecast"
+SERVICE_PROFILE: Final = "profile"
+SERVICE_EXPORT: Final = "export"
+SERVICE_IMPORT_LOCATIONS: Final = "import_locations"
+
+DEFAULT_EXPORT_FILENAME: Final = f"{DOMAIN}_export.ndjson"
+
+# Upper bound of concurrent requests for coordinates without fresh data
+MAX_CONCURRENT_FETCHES: Final = 4
+
+# Coordinates closer than this are served by the same configured location
+LOCATION_EPSILON: Final = 1e-4
+
+SERVICE_GET_FORECAST_SCHEMA: Final = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_LOCATIONS): vol.All(
+            cv.ensure_list,
+            [
+                vol.Schema(
+                    {
+                        vol.Required(CONF_LATITUDE): cv.latitude,
+                        vol.Required(CONF_LONGITUDE): cv.longitude,
+                    }
+                )
+            ],
+        ),
+    }
+)
+
+
+SERVICE_PROFILE_SCHEMA: Final = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_CYCLES, default=1): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=10)
+        ),
+    }
+)
+
+
+SERVICE_EXPORT_SCHEMA: Final = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_FILENAME, default=DEFAULT_EXPORT_FILENAME): cv.string,
+    }
+)
+
+
+SERVICE_IMPORT_LOCATIONS_SCHEMA: Final = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+            vol.Optional(ATTR_LOCATIONS): vol.All(cv.ensure_list, [dict]),
+            vol.Optional(ATTR_FILENAME): cv.string,
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_LOCATIONS, ATTR_FILENAME),
+)
+
+
+def _get_entry(hass: HomeAssistant, entry_id: str) -> GooglePollenConfigEntry:
+    """Return a loaded config entry of the integration."""
+    entry: GooglePollenConfigEntry | None = hass.config_entries.async_get_entry(
+        entry_id
+    )
+    if entry is None or entry.domain != DOMAIN:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="invalid_config_entry",
+            translation_placeholders={"config_entry": entry_id},
+        )
+    if entry.state is not ConfigEntryState.LOADED:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="config_entry_not_loaded",
+            translation_placeholders={"config_entry": entry.title},
+        )
+    return entry
+
+
+def _coordinator_for_device(
+    hass: HomeAssistant, entry: GooglePollenConfigEntry, device_id: str
+) -> GooglePollenUpdateCoordinator:
+    """Return the coordinator of the location a device belongs to."""
+    device_registry = dr.async_get(hass)
+    if device := device_registry.async_get(device_id):
+        coordinators = entry.runtime_data.subentries_runtime_data
+        for domain, identifier in device.identifiers:
+            if domain != DOMAIN:
+                continue
+            subentry_id = identifier.removeprefix(f"{entry.entry_id}_")
+            if subentry_id in coordinators:
+                return coordinators[subentry_id]
+    raise ServiceValidationError(
+        translation_domain=DOMAIN,
+        translation_key="invalid_device",
+        translation_placeholders={"device_id": device_id},
+    )
+
+
+def _coordinator_for_coordinates(
+    entry: GooglePollenConfigEntry, lat: float, lon: float
+) -> GooglePollenUpdateCoordinator | None:
+    """Return the coordinator of a configured location at the coordinates."""
+    for coordinator in entry.runtime_data.subentries_runtime_data.values():
+        if (
+            coordinator.lat is not None
+            and coordinator.long is not None
+            and abs(coordinator.lat - lat) <= LOCATION_EPSILON
+            and abs(coordinator.long - lon) <= LOCATION_EPSILON
+        ):
+            return coordinator
+    return None
+
+
+def _is_fresh(coordinator: GooglePollenUpdateCoordinator) -> bool:
+    """Return if the coordinator data is recent enough to answer from."""
+    return (
+        coordinator.last_update_success
+        and coordinator.last_update_success_time is not None
+        and coordinator.update_interval is not None
+        and dt_util.utcnow() - coordinator.last_update_success_time
+        < coordinator.update_interval
+    )
+
+
+def _serialize_forecast(data: PollenCurrentConditionsData) -> list[JsonValueType]:
+    """Return the forecast in a form suitable for a service response."""
+    return [
+        {
+            "date": day.date.isoformat(),
+            "index": day.index,
+            "category": day.category,
+            "types": {key: dict(values) for key, values in day.types.items()},
+        }
+        for day in data.forecast
+    ]
+
+
+def _config_path(hass: HomeAssistant, filename: str) -> str:
+    """Return the path of a file in the configuration directory itself."""
+    if os.path.basename(filename) != filename or filename.startswith("."):
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="invalid_filename",
+            translation_placeholders={"filename": filename},
+        )
+    return hass.config.path(filename)
+
+
+@dataclass(frozen=True, slots=True)
+class _ExportedLocation:
+    """State of a location read on the loop for the export.
+
+    Data objects are replaced on refresh, never changed, so the executor can
+    read them while the loop goes on.
+    """
+
+    entry_id: str
+    subentry_id: str
+    name: str
+    lat: float | None
+    lon: float | None
+    updated: datetime | None
+    stale: bool
+    data: PollenCurrentConditionsData
+
+    @classmethod
+    def from_coordinator(
+        cls, coordinator: GooglePollenUpdateCoordinator
+    ) -> _ExportedLocation:
+        """Return the state of the location of a coordinator."""
+        return cls(
+            entry_id=coordinator.config_entry.entry_id,
+            subentry_id=coordinator.subentry_id,
+            name=coordinator.config_entry.subentries[coordinator.subentry_id].title,
+            lat=coordinator.lat,
+            lon=coordinator.long,
+            updated=coordinator.last_update_success_time,
+            stale=coordinator.stale,
+            data=coordinator.data,
+        )
+
+
+def _export_record(location: _ExportedLocation) -> dict[str, Any]:
+    """Return the export of the data of a location."""
+    data = location.data
+    return {
+        ATTR_CONFIG_ENTRY_ID: location.entry_id,
+        "subentry_id": location.subentry_id,
+        "name": location.name,
+        CONF_LATITUDE: location.lat,
+        CONF_LONGITUDE: location.lon,
+        "updated": location.updated.isoformat()
+        if location.updated is not None
+        else None,
+        "stale": location.stale,
+        "index": data.index,
+        "category": data.category,
+        "types": data.types,
+        "plants": data.plants,
+        "forecast": _serialize_forecast(data),
+    }
+
+
+def _write_export(path: str, locations: list[_ExportedLocation]) -> int:
+    """Write the data of the locations as one JSON document per line.
+
+    Every record is built, serialized and written on its own, so memory use
+    does not grow with the number of locations. The data is written to a
+    temporary file that replaces the export once complete, and is removed
+    when the export fails.
+    """
+    try:
+        with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+            for location in locations:
+                file.write(json.dumps(_export_record(location), separators=(",", ":")))
+                file.write("\n")
+        os.replace(f"{path}.tmp", path)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.unlink(f"{path}.tmp")
+        raise
+    return len(locations)
+
+
+async def _async_fetch(
+    api: GooglePollenApi,
+    coordinators: list[GooglePollenUpdateCoordinator],
+    coordinates: list[tuple[float, float]],
+) -> list[PollenCurrentConditionsData | BaseException]:
+    """Refresh locations and fetch coordinates without fresh data.
+
+    The number of concurrent requests is bounded and the outcome of every
+    location is returned, so one failure does not fail the others.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+
+    async def _async_refresh_one(
+        coordinator: GooglePollenUpdateCoordinator,
+    ) -> PollenCurrentConditionsData:
+        async with semaphore:
+            await coordinator.async_refresh()
+        if not coordinator.last_update_success:
+            raise coordinator.last_exception or HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="unable_to_fetch",
+            )
+        return coordinator.data
+
+    async def _async_fetch_one(lat: float, lon: float) -> PollenCurrentConditionsData:
+        async with semaphore:
+            return await api.async_get_current_conditions(lat, lon)
+
+    return await asyncio.gather(
+        *(_async_refresh_one(coordinator) for coordinator in coordinators),
+        *(_async_fetch_one(lat, lon) for lat, lon in coordinates),
+        return_exceptions=True,
+    )
+
+
+def _forecast_result(
+    name: str | None,
+    lat: float,
+    lon: float,
+    data: PollenCurrentConditionsData | BaseException,
+) -> JsonValueType:
+    """Return the forecast of a location, or why it could not be fetched."""
+    result: dict[str, JsonValueType] = {
+        "name": name,
+        CONF_LATITUDE: lat,
+        CONF_LONGITUDE: lon,
+    }
+    if isinstance(data, BaseException):
+        result["error"] = str(data) or type(data).__name__
+    else:
+        result["forecast"] = _serialize_forecast(data)
+    return result
+
+
+async def _async_get_forecast(call: ServiceCall) -> ServiceResponse:
+    """Return the forecast of configured locations or coordinates."""
+    hass = call.hass
+    entry = _get_entry(hass, call.data[ATTR_CONFIG_ENTRY_ID])
+
+    results: list[JsonValueType] = []
+    coordinators: list[GooglePollenUpdateCoordinator] = [
+        _coordinator_for_device(hass, entry, device_id)
+        for device_id in call.data.get(ATTR_DEVICE_ID, [])
+    ]
+    misses: list[tuple[float, float]] = []
+    for location in call.data.get(ATTR_LOCATIONS, []):
+        lat, lon = location[CONF_LATITUDE], location[CONF_LONGITUDE]
+        if (coordinator := _coordinator_for_coordinates(entry, lat, lon)) is not None:
+            coordinators.append(coordinator)
+        else:
+            misses.append((lat, lon))
+    if ATTR_DEVICE_ID not in call.data and ATTR_LOCATIONS not in call.data:
+        coordinators.extend(entry.runtime_data.subentries_runtime_data.values())
+
+    # Configured locations without fresh data are refreshed, which updates
+    # their sensors as well
+    outdated: list[GooglePollenUpdateCoordinator] = []
+    pending: list[tuple[str | None, float, float]] = []
+    for coordinator in dict.fromkeys(coordinators):
+        if coordinator.lat is None or coordinator.long is None:
+            # A tracked entity that has not reported a position yet
+            continue
+        name = entry.subentries[coordinator.subentry_id].title
+        if _is_fresh(coordinator):
+            results.append(
+                _forecast_result(
+                    name, coordinator.lat, coordinator.long, coordinator.data
+                )
+            )
+        else:
+            outdated.append(coordinator)
+            pending.append((name, coordinator.lat, coordinator.long))
+
+    misses = list(dict.fromkeys(misses))
+    pending.extend((None, lat, lon) for lat, lon in misses)
+    fetched = await _async_fetch(entry.runtime_data.api, outdated, misses)
+    results.extend(
+        _forecast_result(name, lat, lon, data)
+        for (name, lat, lon), data in zip(pending, fetched, strict=True)
+    )
+
+    return {ATTR_LOCATIONS: results}
+
+
+async def _async_profile(call: ServiceCall) -> ServiceResponse:
+    """Profile the next scheduled refreshes of configured locations."""
+    # The profilers are only imported when a profile is taken
+    from .profiling import RefreshProfiler
+
+    hass = call.hass
+    entry = _get_entry(hass, call.data[ATTR_CONFIG_ENTRY_ID])
+    if ATTR_DEVICE_ID in call.data:
+        coordinators = [
+            _coordinator_for_device(hass, entry, device_id)
+            for device_id in call.data[ATTR_DEVICE_ID]
+        ]
+    else:
+        coordinators = list(entry.runtime_data.subentries_runtime_data.values())
+
+    profiler = RefreshProfiler(hass, coordinators, call.data[ATTR_CYCLES])
+    profiler.async_start()
+    if not call.return_response:
+        return None
+    return {"profile": f"{profiler.path}.prof", "summary": f"{profiler.path}.txt"}
+
+
+async def _async_export(call: ServiceCall) -> ServiceResponse:
+    """Export the data of configured locations to a file."""
+    hass = call.hass
+    if ATTR_CONFIG_ENTRY_ID in call.data:
+        entries = [_get_entry(hass, call.data[ATTR_CONFIG_ENTRY_ID])]
+    else:
+        entries = hass.config_entries.async_loaded_entries(DOMAIN)
+    path = _config_path(hass, call.data[ATTR_FILENAME])
+
+    # Only the references are taken on the loop, the records are built in
+    # the executor
+    locations = [
+        _ExportedLocation.from_coordinator(coordinator)
+        for entry in entries
+        for coordinator in entry.runtime_data.subentries_runtime_data.values()
+        # Set by the first successful update, along with the data
+        if coordinator.last_update_success_time is not None
+    ]
+    try:
+        count = await hass.async_add_executor_job(_write_export, path, locations)
+    except OSError as err:
+        raise HomeAssistantError(
+            translation_domain=DOMAIN,
+            translation_key="export_failed",
+            translation_placeholders={"path": path, "error": str(err)},
+        ) from err
+    if not call.return_response:
+        return None
+    return {"path": path, ATTR_LOCATIONS: count}
+
+
+async def _async_import_locations(call: ServiceCall) -> ServiceResponse:
+    """Add many locations to a config entry at once."""
+    # Only loaded when locations are imported
+    from .bulk_import import async_import_locations, load_import_file
+
+    hass = call.hass
+    entry = _get_entry(hass, call.data[ATTR_CONFIG_ENTRY_ID])
+    locations: list[Any] = list(call.data.get(ATTR_LOCATIONS, []))
+    if ATTR_FILENAME in call.data:
+        path = _config_path(hass, call.data[ATTR_FILENAME])
+        try:
+            locations.extend(await hass.async_add_executor_job(load_import_file, path))
+        except (OSError, HomeAssistantError, vol.Invalid) as err:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="invalid_import",
+                translation_placeholders={"error": str(err)},
+            ) from err
+
+    result = await async_import_locations(hass, entry, locations)
+    if not call.return_response:
+        return None
+    return {
+        "added": [*result.added],
+        "skipped": [{**skipped} for skipped in result.skipped],
+    }
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Google Pollen service actions."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_FORECAST,
+        _async_get_forecast,
+        schema=SERVICE_GET_FORECAST_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        _async_profile,
+        schema=SERVICE_PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT,
+        _async_export,
+        schema=SERVICE_EXPORT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_LOCATIONS,
+        _async_import_locations,
+        schema=SERVICE_IMPORT_LOCATIONS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
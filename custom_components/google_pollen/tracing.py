@@ -0,0 +1,168 @@
+"""
+Request phase tracing for the Google Pollen API client.
+
+Timings are collected with ``aiohttp.TraceConfig`` signals, so the session
+used by the client must be created with ``RequestTracer.trace_config``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from collections import deque
+from collections.abc import Awaitable, Callable, MutableSequence
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+# Number of requests the percentiles are computed over
+TRACE_WINDOW = 200
+
+TRACE_PERCENTILES = (50, 95, 99)
+
+type TraceHandler = Callable[
+    [aiohttp.ClientSession, SimpleNamespace, Any], Awaitable[None]
+]
+
+
+class RollingPercentiles:
+    """Percentiles over the most recent samples."""
+
+    def __init__(self, window: int = TRACE_WINDOW) -> None:
+        """Initialize the window."""
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        """Return the number of samples in the window."""
+        return len(self._samples)
+
+    def add(self, value: float) -> None:
+        """Add a sample, dropping the oldest one when the window is full."""
+        self._samples.append(value)
+
+    def percentile(self, percent: float) -> float | None:
+        """Return a nearest-rank percentile of the window."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+        return ordered[rank - 1]
+
+
+@dataclass
+class RequestTiming:
+    """Loop timestamps of the phases of one request."""
+
+    start: float | None = None
+    queued_start: float | None = None
+    queued_end: float | None = None
+    dns_start: float | None = None
+    dns_end: float | None = None
+    connect_start: float | None = None
+    connect_end: float | None = None
+    headers_sent: float | None = None
+    response_start: float | None = None
+    end: float | None = None
+
+    def phases(self) -> dict[str, float]:
+        """Return the duration of every phase the request went through."""
+        phases: dict[str, float] = {}
+        if self.queued_start is not None and self.queued_end is not None:
+            phases["connection_queue"] = self.queued_end - self.queued_start
+        dns = 0.0
+        if self.dns_start is not None and self.dns_end is not None:
+            dns = phases["dns"] = self.dns_end - self.dns_start
+        if self.connect_start is not None and self.connect_end is not None:
+            # Name resolution happens while the connection is created, and
+            # aiohttp does not signal the TLS handshake on its own
+            phases["connect_tls"] = self.connect_end - self.connect_start - dns
+        if self.headers_sent is not None and self.response_start is not None:
+            phases["time_to_first_byte"] = self.response_start - self.headers_sent
+        if self.response_start is not None and self.end is not None:
+            phases["body_read"] = self.end - self.response_start
+        if self.start is not None and self.end is not None:
+            phases["total"] = self.end - self.start
+        return phases
+
+
+def _timestamp(attribute: str) -> TraceHandler:
+    """Return a trace signal handler storing the loop time on the timing."""
+
+    async def _handler(
+        session: aiohttp.ClientSession, context: SimpleNamespace, params: Any
+    ) -> None:
+        timing = context.trace_request_ctx
+        if isinstance(timing, RequestTiming):
+            setattr(timing, attribute, asyncio.get_running_loop().time())
+
+    return _handler
+
+
+class RequestTracer:
+    """Aggregate request phase timings into rolling percentiles."""
+
+    def __init__(self, window: int = TRACE_WINDOW) -> None:
+        """Initialize the tracer and its trace config."""
+        self._window = window
+        self._phases: dict[str, RollingPercentiles] = {}
+        self.trace_config = aiohttp.TraceConfig()
+        # The signal annotations of aiohttp do not match those of aiosignal,
+        # so the signals are handled as plain lists of handlers
+        signals: tuple[tuple[MutableSequence[Any], str], ...] = (
+            (self.trace_config.on_request_start, "start"),
+            (self.trace_config.on_connection_queued_start, "queued_start"),
+            (self.trace_config.on_connection_queued_end, "queued_end"),
+            (self.trace_config.on_dns_resolvehost_start, "dns_start"),
+            (self.trace_config.on_dns_resolvehost_end, "dns_end"),
+            (self.trace_config.on_connection_create_start, "connect_start"),
+            (self.trace_config.on_connection_create_end, "connect_end"),
+            (self.trace_config.on_request_headers_sent, "headers_sent"),
+            (self.trace_config.on_request_end, "response_start"),
+        )
+        for signal, attribute in signals:
+            signal.append(_timestamp(attribute))
+
+    def start(self) -> RequestTiming:
+        """Return the timing to pass as trace_request_ctx of a request."""
+        return RequestTiming()
+
+    def record(self, timing: RequestTiming) -> None:
+        """Record a request once its body has been read."""
+        timing.end = asyncio.get_running_loop().time()
+        phases = timing.phases()
+        for phase, duration in phases.items():
+            if (samples := self._phases.get(phase)) is None:
+                samples = self._phases[phase] = RollingPercentiles(self._window)
+            samples.add(duration)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Request phases: %s",
+                ", ".join(
+                    f"{key}={value * 1000:.1f}ms" for key, value in phases.items()
+                ),
+            )
+
+    def percentile(self, phase: str, percent: float) -> float | None:
+        """Return a percentile of a phase in seconds."""
+        if (samples := self._phases.get(phase)) is None:
+            return None
+        return samples.percentile(percent)
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """Return the percentiles of every phase in milliseconds."""
+        return {
+            phase: {
+                "samples": len(samples),
+                **{
+                    f"p{percent}": round(value * 1000, 1)
+                    for percent in TRACE_PERCENTILES
+                    if (value := samples.percentile(percent)) is not None
+                },
+            }
+            for phase, samples in self._phases.items()
+        }
@@ -0,0 +1,155 @@
+"""Pollen data for a location following a person or device tracker."""
+
+from __future__ import annotations
+
+import math
+from collections import OrderedDict
+from datetime import datetime
+from typing import Final
+
+from homeassistant.const import ATTR_LATITUDE, ATTR_LONGITUDE, CONF_ENTITY_ID
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    Event,
+    EventStateChangedData,
+    HomeAssistant,
+    State,
+    callback,
+)
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .coordinator import GooglePollenConfigEntry, GooglePollenUpdateCoordinator
+from .google_pollen_api import GooglePollenApi, PollenCurrentConditionsData
+from .locations import GooglePollenLocationRegistry
+
+# Side of a grid cell in degrees, about 10 km. Pollen levels hardly differ
+# within a cell, so only moving to another cell needs new data.
+TRACKER_CELL_SIZE: Final = 0.1
+
+# Number of visited cells whose data is kept for a return visit
+MAX_CACHED_CELLS: Final = 16
+
+
+def tracker_cell(lat: float, lon: float) -> tuple[int, int]:
+    """Return the grid cell containing a pair of coordinates."""
+    return math.floor(lat / TRACKER_CELL_SIZE), math.floor(lon / TRACKER_CELL_SIZE)
+
+
+def tracker_cell_center(cell: tuple[int, int]) -> tuple[float, float]:
+    """Return the coordinates pollen data of a grid cell is fetched for."""
+    return (
+        round((cell[0] + 0.5) * TRACKER_CELL_SIZE, 4),
+        round((cell[1] + 0.5) * TRACKER_CELL_SIZE, 4),
+    )
+
+
+class GooglePollenTrackerCoordinator(GooglePollenUpdateCoordinator):
+    """Coordinator following the position of a person or device tracker.
+
+    Data is fetched for the center of the grid cell the tracked entity is
+    in, so position updates within the cell cost no API calls and entities
+    in the same cell share their data. Moving to another cell serves the
+    data of an earlier visit while it is younger than the update interval,
+    and fetches otherwise.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: GooglePollenConfigEntry,
+        subentry_id: str,
+        client: GooglePollenApi,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(hass, config_entry, subentry_id, client)
+        self.entity_id: str = config_entry.subentries[subentry_id].data[CONF_ENTITY_ID]
+        self.cell: tuple[int, int] | None = None
+        self._cells: OrderedDict[
+            tuple[int, int], tuple[PollenCurrentConditionsData, datetime]
+        ] = OrderedDict()
+        self._locations: GooglePollenLocationRegistry | None = None
+        self._unsubscribe_location: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_start_tracking(
+        self, locations: GooglePollenLocationRegistry
+    ) -> CALLBACK_TYPE:
+        """Follow the tracked entity, return a callback to stop following it."""
+        self._locations = locations
+        self._async_move(self.hass.states.get(self.entity_id))
+        unsubscribe_state = async_track_state_change_event(
+            self.hass, self.entity_id, self._async_tracker_changed
+        )
+
+        @callback
+        def stop_tracking() -> None:
+            unsubscribe_state()
+            if self._unsubscribe_location is not None:
+                self._unsubscribe_location()
+                self._unsubscribe_location = None
+
+        return stop_tracking
+
+    @callback
+    def _async_move(self, state: State | None) -> tuple[int, int] | None:
+        """Move to the cell of the tracked position, return it if it changed.
+
+        The last known cell is kept while the position is unknown.
+        """
+        if (
+            state is None
+            or (lat := state.attributes.get(ATTR_LATITUDE)) is None
+            or (lon := state.attributes.get(ATTR_LONGITUDE)) is None
+        ):
+            return None
+        if (cell := tracker_cell(lat, lon)) == self.cell:
+            return None
+        self.cell = cell
+        center_lat, center_lon = tracker_cell_center(cell)
+        self.lat, self.long = center_lat, center_lon
+        if self._locations is not None:
+            if self._unsubscribe_location is not None:
+                self._unsubscribe_location()
+            self._unsubscribe_location = self._locations.async_subscribe(
+                self, center_lat, center_lon
+            )
+        return cell
+
+    @callback
+    def _async_tracker_changed(self, event: Event[EventStateChangedData]) -> None:
+        """Update the data when the tracked entity moved to another cell."""
+        if (cell := self._async_move(event.data["new_state"])) is None:
+            return
+        now = dt_util.utcnow()
+        if (cached := self._cells.get(cell)) is not None and (
+            age := now - cached[1]
+        ) < self.base_interval:
+            data, fetched_at = cached
+            self._cells.move_to_end(cell)
+            self.stale = False
+            # Refresh when the cached data would have been refreshed
+            self.update_interval = self.base_interval - age
+            self.async_set_updated_data(data)
+            self.last_update_success_time = fetched_at
+            return
+        self.hass.async_create_task(self.async_request_refresh(), eager_start=False)
+
+    async def _async_update_data(self) -> PollenCurrentConditionsData:
+        """Fetch pollen data for the cell of the tracked entity."""
+        if self.cell is None:
+            raise UpdateFailed(
+                translation_domain=DOMAIN,
+                translation_key="tracker_position_unknown",
+                translation_placeholders={"entity_id": self.entity_id},
+            )
+        cell = self.cell
+        data = await super()._async_update_data()
+        if not self.stale:
+            self._cells[cell] = (data, dt_util.utcnow())
+            self._cells.move_to_end(cell)
+            if len(self._cells) > MAX_CACHED_CELLS:
+                self._cells.popitem(last=False)
+        return data
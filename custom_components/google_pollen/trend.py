@@ -0,0 +1,97 @@
+"""Trend of the pollen levels of a location over the last day."""
+
+from __future__ import annotations
+
+from array import array
+from datetime import datetime, timedelta
+from typing import Final
+
+from .google_pollen_api import CODE_MAP, PollenCurrentConditionsData
+
+# Period the change of a value is measured over
+TREND_WINDOW: Final = timedelta(hours=24)
+
+# Updates within this long of the start of a sample replace its values,
+# so the buffer spans the window however often the location is refreshed
+TREND_SAMPLE_SPACING: Final = timedelta(minutes=30)
+
+TREND_CAPACITY: Final = TREND_WINDOW // TREND_SAMPLE_SPACING + 2
+
+# The overall index and every pollen type are sampled
+TREND_SERIES: Final = ("index", *CODE_MAP.values())
+
+TREND_RISING: Final = "rising"
+TREND_FALLING: Final = "falling"
+TREND_STEADY: Final = "steady"
+
+# Stored for values missing from the data, UPI values range from 0 to 5
+_MISSING: Final = -1
+
+
+class PollenTrendBuffer:
+    """Ring buffer of the recent values of a location.
+
+    Timestamps and values are kept in fixed size arrays, about 600 bytes
+    of samples per location, and nothing is read from the recorder.
+    """
+
+    __slots__ = ("_count", "_last", "_last_start", "_times", "_values")
+
+    def __init__(self) -> None:
+        """Initialize an empty buffer."""
+        self._times = array("d", [0.0]) * TREND_CAPACITY
+        self._values = {
+            series: array("b", [_MISSING]) * TREND_CAPACITY for series in TREND_SERIES
+        }
+        self._count = 0
+        self._last = -1
+        self._last_start = 0.0
+
+    def add(self, time: datetime, data: PollenCurrentConditionsData) -> bool:
+        """Record the values of an update, return if the change of any moved."""
+        before = [self.change(series) for series in TREND_SERIES]
+        timestamp = time.timestamp()
+        if (
+            self._count == 0
+            or timestamp - self._last_start >= TREND_SAMPLE_SPACING.total_seconds()
+        ):
+            self._last = (self._last + 1) % TREND_CAPACITY
+            self._count = min(self._count + 1, TREND_CAPACITY)
+            self._last_start = timestamp
+        self._times[self._last] = timestamp
+        for series, values in self._values.items():
+            if series == "index":
+                value = data.index
+            else:
+                value = data.types.get(series, {}).get("value")
+            values[self._last] = _MISSING if value is None else value
+        return before != [self.change(series) for series in TREND_SERIES]
+
+    def change(self, series: str) -> int | None:
+        """Return how much the latest value moved over the trend window.
+
+        The latest value is compared with the last sample taken at least a
+        window earlier, None until the buffer spans the window or while
+        either value is missing.
+        """
+        if self._count == 0:
+            return None
+        values = self._values[series]
+        since = self._times[self._last] - TREND_WINDOW.total_seconds()
+        for age in range(1, self._count):
+            slot = (self._last - age) % TREND_CAPACITY
+            if self._times[slot] <= since:
+                if _MISSING in (values[self._last], values[slot]):
+                    return None
+                return values[self._last] - values[slot]
+        return None
+
+    def trend(self, series: str) -> str | None:
+        """Return whether a value is rising, falling or steady."""
+        if (change := self.change(series)) is None:
+            return None
+        if change > 0:
+            return TREND_RISING
+        if change < 0:
+            return TREND_FALLING
+        return TREND_STEADY
@@ -0,0 +1,357 @@
+"""Persistent ledger of Google Pollen API usage."""
+
+from __future__ import annotations
+
+import calendar
+import hashlib
+import logging
+from collections.abc import Callable
+from datetime import date
+from functools import partial
+from typing import Any, Final
+
+from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DOMAIN, SUBENTRY_TYPE_LOCATION
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION: Final = 1
+STORAGE_KEY: Final = f"{DOMAIN}.usage"
+SAVE_DELAY: Final = 60
+
+# Two months of daily counters: enough for the current month plus the
+# trailing window used for the projection at the start of a month.
+LEDGER_DAYS: Final = 62
+PROJECTION_WINDOW_DAYS: Final = 7
+
+# Monthly number of calls Google does not bill for the Pollen API.
+FREE_TIER_MONTHLY_CALLS: Final = 5000
+
+# Counters kept for coordinates no location is configured for, such as
+# cells a tracked entity left, the least recently used are dropped first
+MAX_UNCONFIGURED_LOCATIONS: Final = 100
+
+# Listeners of a key are called at most once per cooldown, in seconds
+LISTENER_COOLDOWN: Final = 10
+
+
+def usage_key_id(api_key: str) -> str:
+    """Return a stable identifier for an API key that does not reveal it."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def usage_location_id(lat: float, lon: float) -> str:
+    """Return the ledger identifier for a pair of coordinates."""
+    return f"{lat:.4f},{lon:.4f}"
+
+
+class DailyCounter:
+    """Fixed-size ring buffer of per-day counters."""
+
+    __slots__ = ("counts", "first_day", "last_day")
+
+    def __init__(
+        self, first_day: int, last_day: int, counts: list[int] | None = None
+    ) -> None:
+        """Initialize the counter, ordinals are proleptic Gregorian days."""
+        self.first_day = first_day
+        self.last_day = last_day
+        self.counts = counts if counts is not None else [0] * LEDGER_DAYS
+
+    def increment(self, day: int) -> None:
+        """Add one call on the given day."""
+        if day > self.last_day:
+            # Clear the slots of the days skipped since the last call
+            for skipped in range(
+                max(self.last_day + 1, day - LEDGER_DAYS + 1), day + 1
+            ):
+                self.counts[skipped % LEDGER_DAYS] = 0
+            self.last_day = day
+        elif day <= self.last_day - LEDGER_DAYS:
+            return
+        self.counts[day % LEDGER_DAYS] += 1
+
+    def count(self, day: int) -> int:
+        """Return the number of calls made on the given day."""
+        if day > self.last_day or day <= self.last_day - LEDGER_DAYS:
+            return 0
+        return self.counts[day % LEDGER_DAYS]
+
+    def total(self, first: int, last: int) -> int:
+        """Return the number of calls between two days, both included."""
+        return sum(self.count(day) for day in range(first, last + 1))
+
+    def is_expired(self, day: int) -> bool:
+        """Return if every counted day fell out of the ring by the given day."""
+        return day >= self.last_day + LEDGER_DAYS
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counter in its storage form."""
+        return {"first": self.first_day, "last": self.last_day, "counts": self.counts}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> DailyCounter:
+        """Restore a counter from its storage form."""
+        counts = list(data["counts"])
+        if len(counts) != LEDGER_DAYS:
+            # Ring size changed, the slot positions are no longer meaningful
+            return cls(data["first"], data["last"])
+        return cls(data["first"], data["last"], counts)
+
+
+class GooglePollenUsageLedger:
+    """Count outgoing API requests per API key and per location.
+
+    Counters whose days all fell out of the ring are dropped, and so are
+    the least recently used counters of coordinates no location is
+    configured for beyond MAX_UNCONFIGURED_LOCATIONS, so the ledger does
+    not grow with every coordinate ever requested. The scheduled refreshes
+    of every key are counted as well, to tell the calls the update intervals
+    account for from those made outside of them.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the ledger."""
+        self.hass = hass
+        self._store: Store[dict[str, dict[str, dict[str, Any]]]] = Store(
+            hass, STORAGE_VERSION, STORAGE_KEY
+        )
+        self._configured: set[str] = set()
+        self._keys: dict[str, DailyCounter] = {}
+        self._scheduled: dict[str, DailyCounter] = {}
+        # Ordered from the least to the most recently used
+        self._locations: dict[str, DailyCounter] = {}
+        self._unconfigured = 0
+        self._pruned_day: int | None = None
+        self._listeners: dict[str, list[CALLBACK_TYPE]] = {}
+        self._debouncers: dict[str, Debouncer[None]] = {}
+
+    async def async_load(self) -> None:
+        """Load the ledger from storage."""
+        if (data := await self._store.async_load()) is None:
+            return
+        self._keys = {
+            key: DailyCounter.from_dict(counter)
+            for key, counter in data.get("keys", {}).items()
+        }
+        self._scheduled = {
+            key: DailyCounter.from_dict(counter)
+            for key, counter in data.get("scheduled", {}).items()
+        }
+        self._locations = {
+            key: DailyCounter.from_dict(counter)
+            for key, counter in data.get("locations", {}).items()
+        }
+        self._async_prune(dt_util.now().date().toordinal())
+
+    @callback
+    def _data_to_save(self) -> dict[str, dict[str, dict[str, Any]]]:
+        """Return the data to store."""
+        return {
+            "keys": {key: c.as_dict() for key, c in self._keys.items()},
+            "scheduled": {key: c.as_dict() for key, c in self._scheduled.items()},
+            "locations": {key: c.as_dict() for key, c in self._locations.items()},
+        }
+
+    @callback
+    def async_record(self, key_id: str, lat: float, lon: float) -> None:
+        """Record one outgoing request."""
+        day = dt_util.now().date().toordinal()
+        if day != self._pruned_day:
+            self._async_prune(day)
+        if (counter := self._keys.get(key_id)) is None:
+            counter = self._keys[key_id] = DailyCounter(day, day)
+        counter.increment(day)
+        location_id = usage_location_id(lat, lon)
+        if (counter := self._locations.pop(location_id, None)) is None:
+            counter = DailyCounter(day, day)
+            if location_id not in self._configured:
+                self._unconfigured += 1
+        # Move the location to the most recently used end
+        self._locations[location_id] = counter
+        counter.increment(day)
+        if self._unconfigured > MAX_UNCONFIGURED_LOCATIONS:
+            self._async_drop_unconfigured()
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        if (debouncer := self._debouncers.get(key_id)) is not None:
+            debouncer.async_schedule_call()
+
+    @callback
+    def async_record_scheduled(self, key_id: str) -> None:
+        """Record one scheduled refresh of a location."""
+        day = dt_util.now().date().toordinal()
+        if (counter := self._scheduled.get(key_id)) is None:
+            counter = self._scheduled[key_id] = DailyCounter(day, day)
+        counter.increment(day)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_remove_location(self, lat: float, lon: float) -> None:
+        """Forget the calls made for a removed location.
+
+        The counter is kept while another location has the same coordinates.
+        """
+        self._async_count_unconfigured()
+        location_id = usage_location_id(lat, lon)
+        if location_id in self._configured:
+            return
+        if self._locations.pop(location_id, None) is not None:
+            self._unconfigured -= 1
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _async_prune(self, day: int) -> None:
+        """Drop the counters whose days all fell out of the ring."""
+        self._pruned_day = day
+        self._keys = {
+            key: counter
+            for key, counter in self._keys.items()
+            if not counter.is_expired(day)
+        }
+        self._scheduled = {
+            key: counter
+            for key, counter in self._scheduled.items()
+            if not counter.is_expired(day)
+        }
+        self._locations = {
+            location_id: counter
+            for location_id, counter in self._locations.items()
+            if not counter.is_expired(day)
+        }
+        self._async_count_unconfigured()
+
+    @callback
+    def _async_count_unconfigured(self) -> None:
+        """Count the locations whose coordinates no config entry has."""
+        self._configured = {
+            usage_location_id(
+                subentry.data[CONF_LATITUDE], subentry.data[CONF_LONGITUDE]
+            )
+            for entry in self.hass.config_entries.async_entries(DOMAIN)
+            for subentry in entry.subentries.values()
+            if subentry.subentry_type == SUBENTRY_TYPE_LOCATION
+        }
+        self._unconfigured = sum(
+            location_id not in self._configured for location_id in self._locations
+        )
+
+    @callback
+    def _async_drop_unconfigured(self) -> None:
+        """Drop the least recently used unconfigured locations over the limit."""
+        # Locations may have been added since the last count
+        self._async_count_unconfigured()
+        for location_id in list(self._locations):
+            if self._unconfigured <= MAX_UNCONFIGURED_LOCATIONS:
+                break
+            if location_id not in self._configured:
+                del self._locations[location_id]
+                self._unconfigured -= 1
+
+    @callback
+    def async_add_listener(
+        self, key_id: str, update_callback: CALLBACK_TYPE
+    ) -> Callable[[], None]:
+        """Listen for requests recorded for a key.
+
+        Listeners are called at once for the first request, and then at most
+        once per LISTENER_COOLDOWN, however many requests are made.
+        """
+        listeners = self._listeners.setdefault(key_id, [])
+        listeners.append(update_callback)
+        if key_id not in self._debouncers:
+            self._debouncers[key_id] = Debouncer(
+                self.hass,
+                _LOGGER,
+                cooldown=LISTENER_COOLDOWN,
+                immediate=True,
+                function=partial(self._async_notify, key_id),
+            )
+
+        @callback
+        def remove_listener() -> None:
+            listeners.remove(update_callback)
+            if not listeners:
+                del self._listeners[key_id]
+                self._debouncers.pop(key_id).async_shutdown()
+
+        return remove_listener
+
+    @callback
+    def _async_notify(self, key_id: str) -> None:
+        """Call the listeners of a key."""
+        for update_callback in list(self._listeners.get(key_id, ())):
+            update_callback()
+
+    @callback
+    def calls_today(self, key_id: str) -> int:
+        """Return the number of calls made with a key today."""
+        if (counter := self._keys.get(key_id)) is None:
+            return 0
+        return counter.count(dt_util.now().date().toordinal())
+
+    @callback
+    def calls_this_month(self, key_id: str) -> int:
+        """Return the number of calls made with a key this calendar month."""
+        if (counter := self._keys.get(key_id)) is None:
+            return 0
+        today = dt_util.now().date()
+        return counter.total(today.replace(day=1).toordinal(), today.toordinal())
+
+    @callback
+    def daily_calls(self, key_id: str) -> float:
+        """Return the average number of calls per day made with a key.
+
+        The average is taken over the last complete days, or is today's
+        calls if the key is new.
+        """
+        if (counter := self._keys.get(key_id)) is None:
+            return 0
+        return self._daily_average(counter, counter.first_day)
+
+    @callback
+    def daily_unscheduled_calls(self, key_id: str) -> float:
+        """Return the average number of calls per day made outside the schedule.
+
+        These are the calls made with a key that no scheduled refresh made,
+        averaged over the same days as ``daily_calls``.
+        """
+        if (counter := self._keys.get(key_id)) is None:
+            return 0
+        calls = self._daily_average(counter, counter.first_day)
+        if (scheduled := self._scheduled.get(key_id)) is not None:
+            calls -= self._daily_average(scheduled, counter.first_day)
+        return max(calls, 0.0)
+
+    @staticmethod
+    def _daily_average(counter: DailyCounter, first_day: int) -> float:
+        """Return the average of a counter over the last complete days.
+
+        Days are counted from ``first_day``, without any complete day it is
+        today's count.
+        """
+        today_ordinal = dt_util.now().date().toordinal()
+        window = min(PROJECTION_WINDOW_DAYS, today_ordinal - first_day)
+        if window > 0:
+            return counter.total(today_ordinal - window, today_ordinal - 1) / window
+        return counter.count(today_ordinal)
+
+    @callback
+    def projected_month_calls(self, key_id: str) -> int:
+        """Project the number of calls made with a key by the end of the month.
+
+        The remaining days are extrapolated from the recent daily average.
+        """
+        today: date = dt_util.now().date()
+        remaining_days = calendar.monthrange(today.year, today.month)[1] - today.day
+        return self.calls_this_month(key_id) + round(
+            self.daily_calls(key_id) * remaining_days
+        )
+
+
+DATA_USAGE_LEDGER: HassKey[GooglePollenUsageLedger] = HassKey(f"{DOMAIN}_usage")
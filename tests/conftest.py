@@ -1,6 +1,6 @@
 """Common fixtures for Google Pollen tests."""
 
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
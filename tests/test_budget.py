@@ -0,0 +1,158 @@
+"""Test the Google Pollen call budget solver."""
+
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.config_entries import ConfigSubentryData
+from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.google_pollen.budget import (
+    DAY,
+    MAX_RESERVED_SHARE,
+    MIN_UPDATE_INTERVAL,
+    reserved_calls,
+    solve_update_intervals,
+)
+from custom_components.google_pollen.const import (
+    CONF_DAILY_CALL_BUDGET,
+    CONF_PRIORITY,
+    DOMAIN,
+)
+from custom_components.google_pollen.usage import (
+    PROJECTION_WINDOW_DAYS,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+    DailyCounter,
+    usage_key_id,
+)
+
+
+def _calls_per_day(intervals: dict[str, timedelta]) -> float:
+    """Return the number of calls per day of the intervals."""
+    return sum(DAY / interval for interval in intervals.values())
+
+
+def test_budget_shared_by_priority() -> None:
+    """Test calls are shared in proportion to the priorities."""
+    intervals = solve_update_intervals(12, {"home": 4, "office": 2, "cabin": 2})
+
+    assert intervals == {
+        "home": timedelta(hours=4),
+        "office": timedelta(hours=8),
+        "cabin": timedelta(hours=8),
+    }
+
+
+def test_budget_capped_at_min_interval() -> None:
+    """Test what a capped location leaves is given to the others."""
+    intervals = solve_update_intervals(40, {"home": 5, "office": 1, "cabin": 1})
+
+    assert intervals["home"] == MIN_UPDATE_INTERVAL
+    assert intervals["office"] == intervals["cabin"] == timedelta(hours=3)
+    assert _calls_per_day(intervals) <= 40
+
+
+def test_budget_never_exceeded() -> None:
+    """Test rounded intervals never exceed the budget."""
+    priorities = {f"location_{index}": index % 5 + 1 for index in range(37)}
+    for budget in (1, 7, 100, 499, 5000):
+        intervals = solve_update_intervals(budget, priorities)
+        assert _calls_per_day(intervals) <= budget
+        assert min(intervals.values()) >= MIN_UPDATE_INTERVAL
+
+
+def test_reserved_calls() -> None:
+    """Test calls outside the schedule are held back from the budget."""
+    assert solve_update_intervals(12, {"home": 1}, reserved=6) == {
+        "home": timedelta(hours=4)
+    }
+    reserved = reserved_calls(
+        100, locations=4, deadlines=3, hedge_rate=0.05, unscheduled_calls=9
+    )
+    assert reserved == 12
+    # More calls recently made outside the schedule are held back instead
+    reserved = reserved_calls(
+        100, locations=4, deadlines=3, hedge_rate=0, unscheduled_calls=17
+    )
+    assert reserved == 17
+    reserved = reserved_calls(
+        10, locations=40, deadlines=0, hedge_rate=0, unscheduled_calls=0
+    )
+    assert reserved == MAX_RESERVED_SHARE * 10
+
+
+def _budget_entry(daily_budget: int) -> MockConfigEntry:
+    """Return an entry with a call budget, for a location of each priority."""
+    return MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        options={CONF_DAILY_CALL_BUDGET: daily_budget},
+        subentries_data=[
+            ConfigSubentryData(
+                data={CONF_LATITUDE: 37.7749, CONF_LONGITUDE: -122.4194},
+                subentry_id="home",
+                subentry_type="location",
+                title="Home",
+                unique_id=None,
+            ),
+            ConfigSubentryData(
+                data={CONF_LATITUDE: 52.37, CONF_LONGITUDE: 4.89, CONF_PRIORITY: 1},
+                subentry_id="cabin",
+                subentry_type="location",
+                title="Cabin",
+                unique_id=None,
+            ),
+        ],
+    )
+
+
+async def test_budget_applied_on_setup(
+    hass: HomeAssistant, mock_google_pollen_api_class
+) -> None:
+    """Test the update intervals follow the budget option."""
+    entry = _budget_entry(6)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    # The refresh of both locations on setup is held back from the budget
+    coordinators = entry.runtime_data.subentries_runtime_data
+    assert coordinators["home"].update_interval == timedelta(hours=8)
+    assert coordinators["cabin"].update_interval == timedelta(hours=24)
+
+
+async def test_budget_reserve_from_ledger(
+    hass: HomeAssistant, hass_storage: dict[str, Any], mock_google_pollen_api_class
+) -> None:
+    """Test only the calls made outside the schedule are held back."""
+    today = dt_util.now().date().toordinal()
+    calls = DailyCounter(today - PROJECTION_WINDOW_DAYS, today - 1)
+    scheduled = DailyCounter(today - PROJECTION_WINDOW_DAYS, today - 1)
+    for day in range(today - PROJECTION_WINDOW_DAYS, today):
+        for _ in range(40):
+            calls.increment(day)
+        # The other 14 calls of each day were made outside the schedule
+        for _ in range(26):
+            scheduled.increment(day)
+    key_id = usage_key_id("test_api_key")
+    hass_storage[STORAGE_KEY] = {
+        "version": STORAGE_VERSION,
+        "key": STORAGE_KEY,
+        "data": {
+            "keys": {key_id: calls.as_dict()},
+            "scheduled": {key_id: scheduled.as_dict()},
+            "locations": {},
+        },
+    }
+    entry = _budget_entry(30)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    # 16 calls are left for the schedule, 12 for home and 4 for the cabin
+    coordinators = entry.runtime_data.subentries_runtime_data
+    assert coordinators["home"].update_interval == timedelta(hours=2)
+    assert coordinators["cabin"].update_interval == timedelta(hours=6)
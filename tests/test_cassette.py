@@ -0,0 +1,110 @@
+"""Test recording and replaying Google Pollen API responses."""
+
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+import pytest
+
+from custom_components.google_pollen.cassette import (
+    REDACTED,
+    CassetteRecorder,
+    CassetteReplayer,
+)
+from custom_components.google_pollen.google_pollen_api import (
+    GooglePollenApi,
+    GooglePollenApiError,
+    GooglePollenQuotaError,
+    GooglePollenUnsupportedRegionError,
+    SessionTransport,
+    error_from_response,
+)
+from tests.test_google_pollen_api import REAL_API_RESPONSE, _setup_mock_session
+
+CASSETTE = Path(__file__).parent / "fixtures" / "cassette.json"
+
+
+async def test_record_and_replay(tmp_path) -> None:
+    """Test recorded responses are replayed without the API key."""
+    session = MagicMock(spec=aiohttp.ClientSession)
+    _setup_mock_session(session, {**REAL_API_RESPONSE, "echo": "secret_key"})
+    recorder = CassetteRecorder(SessionTransport(session))
+    api = GooglePollenApi(session, "secret_key", transport=recorder)
+    recorded = await api.async_get_current_conditions(37.7749, -122.4194)
+
+    path = tmp_path / "forecast.json"
+    recorder.save(path)
+    cassette = path.read_text(encoding="utf-8")
+    assert "secret_key" not in cassette
+    assert json.loads(cassette)["interactions"][0]["days"] == 5
+
+    replayer = CassetteReplayer.load(path)
+    api = GooglePollenApi(MagicMock(), "other_key", transport=replayer)
+    replayed = await api.async_get_current_conditions(37.77491, -122.4194)
+
+    assert replayed == recorded
+    with pytest.raises(GooglePollenApiError):
+        await api.async_get_current_conditions(52.37, 4.89)
+    body = await replayer.async_request(
+        {"location.latitude": 37.7749, "location.longitude": -122.4194}, {}
+    )
+    assert json.loads(body)["echo"] == REDACTED
+
+
+async def test_replay_realtime() -> None:
+    """Test replaying with the recorded timing."""
+    recorder = CassetteRecorder(MagicMock(async_request=AsyncMock(return_value=b"{}")))
+    params = {"location.latitude": 1.0, "location.longitude": 2.0}
+    await recorder.async_request(params, {})
+    recorder.interactions[0].elapsed = 0.5
+
+    with patch("custom_components.google_pollen.cassette.asyncio.sleep") as mock_sleep:
+        await CassetteReplayer(recorder.interactions).async_request(params, {})
+        mock_sleep.assert_not_called()
+        await CassetteReplayer(recorder.interactions, realtime=True).async_request(
+            params, {}
+        )
+        mock_sleep.assert_awaited_once_with(0.5)
+
+
+async def test_record_error_responses() -> None:
+    """Test error responses are recorded and raise the same error on replay."""
+    error = error_from_response(429, b'{"error": {"code": 429}}', "60")
+    recorder = CassetteRecorder(MagicMock(async_request=AsyncMock(side_effect=error)))
+    params = {"location.latitude": 1.0, "location.longitude": 2.0}
+    with pytest.raises(GooglePollenQuotaError):
+        await recorder.async_request(params, {})
+    assert recorder.interactions[0].status == 429
+
+    with pytest.raises(GooglePollenQuotaError) as replayed:
+        await CassetteReplayer(recorder.interactions).async_request(params, {})
+    assert replayed.value.retry_after == "60"
+
+    # Bodies that are not UTF-8 are recorded as well
+    error = error_from_response(502, b"Bad gateway\xff", None)
+    recorder = CassetteRecorder(MagicMock(async_request=AsyncMock(side_effect=error)))
+    with pytest.raises(GooglePollenApiError):
+        await recorder.async_request(params, {})
+    assert recorder.interactions[0].body == "Bad gateway\ufffd"
+
+    # Failures without a response are not recorded
+    recorder = CassetteRecorder(
+        MagicMock(async_request=AsyncMock(side_effect=GooglePollenApiError()))
+    )
+    with pytest.raises(GooglePollenApiError):
+        await recorder.async_request(params, {})
+    assert not recorder.interactions
+
+
+async def test_replay_cassette_file() -> None:
+    """Test the committed cassette is parsed through the client."""
+    api = GooglePollenApi(
+        MagicMock(), "test_api_key", transport=CassetteReplayer.load(CASSETTE)
+    )
+
+    data = await api.async_get_current_conditions(37.7749, -122.4194)
+    assert data.index == 4
+    assert data.types["tree"] == {"value": 4, "category": "Very High"}
+    with pytest.raises(GooglePollenUnsupportedRegionError):
+        await api.async_get_current_conditions(0.0, 0.0)
@@ -3,8 +3,10 @@
 from unittest.mock import patch
 
 from homeassistant import config_entries
+from homeassistant.config_entries import ConfigSubentryData
 from homeassistant.const import (
     CONF_API_KEY,
+    CONF_ENTITY_ID,
     CONF_LATITUDE,
     CONF_LOCATION,
     CONF_LONGITUDE,
@@ -15,11 +17,23 @@ from homeassistant.data_entry_flow import FlowResultType
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.google_pollen.const import (
+    CONF_DEADLINES,
+    CONF_HEDGE_REQUESTS,
+    CONF_MAX_STALENESS,
+    CONF_PLANTS,
+    CONF_POLLEN_TYPES,
+    CONF_PRIORITY,
     CONF_REFERRER,
+    CONF_THRESHOLDS,
+    CONF_TRACE_REQUESTS,
     DOMAIN,
     SECTION_API_KEY_OPTIONS,
+    SUBENTRY_TYPE_TRACKER,
+)
+from custom_components.google_pollen.google_pollen_api import (
+    GooglePollenApiError,
+    GooglePollenAuthError,
 )
-from custom_components.google_pollen.google_pollen_api import GooglePollenApiError
 
 
 async def test_form(hass: HomeAssistant, mock_google_pollen_api) -> None:
@@ -181,42 +195,268 @@ async def test_form_already_configured(
     assert result2["reason"] == "already_configured"
 
 
-async def test_location_already_configured(
-    hass: HomeAssistant,
-    mock_google_pollen_api,
-    mock_config_entry_data,
-    mock_subentry_data,
+async def test_location_shared_with_other_key(
+    hass: HomeAssistant, mock_google_pollen_api_class
 ) -> None:
-    """Test location already configured."""
-    from tests.conftest import create_mock_entry_with_subentry
-
-    # Set up existing entry with subentry
-    create_mock_entry_with_subentry(
-        hass,
-        mock_config_entry_data,
-        mock_subentry_data,
-        subentry_title="Existing Location",
+    """Test a location of another entry can be added, sharing its data."""
+    mock_get = mock_google_pollen_api_class.async_get_current_conditions
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        unique_id="test_api_key",
+        subentries_data=[
+            ConfigSubentryData(
+                data={CONF_LATITUDE: 37.7749, CONF_LONGITUDE: -122.4194},
+                subentry_type="location",
+                title="Home",
+                unique_id=None,
+            )
+        ],
     )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert mock_get.await_count == 1
 
     result = await hass.config_entries.flow.async_init(
         DOMAIN, context={"source": config_entries.SOURCE_USER}
     )
+    with patch(
+        "custom_components.google_pollen.config_flow.GooglePollenApi",
+        return_value=mock_google_pollen_api_class,
+    ):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {
+                CONF_API_KEY: "different_api_key",
+                CONF_NAME: "Office",
+                CONF_LOCATION: {CONF_LATITUDE: 37.7749, CONF_LONGITUDE: -122.4194},
+            },
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    other = result["result"]
+    # Only the flow validated the key, the new location was served the data
+    # fetched for the first entry
+    assert mock_get.await_count == 2
+    (home,) = entry.runtime_data.subentries_runtime_data.values()
+    (office,) = other.runtime_data.subentries_runtime_data.values()
+    assert home.shared_location is office.shared_location
+    # Both entries have the sensors of the location
+    assert hass.states.get("sensor.home_pollen_index").state == "3"
+    assert hass.states.get("sensor.office_pollen_index").state == "3"
+
+    # The entry itself cannot have the location twice
+    result = await hass.config_entries.subentries.async_init(
+        (other.entry_id, "location"),
+        context={"source": config_entries.SOURCE_USER},
+    )
+    result = await hass.config_entries.subentries.async_configure(
+        result["flow_id"],
+        {
+            CONF_NAME: "Office 2",
+            CONF_LOCATION: {CONF_LATITUDE: 37.77491, CONF_LONGITUDE: -122.4194},
+        },
+    )
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": "location_already_configured"}
+
+
+async def test_options_flow(hass: HomeAssistant) -> None:
+    """Test enabling request tracing in the options."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        unique_id="test_api_key",
+    )
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] is FlowResultType.FORM
+    assert result["step_id"] == "init"
+
+    with patch("custom_components.google_pollen.async_setup_entry", return_value=True):
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"], {CONF_TRACE_REQUESTS: True}
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert entry.options == {
+        CONF_MAX_STALENESS: 24,
+        CONF_HEDGE_REQUESTS: False,
+        CONF_TRACE_REQUESTS: True,
+    }
+
+
+async def test_subentry_reconfigure(hass: HomeAssistant) -> None:
+    """Test configuring the priority and alert thresholds of a location."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        unique_id="test_api_key",
+        subentries_data=[
+            ConfigSubentryData(
+                data={CONF_LATITUDE: 37.7749, CONF_LONGITUDE: -122.4194},
+                subentry_id="location_subentry",
+                subentry_type="location",
+                title="Test Location",
+                unique_id=None,
+            )
+        ],
+    )
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.subentries.async_init(
+        (entry.entry_id, "location"),
+        context={
+            "source": config_entries.SOURCE_RECONFIGURE,
+            "subentry_id": "location_subentry",
+        },
+    )
+    assert result["type"] is FlowResultType.FORM
+    assert result["step_id"] == "reconfigure"
+
+    result = await hass.config_entries.subentries.async_configure(
+        result["flow_id"], {CONF_DEADLINES: ["25:00"]}
+    )
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {CONF_DEADLINES: "invalid_deadline"}
+
+    with patch("custom_components.google_pollen.async_setup_entry", return_value=True):
+        result = await hass.config_entries.subentries.async_configure(
+            result["flow_id"],
+            {
+                CONF_PRIORITY: 5.0,
+                CONF_POLLEN_TYPES: ["tree"],
+                CONF_PLANTS: ["birch"],
+                CONF_DEADLINES: ["18:00", "06:30", "06:30:00"],
+                "tree": 4.0,
+                "index": 3.0,
+            },
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.ABORT
+    assert result["reason"] == "reconfigure_successful"
+    assert entry.subentries["location_subentry"].data == {
+        CONF_LATITUDE: 37.7749,
+        CONF_LONGITUDE: -122.4194,
+        CONF_PRIORITY: 5,
+        CONF_POLLEN_TYPES: ["tree"],
+        CONF_PLANTS: ["birch"],
+        CONF_DEADLINES: ["06:30", "18:00"],
+        CONF_THRESHOLDS: {"tree": 4, "index": 3},
+    }
+
+
+async def test_tracker_subentry(
+    hass: HomeAssistant, mock_google_pollen_api_class
+) -> None:
+    """Test adding a location following a person."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        unique_id="test_api_key",
+        subentries_data=[
+            ConfigSubentryData(
+                data={CONF_LATITUDE: 37.7749, CONF_LONGITUDE: -122.4194},
+                subentry_id="location_subentry",
+                subentry_type="location",
+                title="Home",
+                unique_id=None,
+            )
+        ],
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    result = await hass.config_entries.subentries.async_init(
+        (entry.entry_id, SUBENTRY_TYPE_TRACKER),
+        context={"source": config_entries.SOURCE_USER},
+    )
+    assert result["type"] is FlowResultType.FORM
+    assert result["step_id"] == "user"
+
+    result = await hass.config_entries.subentries.async_configure(
+        result["flow_id"], {CONF_NAME: "Alice", CONF_ENTITY_ID: "person.alice"}
+    )
+    await hass.async_block_till_done()
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert result["title"] == "Alice"
+    assert result["data"] == {CONF_ENTITY_ID: "person.alice"}
+
+    result = await hass.config_entries.subentries.async_init(
+        (entry.entry_id, SUBENTRY_TYPE_TRACKER),
+        context={"source": config_entries.SOURCE_USER},
+    )
+    result = await hass.config_entries.subentries.async_configure(
+        result["flow_id"], {CONF_NAME: "Alice 2", CONF_ENTITY_ID: "person.alice"}
+    )
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": "tracker_already_configured"}
 
+
+async def test_reauth_flow(hass: HomeAssistant, mock_google_pollen_api) -> None:
+    """Test replacing a rejected API key."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "old_api_key", CONF_REFERRER: None},
+        subentries_data=[
+            ConfigSubentryData(
+                data={CONF_LATITUDE: 37.7749, CONF_LONGITUDE: -122.4194},
+                subentry_id="location_subentry",
+                subentry_type="location",
+                title="Test Location",
+                unique_id=None,
+            )
+        ],
+    )
+    entry.add_to_hass(hass)
+
+    result = await entry.start_reauth_flow(hass)
+    assert result["type"] is FlowResultType.FORM
+    assert result["step_id"] == "reauth_confirm"
+
+    mock_google_pollen_api.async_get_current_conditions.side_effect = (
+        GooglePollenAuthError("API key not valid")
+    )
     with patch(
         "custom_components.google_pollen.config_flow.GooglePollenApi",
         return_value=mock_google_pollen_api,
     ):
-        result2 = await hass.config_entries.flow.async_configure(
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_API_KEY: "still_invalid"}
+        )
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": "invalid_auth"}
+
+    mock_google_pollen_api.async_get_current_conditions.side_effect = None
+    with (
+        patch(
+            "custom_components.google_pollen.config_flow.GooglePollenApi",
+            return_value=mock_google_pollen_api,
+        ) as mock_api_class,
+        patch("custom_components.google_pollen.async_setup_entry", return_value=True),
+    ):
+        result = await hass.config_entries.flow.async_configure(
             result["flow_id"],
             {
-                CONF_API_KEY: "different_api_key",
-                CONF_NAME: "Test Location",
-                CONF_LOCATION: {
-                    CONF_LATITUDE: mock_subentry_data[CONF_LATITUDE],
-                    CONF_LONGITUDE: mock_subentry_data[CONF_LONGITUDE],
-                },
+                CONF_API_KEY: "new_api_key",
+                SECTION_API_KEY_OPTIONS: {CONF_REFERRER: "https://example.com"},
             },
         )
+        await hass.async_block_till_done()
 
-    assert result2["type"] is FlowResultType.ABORT
-    assert result2["reason"] == "already_configured"
+    assert result["type"] is FlowResultType.ABORT
+    assert result["reason"] == "reauth_successful"
+    assert entry.data == {
+        CONF_API_KEY: "new_api_key",
+        CONF_REFERRER: "https://example.com",
+    }
+    mock_google_pollen_api.async_get_current_conditions.assert_called_with(
+        lat=37.7749, lon=-122.4194
+    )
+    assert mock_api_class.call_args[0][1] == "new_api_key"
@@ -1,13 +1,36 @@
 """Test the Google Pollen coordinator."""
 
+from datetime import timedelta
+from unittest.mock import patch
 
 import pytest
+from freezegun.api import FrozenDateTimeFactory
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    async_capture_events,
+    async_fire_time_changed,
+)
 
-from custom_components.google_pollen.coordinator import GooglePollenUpdateCoordinator
+from custom_components.google_pollen.const import (
+    CONF_THRESHOLDS,
+    DEFAULT_MAX_STALENESS,
+    EVENT_THRESHOLD_CROSSED,
+)
+from custom_components.google_pollen.coordinator import (
+    LOOP_LAG_DEFER_DELAY,
+    MAX_LOOP_LAG_DEFERRAL,
+    STALE_RETRY_INTERVAL,
+    UPDATE_INTERVAL,
+    GooglePollenUpdateCoordinator,
+)
 from custom_components.google_pollen.google_pollen_api import (
     GooglePollenApiError,
+    GooglePollenAuthError,
+    GooglePollenQuotaError,
+    PollenCurrentConditionsData,
 )
 
 
@@ -89,3 +112,253 @@ async def test_coordinator_interval_update(
     # Manual second refresh (not testing time-based triggers)
     await coordinator.async_refresh()
     assert mock_google_pollen_api.async_get_current_conditions.call_count == 2
+
+
+async def test_coordinator_serves_stale_data(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_google_pollen_api,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test the last good data is kept up to the maximum staleness."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+
+    coordinator = GooglePollenUpdateCoordinator(
+        hass, config_entry, subentry_id, mock_google_pollen_api
+    )
+    await coordinator.async_refresh()
+    data = coordinator.data
+
+    mock_google_pollen_api.async_get_current_conditions.side_effect = (
+        GooglePollenApiError("API Error")
+    )
+    freezer.tick(timedelta(hours=6))
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.data is data
+    assert coordinator.stale
+    assert coordinator.data_age == timedelta(hours=6)
+    assert coordinator.update_interval == STALE_RETRY_INTERVAL
+
+    freezer.tick(timedelta(hours=DEFAULT_MAX_STALENESS - 6))
+    await coordinator.async_refresh()
+
+    assert not coordinator.last_update_success
+    assert coordinator.update_interval == UPDATE_INTERVAL
+
+    mock_google_pollen_api.async_get_current_conditions.side_effect = None
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert not coordinator.stale
+    assert coordinator.data_age is None
+
+
+async def test_coordinator_unchanged_data(
+    hass: HomeAssistant,
+    mock_google_pollen_api,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test the entities are only notified when the data or its age changed."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+    coordinator = GooglePollenUpdateCoordinator(
+        hass, config_entry, subentry_id, mock_google_pollen_api
+    )
+    updates = []
+    unsubscribe = coordinator.async_add_listener(
+        lambda: updates.append(coordinator.data)
+    )
+
+    await coordinator.async_refresh()
+    data = coordinator.data
+    assert updates == [data]
+
+    # The client returns the previous data for an unchanged response
+    await coordinator.async_refresh()
+    mock_google_pollen_api.async_get_current_conditions.assert_awaited_with(
+        coordinator.lat, coordinator.long, coordinator.selection, data
+    )
+    assert len(updates) == 1
+
+    mock_google_pollen_api.async_get_current_conditions.side_effect = (
+        GooglePollenApiError("API Error")
+    )
+    await coordinator.async_refresh()
+    assert coordinator.stale
+    assert len(updates) == 2
+
+    mock_google_pollen_api.async_get_current_conditions.side_effect = None
+    await coordinator.async_refresh()
+    assert not coordinator.stale
+    assert len(updates) == 3
+
+    await coordinator.async_refresh()
+    assert len(updates) == 3
+    unsubscribe()
+
+
+async def test_coordinator_defers_refresh_on_loop_lag(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_google_pollen_api_class,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test scheduled refreshes wait while the event loop lags."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = config_entry.runtime_data.subentries_runtime_data[subentry_id]
+    mock_get = mock_google_pollen_api_class.async_get_current_conditions
+    assert mock_get.await_count == 1
+
+    async def _tick(delta: timedelta) -> None:
+        freezer.tick(delta)
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    with patch(
+        "custom_components.google_pollen.coordinator._async_measure_loop_lag",
+        return_value=1.0,
+    ) as mock_lag:
+        await _tick(UPDATE_INTERVAL)
+        assert mock_get.await_count == 1
+        assert coordinator.deferred_refreshes == 1
+
+        mock_lag.return_value = 0.0
+        await _tick(LOOP_LAG_DEFER_DELAY * 2)
+        assert mock_get.await_count == 2
+        assert coordinator.deferred_refreshes == 1
+
+        # A refresh is deferred for at most the maximum deferral
+        mock_lag.return_value = 1.0
+        await _tick(UPDATE_INTERVAL)
+        for _ in range(MAX_LOOP_LAG_DEFERRAL // LOOP_LAG_DEFER_DELAY):
+            await _tick(LOOP_LAG_DEFER_DELAY * 2)
+        assert mock_get.await_count == 3
+        assert 1 < coordinator.deferred_refreshes <= 21
+
+
+async def test_coordinator_threshold_events(
+    hass: HomeAssistant,
+    mock_google_pollen_api,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test an event is fired only when a value crosses its threshold."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass,
+        mock_config_entry_data,
+        {**mock_subentry_data, CONF_THRESHOLDS: {"tree": 4, "grass": 3}},
+    )
+    events = async_capture_events(hass, EVENT_THRESHOLD_CROSSED)
+    coordinator = GooglePollenUpdateCoordinator(
+        hass, config_entry, subentry_id, mock_google_pollen_api
+    )
+
+    # The first update records tree above and grass below their thresholds
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert events == []
+
+    mock_google_pollen_api.async_get_current_conditions.return_value = (
+        PollenCurrentConditionsData(
+            index=3,
+            category="Moderate",
+            types={
+                "tree": {"value": 2, "category": "Low"},
+                "grass": {"value": 2, "category": "Low"},
+            },
+        )
+    )
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert len(events) == 1
+    assert events[0].data == {
+        "config_entry_id": config_entry.entry_id,
+        "subentry_id": subentry_id,
+        "pollen_type": "tree",
+        "value": 2,
+        "category": "Low",
+        "threshold": 4,
+        "direction": "below",
+    }
+
+
+async def test_coordinator_auth_error(
+    hass: HomeAssistant,
+    mock_google_pollen_api,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test a rejected API key starts a reauth flow."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+    mock_google_pollen_api.async_get_current_conditions.side_effect = (
+        GooglePollenAuthError("API key not valid")
+    )
+    coordinator = GooglePollenUpdateCoordinator(
+        hass, config_entry, subentry_id, mock_google_pollen_api
+    )
+
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert isinstance(coordinator.last_exception, ConfigEntryAuthFailed)
+    flows = hass.config_entries.flow.async_progress()
+    assert len(flows) == 1
+    assert flows[0]["context"]["source"] == "reauth"
+
+
+async def test_coordinator_quota_error(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_google_pollen_api,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test updates are paused until the quota resets."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+    coordinator = GooglePollenUpdateCoordinator(
+        hass, config_entry, subentry_id, mock_google_pollen_api
+    )
+    await coordinator.async_refresh()
+
+    reset = dt_util.utcnow() + timedelta(hours=9)
+    mock_google_pollen_api.async_get_current_conditions.side_effect = (
+        GooglePollenQuotaError("Quota exceeded", reset)
+    )
+    await coordinator.async_refresh()
+    assert coordinator.stale
+    assert coordinator.update_interval == timedelta(hours=9)
+
+    freezer.tick(timedelta(hours=DEFAULT_MAX_STALENESS))
+    await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+    assert coordinator.update_interval == STALE_RETRY_INTERVAL
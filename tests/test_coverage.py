@@ -0,0 +1,193 @@
+"""Test the Google Pollen coverage cache."""
+
+from datetime import timedelta
+from typing import Any
+from unittest.mock import MagicMock
+
+import aiohttp
+import pytest
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.config_entries import (
+    SOURCE_RECONFIGURE,
+    ConfigEntryState,
+    ConfigSubentryData,
+)
+from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.google_pollen.const import DOMAIN
+from custom_components.google_pollen.coverage import (
+    DATA_COVERAGE,
+    STORAGE_KEY,
+    UNSUPPORTED_REGION_TTL,
+    GooglePollenCoverageCache,
+)
+from custom_components.google_pollen.google_pollen_api import (
+    GooglePollenApi,
+    GooglePollenUnsupportedRegionError,
+)
+from tests.test_google_pollen_api import REAL_API_RESPONSE, _setup_mock_session
+
+
+async def test_unsupported_region_not_requested(hass: HomeAssistant) -> None:
+    """Test coordinates near an unsupported location are not requested."""
+    coverage = GooglePollenCoverageCache(hass)
+    session = MagicMock(spec=aiohttp.ClientSession)
+    _setup_mock_session(session, {"regionCode": "AQ"})
+    api = GooglePollenApi(session, "test_api_key", coverage=coverage)
+
+    with pytest.raises(GooglePollenUnsupportedRegionError):
+        await api.async_get_current_conditions(-77.846, 166.676)
+    with pytest.raises(GooglePollenUnsupportedRegionError):
+        await api.async_get_current_conditions(-77.85, 166.68)
+    assert session.get.call_count == 1
+
+    _setup_mock_session(session, REAL_API_RESPONSE)
+    result = await api.async_get_current_conditions(37.7749, -122.4194)
+    assert result.index == 4
+
+
+async def test_cache_persisted(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Test unexpired regions are restored from storage."""
+    now = dt_util.utcnow()
+    hass_storage[STORAGE_KEY] = {
+        "version": 1,
+        "data": {
+            "-77.8,166.7": (now - timedelta(days=1)).isoformat(),
+            "80.0,0.0": (now - UNSUPPORTED_REGION_TTL).isoformat(),
+        },
+    }
+    coverage = GooglePollenCoverageCache(hass)
+    await coverage.async_load()
+
+    assert len(coverage) == 1
+    assert coverage.is_unsupported(-77.81, 166.69)
+    assert not coverage.is_unsupported(80.0, 0.0)
+
+    coverage.async_mark_unsupported(52.37, 4.89)
+    freezer.tick(timedelta(seconds=10))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert "52.4,4.9" in hass_storage[STORAGE_KEY]["data"]
+
+    freezer.tick(UNSUPPORTED_REGION_TTL)
+    assert not coverage.is_unsupported(-77.81, 166.69)
+    assert len(coverage) == 1
+
+
+@pytest.mark.parametrize(
+    ("status", "error", "cached"),
+    [
+        (404, {"message": "Information is unavailable for this location."}, True),
+        (400, {"message": "Invalid location.latitude."}, False),
+        (
+            400,
+            {
+                "message": "No coverage for the location.",
+                "details": [{"reason": "REGION_NOT_SUPPORTED"}],
+            },
+            True,
+        ),
+    ],
+)
+async def test_only_region_errors_cached(
+    hass: HomeAssistant, status: int, error: dict[str, Any], cached: bool
+) -> None:
+    """Test only responses about the region are remembered."""
+    coverage = GooglePollenCoverageCache(hass)
+    session = MagicMock(spec=aiohttp.ClientSession)
+    _setup_mock_session(session, {"error": error}).status = status
+    api = GooglePollenApi(session, "test_api_key", coverage=coverage)
+
+    with pytest.raises(GooglePollenUnsupportedRegionError):
+        await api.async_get_current_conditions(52.37, 4.89)
+    assert coverage.is_unsupported(52.37, 4.89) is cached
+
+
+def _entry_with_locations() -> MockConfigEntry:
+    """Return an entry with a location in and one out of coverage."""
+    return MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        unique_id="test_api_key",
+        subentries_data=[
+            ConfigSubentryData(
+                data={CONF_LATITUDE: latitude, CONF_LONGITUDE: longitude},
+                subentry_id=subentry_id,
+                subentry_type="location",
+                title=subentry_id.title(),
+                unique_id=None,
+            )
+            for subentry_id, latitude, longitude in (
+                ("home", 37.7749, -122.4194),
+                ("station", -77.846, 166.676),
+            )
+        ],
+    )
+
+
+async def test_unsupported_location_set_up(
+    hass: HomeAssistant, mock_google_pollen_api_class
+) -> None:
+    """Test a location without coverage does not keep the entry from loading."""
+    mock_get = mock_google_pollen_api_class.async_get_current_conditions
+    data = mock_get.return_value
+
+    def _get_conditions(lat, lon, selection=None, previous=None):
+        if lat < 0:
+            raise GooglePollenUnsupportedRegionError("No data")
+        return data
+
+    mock_get.side_effect = _get_conditions
+    entry = _entry_with_locations()
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert hass.states.get("sensor.home_pollen_index").state == "3"
+    station = entry.runtime_data.subentries_runtime_data["station"]
+    assert not station.last_update_success
+    assert hass.states.get("sensor.station_pollen_index") is None
+
+
+async def test_cache_cleared_on_reconfigure_and_removal(
+    hass: HomeAssistant, mock_google_pollen_api_class
+) -> None:
+    """Test the API is only asked again about reconfigured or removed locations."""
+    entry = _entry_with_locations()
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coverage = hass.data[DATA_COVERAGE]
+    coverage.async_mark_unsupported(37.7749, -122.4194)
+    coverage.async_mark_unsupported(-77.846, 166.676)
+    coverage.async_mark_unsupported(52.37, 4.89)
+
+    # Adding a location or changing options reloads the entry
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert coverage.is_unsupported(37.7749, -122.4194)
+
+    result = await hass.config_entries.subentries.async_init(
+        (entry.entry_id, "location"),
+        context={"source": SOURCE_RECONFIGURE, "subentry_id": "home"},
+    )
+    await hass.config_entries.subentries.async_configure(result["flow_id"], {})
+    await hass.async_block_till_done()
+    assert not coverage.is_unsupported(37.7749, -122.4194)
+    assert coverage.is_unsupported(-77.846, 166.676)
+
+    assert await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+    assert not coverage.is_unsupported(-77.846, 166.676)
+    assert coverage.is_unsupported(52.37, 4.89)
@@ -0,0 +1,75 @@
+"""Test the Google Pollen prefetch before deadlines."""
+
+from datetime import time, timedelta
+
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.config_entries import ConfigSubentryData
+from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.google_pollen.const import CONF_DEADLINES, DOMAIN
+from custom_components.google_pollen.deadlines import prefetch_time
+
+
+def _subentry(subentry_id: str, lat: float, deadlines: list[str]) -> ConfigSubentryData:
+    """Return a location with deadlines."""
+    return ConfigSubentryData(
+        data={CONF_LATITUDE: lat, CONF_LONGITUDE: -122.4194, CONF_DEADLINES: deadlines},
+        subentry_id=subentry_id,
+        subentry_type="location",
+        title=subentry_id,
+        unique_id=None,
+    )
+
+
+def test_prefetch_time() -> None:
+    """Test prefetches start before the deadline, on the day before if needed."""
+    assert prefetch_time(time(6, 30)) == time(6, 20)
+    assert prefetch_time(time(0, 5)) == time(23, 55)
+
+
+async def test_prefetch_before_deadline(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_google_pollen_api_class,
+) -> None:
+    """Test locations sharing a deadline are prefetched together when due."""
+    mock_get = mock_google_pollen_api_class.async_get_current_conditions
+    today = dt_util.start_of_local_day()
+    freezer.move_to(today + timedelta(hours=5))
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        unique_id="test_api_key",
+        subentries_data=[
+            _subentry("home", 37.7749, ["06:30"]),
+            _subentry("office", 37.8, ["06:30", "18:00"]),
+            _subentry("garden", 37.9, ["06:30"]),
+            _subentry("cabin", 38.5, []),
+        ],
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinators = entry.runtime_data.subentries_runtime_data
+    assert mock_get.await_count == 4
+
+    # Locations updated within the last hour are left out
+    freezer.move_to(today + timedelta(hours=5, minutes=30))
+    coordinators["garden"].shared_location.async_invalidate()
+    await coordinators["garden"].async_refresh()
+    assert mock_get.await_count == 5
+
+    freezer.move_to(today + timedelta(hours=6, minutes=20))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+    assert mock_get.await_count == 7
+    assert {call.args[0] for call in mock_get.await_args_list[5:]} == {37.7749, 37.8}
+    # The next periodic refresh is counted from the prefetch
+    assert coordinators["home"].last_update_success_time == dt_util.utcnow()
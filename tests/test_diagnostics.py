@@ -0,0 +1,39 @@
+"""Test the Google Pollen diagnostics."""
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.google_pollen.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.google_pollen.google_pollen_api import HedgeStats, ParseStats
+
+
+async def test_diagnostics(
+    hass: HomeAssistant,
+    mock_google_pollen_api_class,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test the config entry diagnostics."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    mock_google_pollen_api_class.parse_stats = ParseStats(parses=2, offloaded=1)
+    mock_google_pollen_api_class.hedge_stats = HedgeStats(requests=2)
+    mock_google_pollen_api_class.tracer = None
+    config_entry, _ = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, config_entry)
+
+    assert diagnostics["locations"] == 1
+    assert diagnostics["shared_locations"] == 0
+    assert diagnostics["deferred_refreshes"] == 0
+    assert diagnostics["unsupported_regions"] == 0
+    assert diagnostics["parse_stats"]["parses"] == 2
+    assert diagnostics["parse_stats"]["offloaded"] == 1
+    assert diagnostics["parse_stats"]["unchanged_rate"] == 0
+    assert diagnostics["hedge_stats"]["requests"] == 2
+    assert diagnostics["request_timings"] is None
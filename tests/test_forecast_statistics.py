@@ -0,0 +1,148 @@
+"""Test the Google Pollen forecast statistics import."""
+
+from datetime import timedelta
+
+import pytest
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.components.recorder import Recorder
+from homeassistant.components.recorder.statistics import (
+    list_statistic_ids,
+    statistics_during_period,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.google_pollen.const import DOMAIN
+from custom_components.google_pollen.forecast_statistics import (
+    IMPORT_COOLDOWN,
+    forecast_statistic_id,
+)
+from custom_components.google_pollen.google_pollen_api import (
+    PollenCurrentConditionsData,
+    PollenForecastDay,
+)
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(
+    recorder_mock: Recorder, enable_custom_integrations: None
+) -> None:
+    """Enable custom integrations after the recorder is set up."""
+    return
+
+
+async def _forecast_statistic_ids(hass: HomeAssistant) -> set[str]:
+    """Return the ids of the imported forecast statistics."""
+    return {
+        item["statistic_id"]
+        for item in await hass.async_add_executor_job(list_statistic_ids, hass)
+        if item["source"] == DOMAIN
+    }
+
+
+@pytest.mark.parametrize("time_zone", ["US/Pacific", "Asia/Kolkata"])
+async def test_forecast_imported(
+    recorder_mock: Recorder,
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_google_pollen_api_class,
+    mock_config_entry_data,
+    mock_subentry_data,
+    time_zone: str,
+) -> None:
+    """Test the forecast is imported as external statistics."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    await hass.config.async_set_time_zone(time_zone)
+    today = dt_util.now().date()
+    mock_google_pollen_api_class.async_get_current_conditions.return_value = (
+        PollenCurrentConditionsData(
+            index=3,
+            category="High",
+            types={"tree": {"value": 3, "category": "High"}},
+            forecast=[
+                PollenForecastDay(
+                    date=today + timedelta(days=offset),
+                    index=3 - offset,
+                    category=None,
+                    types={"tree": {"value": 3 - offset, "category": None}},
+                )
+                for offset in range(3)
+            ],
+        )
+    )
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    freezer.tick(timedelta(seconds=IMPORT_COOLDOWN + 1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass)
+
+    assert await _forecast_statistic_ids(hass) == {
+        forecast_statistic_id(subentry_id, "index"),
+        forecast_statistic_id(subentry_id, "tree"),
+    }
+
+    tree_id = forecast_statistic_id(subentry_id, "tree")
+    stats = await hass.async_add_executor_job(
+        statistics_during_period,
+        hass,
+        dt_util.start_of_local_day(today - timedelta(days=1)),
+        None,
+        {tree_id},
+        "hour",
+        None,
+        {"mean"},
+    )
+    assert [row["mean"] for row in stats[tree_id]] == [3, 2, 1]
+    # Local midnight is not on the hour in every time zone
+    assert all(row["start"] % 3600 == 0 for row in stats[tree_id])
+
+
+async def test_forecast_cleared_on_removal(
+    recorder_mock: Recorder,
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_google_pollen_api_class,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test the statistics of a removed location are cleared."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    today = dt_util.now().date()
+    mock_google_pollen_api_class.async_get_current_conditions.return_value = (
+        PollenCurrentConditionsData(
+            index=3,
+            category="High",
+            types={},
+            forecast=[PollenForecastDay(date=today, index=3, category=None, types={})],
+        )
+    )
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    freezer.tick(timedelta(seconds=IMPORT_COOLDOWN + 1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass)
+    assert await _forecast_statistic_ids(hass) == {
+        forecast_statistic_id(subentry_id, "index")
+    }
+
+    assert hass.config_entries.async_remove_subentry(config_entry, subentry_id)
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass)
+
+    assert not await _forecast_statistic_ids(hass)
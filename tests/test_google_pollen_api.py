@@ -1,14 +1,25 @@
 """Test the Google Pollen API client."""
 
+import json
+from datetime import UTC, date, datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock
 
 import aiohttp
 import pytest
+from freezegun import freeze_time
 
 from custom_components.google_pollen.google_pollen_api import (
+    ALL_POLLEN_TYPES,
     GooglePollenApi,
     GooglePollenApiError,
+    GooglePollenAuthError,
+    GooglePollenBadRequestError,
+    GooglePollenQuotaError,
+    GooglePollenTransientError,
+    GooglePollenUnsupportedRegionError,
     PollenCurrentConditionsData,
+    PollenSelection,
+    _quota_reset,
 )
 
 # Real Google Pollen API v1 response shape used across tests
@@ -65,8 +76,7 @@ def _setup_mock_session(mock_session, response_data):
     """Configure mock session to return the given response data."""
     mock_response = MagicMock()
     mock_response.status = 200
-    mock_response.raise_for_status = MagicMock()
-    mock_response.json = AsyncMock(return_value=response_data)
+    mock_response.read = AsyncMock(return_value=json.dumps(response_data).encode())
 
     mock_session.get = MagicMock(return_value=AsyncMock().__aenter__.return_value)
     mock_session.get.return_value.__aenter__ = AsyncMock(return_value=mock_response)
@@ -93,6 +103,58 @@ async def test_api_get_current_conditions_success(mock_session):
     assert result.types["weed"]["value"] == 1
 
 
+async def test_api_selection(mock_session):
+    """Test only the selected pollen types and plants are parsed."""
+    api = GooglePollenApi(mock_session, "test_api_key")
+    response = json.loads(json.dumps(REAL_API_RESPONSE))
+    response["dailyInfo"][0]["plantInfo"] = [
+        {
+            "code": "BIRCH",
+            "displayName": "Birch",
+            "inSeason": True,
+            "indexInfo": {"code": "UPI", "value": 3, "category": "Moderate"},
+        },
+        {"code": "OAK", "displayName": "Oak", "indexInfo": {"value": 1}},
+    ]
+    _setup_mock_session(mock_session, response)
+
+    result = await api.async_get_current_conditions(
+        37.7749,
+        -122.4194,
+        PollenSelection(types=frozenset({"grass"}), plants=frozenset({"birch"})),
+    )
+
+    # The overall index still covers every type
+    assert result.index == 4
+    assert result.types == {"grass": {"value": 2, "category": "Low"}}
+    assert result.forecast[0].types == result.types
+    assert result.plants == {
+        "birch": {"name": "Birch", "value": 3, "category": "Moderate"}
+    }
+    params = mock_session.get.call_args[1]["params"]
+    assert params["plantsDescription"] == "false"
+
+    result = await api.async_get_current_conditions(37.7749, -122.4194)
+    assert set(result.types) == {"grass", "tree", "weed"}
+    assert result.plants == {}
+
+
+def test_selection_union() -> None:
+    """Test selections of several locations are combined."""
+    grass = PollenSelection(types=frozenset({"grass"}))
+    birch = PollenSelection(types=frozenset(), plants=frozenset({"birch"}))
+    union = grass.union(birch)
+    assert union == PollenSelection(
+        types=frozenset({"grass"}), plants=frozenset({"birch"})
+    )
+    assert union.covers(grass)
+    assert union.covers(birch)
+    assert not grass.covers(union)
+    assert not union.covers(PollenSelection())
+    assert PollenSelection(plants=frozenset({"birch"})).covers(union)
+    assert grass.union(PollenSelection()).types is None
+
+
 async def test_api_with_referrer(mock_session):
     """Test API call includes Referer header when referrer is configured."""
     api = GooglePollenApi(mock_session, "test_api_key", referrer="https://example.com")
@@ -121,24 +183,109 @@ async def test_api_url_params(mock_session):
 async def test_api_http_error(mock_session):
     """Test API HTTP error raises GooglePollenApiError."""
     api = GooglePollenApi(mock_session, "test_api_key")
+    mock_response = _setup_mock_session(mock_session, {})
+    mock_response.status = 500
 
-    mock_response = MagicMock()
+    with pytest.raises(GooglePollenTransientError):
+        await api.async_get_current_conditions(37.7749, -122.4194)
+
+
+@pytest.mark.parametrize(
+    ("status", "error", "expected"),
+    [
+        (
+            400,
+            {
+                "status": "INVALID_ARGUMENT",
+                "message": "API key not valid. Please pass a valid API key.",
+                "details": [{"reason": "API_KEY_INVALID"}],
+            },
+            GooglePollenAuthError,
+        ),
+        (
+            403,
+            {
+                "status": "PERMISSION_DENIED",
+                "message": "Requests from referer <empty> are blocked.",
+                "details": [{"reason": "API_KEY_HTTP_REFERRER_BLOCKED"}],
+            },
+            GooglePollenAuthError,
+        ),
+        (
+            429,
+            {"status": "RESOURCE_EXHAUSTED", "message": "Quota exceeded"},
+            GooglePollenQuotaError,
+        ),
+        (
+            404,
+            {
+                "status": "NOT_FOUND",
+                "message": "Information is unavailable for this location.",
+            },
+            GooglePollenUnsupportedRegionError,
+        ),
+        (
+            400,
+            {"status": "INVALID_ARGUMENT", "message": "Invalid days"},
+            GooglePollenBadRequestError,
+        ),
+        (503, {"status": "UNAVAILABLE"}, GooglePollenTransientError),
+    ],
+)
+async def test_api_error_classification(mock_session, status, error, expected):
+    """Test error responses are raised as the matching error type."""
+    api = GooglePollenApi(mock_session, "test_api_key")
+    mock_response = _setup_mock_session(mock_session, {"error": error})
+    mock_response.status = status
+
+    with pytest.raises(GooglePollenApiError) as exc_info:
+        await api.async_get_current_conditions(37.7749, -122.4194)
+
+    assert type(exc_info.value) is expected
+
+
+async def test_api_auth_error_fails_fast(mock_session):
+    """Test no request is sent once the key has been rejected."""
+    api = GooglePollenApi(mock_session, "test_api_key")
+    mock_response = _setup_mock_session(mock_session, {})
     mock_response.status = 403
-    mock_response.raise_for_status = MagicMock(
-        side_effect=aiohttp.ClientResponseError(
-            request_info=MagicMock(),
-            history=(),
-            status=403,
-            message="Forbidden",
-        )
-    )
 
-    mock_session.get = MagicMock(return_value=AsyncMock().__aenter__.return_value)
-    mock_session.get.return_value.__aenter__ = AsyncMock(return_value=mock_response)
-    mock_session.get.return_value.__aexit__ = AsyncMock(return_value=None)
+    with pytest.raises(GooglePollenAuthError):
+        await api.async_get_current_conditions(37.7749, -122.4194)
+    with pytest.raises(GooglePollenAuthError):
+        await api.async_get_current_conditions(52.37, 4.89)
 
-    with pytest.raises(GooglePollenApiError):
+    assert mock_session.get.call_count == 1
+
+
+async def test_api_quota_error_pauses(mock_session):
+    """Test no request is sent until the quota resets."""
+    api = GooglePollenApi(mock_session, "test_api_key")
+    mock_response = _setup_mock_session(mock_session, {})
+    mock_response.status = 429
+    mock_response.headers = {"Retry-After": "60"}
+
+    with pytest.raises(GooglePollenQuotaError) as exc_info:
+        await api.async_get_current_conditions(37.7749, -122.4194)
+    reset = exc_info.value.reset
+    assert reset is not None
+    assert timedelta(seconds=55) < reset - datetime.now(UTC) <= timedelta(seconds=60)
+    with pytest.raises(GooglePollenQuotaError):
         await api.async_get_current_conditions(37.7749, -122.4194)
+    assert mock_session.get.call_count == 1
+
+    mock_response.status = 200
+    mock_response.read = AsyncMock(return_value=json.dumps(REAL_API_RESPONSE).encode())
+    with freeze_time(reset):
+        result = await api.async_get_current_conditions(37.7749, -122.4194)
+    assert result.index == 4
+    assert mock_session.get.call_count == 2
+
+
+def test_quota_reset_midnight_pacific():
+    """Test the daily quota is assumed to reset at midnight Pacific time."""
+    now = datetime(2024, 4, 1, 12, 0, tzinfo=UTC)
+    assert _quota_reset(now, None) == datetime(2024, 4, 2, 7, 0, tzinfo=UTC)
 
 
 async def test_api_timeout(mock_session):
@@ -181,13 +328,124 @@ async def test_api_out_of_season_excluded_from_overall(mock_session):
     assert result.category == "Low"
 
 
-async def test_api_empty_response(mock_session):
-    """Test parsing when the API returns an empty object."""
+async def test_api_empty_day(mock_session):
+    """Test parsing when the API returns a day without pollen types."""
     api = GooglePollenApi(mock_session, "test_api_key")
-    _setup_mock_session(mock_session, {})
+    _setup_mock_session(mock_session, {"dailyInfo": [{}]})
 
     result = await api.async_get_current_conditions(37.7749, -122.4194)
 
     assert result.index is None
     assert result.category is None
     assert result.types == {}
+
+
+async def test_api_empty_response(mock_session):
+    """Test a response without days means the location is not covered."""
+    api = GooglePollenApi(mock_session, "test_api_key")
+    _setup_mock_session(mock_session, {})
+
+    with pytest.raises(GooglePollenUnsupportedRegionError):
+        await api.async_get_current_conditions(37.7749, -122.4194)
+
+
+async def test_api_forecast(mock_session):
+    """Test every day of the response is parsed into the forecast."""
+    api = GooglePollenApi(mock_session, "test_api_key")
+    response = {
+        "dailyInfo": [
+            REAL_API_RESPONSE["dailyInfo"][0],
+            {
+                "date": {"year": 2024, "month": 4, "day": 2},
+                "pollenTypeInfo": [
+                    {
+                        "code": "GRASS",
+                        "inSeason": True,
+                        "indexInfo": {"value": 3, "category": "Moderate"},
+                    },
+                ],
+            },
+        ]
+    }
+    _setup_mock_session(mock_session, response)
+
+    result = await api.async_get_current_conditions(37.7749, -122.4194)
+
+    assert mock_session.get.call_args[1]["params"]["days"] == 5
+    assert [day.date for day in result.forecast] == [date(2024, 4, 1), date(2024, 4, 2)]
+    assert result.forecast[0].index == result.index == 4
+    assert result.forecast[1].index == 3
+    assert result.forecast[1].category == "Moderate"
+    assert result.forecast[1].types == {"grass": {"value": 3, "category": "Moderate"}}
+
+
+async def test_api_parse_inline(mock_session):
+    """Test small responses are parsed on the event loop and timed."""
+    api = GooglePollenApi(mock_session, "test_api_key", offload_threshold=1_000_000)
+    _setup_mock_session(mock_session, REAL_API_RESPONSE)
+
+    result = await api.async_get_current_conditions(37.7749, -122.4194)
+
+    assert result.index == 4
+    assert api.parse_stats.parses == 1
+    assert api.parse_stats.offloaded == 0
+    assert api.parse_stats.loop_blocking_last > 0
+    assert api.parse_stats.loop_blocking_max == api.parse_stats.loop_blocking_last
+
+
+async def test_api_parse_offloaded(mock_session):
+    """Test responses above the threshold are parsed in the executor."""
+    api = GooglePollenApi(mock_session, "test_api_key", offload_threshold=0)
+    _setup_mock_session(mock_session, REAL_API_RESPONSE)
+
+    result = await api.async_get_current_conditions(37.7749, -122.4194)
+
+    assert result.index == 4
+    assert api.parse_stats.parses == 1
+    assert api.parse_stats.offloaded == 1
+    assert api.parse_stats.loop_blocking_total == 0
+
+
+async def test_api_unchanged_response(mock_session):
+    """Test a response identical to the previous one is not parsed again."""
+    api = GooglePollenApi(mock_session, "test_api_key")
+    mock_response = _setup_mock_session(mock_session, REAL_API_RESPONSE)
+
+    first = await api.async_get_current_conditions(37.7749, -122.4194)
+    assert api.parse_stats.unchanged_rate == 0
+
+    result = await api.async_get_current_conditions(
+        37.7749, -122.4194, ALL_POLLEN_TYPES, first
+    )
+    assert result is first
+    assert api.parse_stats.parses == 1
+    assert api.parse_stats.unchanged == 1
+    assert api.parse_stats.unchanged_rate == 0.5
+
+    # Another selection is parsed from the same response
+    selection = PollenSelection(types=frozenset({"grass"}))
+    result = await api.async_get_current_conditions(
+        37.7749, -122.4194, selection, first
+    )
+    assert result is not first
+    assert set(result.types) == {"grass"}
+
+    response = json.loads(json.dumps(REAL_API_RESPONSE))
+    response["dailyInfo"][0]["pollenTypeInfo"][0]["indexInfo"]["value"] = 3
+    mock_response.read.return_value = json.dumps(response).encode()
+    result = await api.async_get_current_conditions(
+        37.7749, -122.4194, selection, result
+    )
+    assert result.types["grass"]["value"] == 3
+    assert api.parse_stats.parses == 3
+    assert api.parse_stats.unchanged == 1
+
+
+async def test_api_invalid_json(mock_session):
+    """Test an undecodable response raises GooglePollenApiError."""
+    api = GooglePollenApi(mock_session, "test_api_key")
+    mock_response = _setup_mock_session(mock_session, {})
+    mock_response.read = AsyncMock(return_value=b"<html>")
+
+    with pytest.raises(GooglePollenApiError):
+        await api.async_get_current_conditions(37.7749, -122.4194)
@@ -0,0 +1,126 @@
+"""Test hedged requests of the Google Pollen API client."""
+
+import asyncio
+import json
+from collections.abc import Callable
+from unittest.mock import MagicMock
+
+from custom_components.google_pollen.google_pollen_api import (
+    HEDGE_MAX_RATE,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_WINDOW,
+    GooglePollenApi,
+)
+from custom_components.google_pollen.tracing import RequestTiming, RequestTracer
+from tests.test_google_pollen_api import REAL_API_RESPONSE
+
+BODY = json.dumps(REAL_API_RESPONSE).encode()
+
+
+class FutureTransport:
+    """Transport answering right away, or once the test resolves a request."""
+
+    def __init__(self) -> None:
+        """Initialize the transport."""
+        self.instant = True
+        self.pending: list[asyncio.Future[bytes]] = []
+        self.contexts: list[RequestTiming | None] = []
+
+    @property
+    def requests(self) -> int:
+        """Return the number of requests sent."""
+        return len(self.contexts)
+
+    async def async_request(self, params, headers, trace_request_ctx=None) -> bytes:
+        """Answer right away, or wait for the test."""
+        self.contexts.append(trace_request_ctx)
+        if self.instant:
+            return BODY
+        future: asyncio.Future[bytes] = asyncio.get_running_loop().create_future()
+        self.pending.append(future)
+        return await future
+
+
+async def _until(condition: Callable[[], bool]) -> None:
+    """Let the loop run until the condition holds."""
+    while not condition():
+        await asyncio.sleep(0)
+
+
+async def _learn_latency(api: GooglePollenApi, requests: int) -> None:
+    """Send requests answered right away."""
+    for _ in range(requests):
+        await api.async_get_current_conditions(37.7749, -122.4194)
+
+
+async def test_no_hedging_by_default() -> None:
+    """Test no duplicate is sent without the hedge option."""
+    transport = FutureTransport()
+    api = GooglePollenApi(MagicMock(), "test_api_key", transport=transport)
+    await _learn_latency(api, HEDGE_MIN_SAMPLES)
+    transport.instant = False
+
+    task = asyncio.create_task(api.async_get_current_conditions(37.7749, -122.4194))
+    await _until(lambda: bool(transport.pending))
+    transport.pending[0].set_result(BODY)
+    await task
+
+    assert transport.requests == HEDGE_MIN_SAMPLES + 1
+    assert api.hedge_stats.hedged == 0
+
+
+async def test_slow_request_hedged() -> None:
+    """Test a request slower than the learned p95 is raced by a duplicate."""
+    transport = FutureTransport()
+    on_request = MagicMock()
+    tracer = RequestTracer()
+    api = GooglePollenApi(
+        MagicMock(),
+        "test_api_key",
+        on_request=on_request,
+        tracer=tracer,
+        transport=transport,
+        hedge=True,
+    )
+    await _learn_latency(api, HEDGE_MIN_SAMPLES)
+    assert api.hedge_stats.hedged == 0
+    transport.instant = False
+
+    task = asyncio.create_task(api.async_get_current_conditions(37.7749, -122.4194))
+    await _until(lambda: len(transport.pending) == 2)
+    primary, hedge = transport.pending
+    hedge.set_result(BODY)
+    result = await task
+
+    assert result.index == 4
+    assert primary.cancelled()
+    assert transport.requests == HEDGE_MIN_SAMPLES + 2
+    assert on_request.call_count == HEDGE_MIN_SAMPLES + 2
+    assert api.hedge_stats.hedged == 1
+    assert api.hedge_stats.hedge_wins == 1
+    # Each request is traced on its own, only the winner is recorded
+    primary_timing, hedge_timing = transport.contexts[-2:]
+    assert primary_timing is not hedge_timing
+    assert primary_timing.end is None
+    assert hedge_timing.end is not None
+
+
+async def test_hedge_rate_capped() -> None:
+    """Test no more duplicates are sent than the cap allows."""
+    transport = FutureTransport()
+    api = GooglePollenApi(MagicMock(), "test_api_key", transport=transport, hedge=True)
+    await _learn_latency(api, HEDGE_WINDOW)
+    transport.instant = False
+    max_hedged = HEDGE_MAX_RATE * HEDGE_WINDOW
+
+    for _ in range(10):
+        sent = 2 if api.hedge_stats.hedged < max_hedged else 1
+        task = asyncio.create_task(api.async_get_current_conditions(37.7749, -122.4194))
+        await _until(lambda: len(transport.pending) == sent)
+        # The original request answers first
+        transport.pending[0].set_result(BODY)
+        await task
+        transport.pending.clear()
+
+    assert api.hedge_stats.hedged == max_hedged
+    assert api.hedge_stats.hedge_wins == 0
@@ -0,0 +1,50 @@
+"""Test the import time of the Google Pollen integration."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+# Cold import budget in seconds for the integration and its platforms, on top
+# of the Home Assistant modules that are already loaded when it is set up.
+IMPORT_TIME_BUDGET = 0.25
+
+_MEASURE_SCRIPT = """
+import json
+import sys
+import time
+
+import homeassistant.components.sensor
+import homeassistant.config_entries
+import homeassistant.helpers.aiohttp_client
+import homeassistant.helpers.config_validation
+import homeassistant.helpers.storage
+import homeassistant.helpers.update_coordinator
+
+start = time.perf_counter()
+import custom_components.google_pollen
+import custom_components.google_pollen.config_flow
+import custom_components.google_pollen.sensor
+elapsed = time.perf_counter() - start
+
+print(json.dumps({"elapsed": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def test_cold_import_time() -> None:
+    """Test a cold import of the integration stays within its budget."""
+    result = subprocess.run(
+        [sys.executable, "-c", _MEASURE_SCRIPT],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).parents[1],
+        text=True,
+    )
+    measurement = json.loads(result.stdout)
+
+    # The recorder and SQLAlchemy are only imported once statistics are written
+    assert "sqlalchemy" not in measurement["modules"]
+    assert measurement["elapsed"] < IMPORT_TIME_BUDGET, (
+        f"Importing the integration took {measurement['elapsed']:.3f}s, "
+        f"budget is {IMPORT_TIME_BUDGET}s"
+    )
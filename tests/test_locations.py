@@ -0,0 +1,83 @@
+"""Test the locations shared across Google Pollen config entries."""
+
+from datetime import timedelta
+
+from homeassistant.config_entries import ConfigSubentryData
+from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.google_pollen.const import DOMAIN
+from custom_components.google_pollen.locations import DATA_LOCATIONS
+
+
+def _add_entry(hass: HomeAssistant, api_key: str, lat: float) -> MockConfigEntry:
+    """Add a config entry with one location."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: api_key},
+        unique_id=api_key,
+        subentries_data=[
+            ConfigSubentryData(
+                data={CONF_LATITUDE: lat, CONF_LONGITUDE: -122.4194},
+                subentry_id=f"{api_key}_location",
+                subentry_type="location",
+                title="Home",
+                unique_id=None,
+            )
+        ],
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+async def test_entries_share_location(
+    hass: HomeAssistant, mock_google_pollen_api_class
+) -> None:
+    """Test entries monitoring the same coordinates fetch them once."""
+    entry_1 = _add_entry(hass, "api_key_1", 37.7749)
+    entry_2 = _add_entry(hass, "api_key_2", 37.77491)
+    assert await hass.config_entries.async_setup(entry_1.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry_2.runtime_data is not None
+    locations = hass.data[DATA_LOCATIONS]
+    assert len(locations) == 1
+    assert mock_google_pollen_api_class.async_get_current_conditions.call_count == 1
+    coordinator_1 = entry_1.runtime_data.subentries_runtime_data["api_key_1_location"]
+    coordinator_2 = entry_2.runtime_data.subentries_runtime_data["api_key_2_location"]
+    assert coordinator_1.shared_location is coordinator_2.shared_location
+    assert coordinator_2.data is coordinator_1.data
+
+    assert await hass.config_entries.async_unload(entry_1.entry_id)
+    assert len(locations) == 1
+    assert coordinator_1.shared_location is None
+    assert await hass.config_entries.async_unload(entry_2.entry_id)
+    assert len(locations) == 0
+
+
+async def test_fetch_updates_all_subscribers(
+    hass: HomeAssistant, mock_google_pollen_api_class
+) -> None:
+    """Test a fetch for one entry refreshes the other entries."""
+    entry_1 = _add_entry(hass, "api_key_1", 37.7749)
+    entry_2 = _add_entry(hass, "api_key_2", 37.77491)
+    entry_3 = _add_entry(hass, "api_key_3", 52.37)
+    assert await hass.config_entries.async_setup(entry_1.entry_id)
+    await hass.async_block_till_done()
+    assert len(hass.data[DATA_LOCATIONS]) == 2
+    assert mock_google_pollen_api_class.async_get_current_conditions.call_count == 2
+
+    coordinator_1 = entry_1.runtime_data.subentries_runtime_data["api_key_1_location"]
+    coordinator_2 = entry_2.runtime_data.subentries_runtime_data["api_key_2_location"]
+    coordinator_3 = entry_3.runtime_data.subentries_runtime_data["api_key_3_location"]
+    coordinator_1.shared_location.fetched_at -= timedelta(hours=6)
+    updated_2 = coordinator_2.last_update_success_time
+    updated_3 = coordinator_3.last_update_success_time
+
+    await coordinator_1.async_refresh()
+    await hass.async_block_till_done()
+
+    assert mock_google_pollen_api_class.async_get_current_conditions.call_count == 3
+    assert coordinator_2.last_update_success_time > updated_2
+    assert coordinator_3.last_update_success_time == updated_3
@@ -0,0 +1,254 @@
+"""Memory and time scaling of the Google Pollen integration.
+
+The number of locations is taken from GOOGLE_POLLEN_SCALING_LOCATIONS, a comma
+separated list of counts from 2 to 5000, e.g.
+
+    GOOGLE_POLLEN_SCALING_LOCATIONS=100,1000,5000 pytest tests/test_scaling.py -s
+
+The report is printed for every count, and written as JSON to the path in
+GOOGLE_POLLEN_SCALING_REPORT when it is set. The memory a location adds is
+measured between half the count and the full count, which leaves out what
+an entry costs however many locations it has, and rises with the count when
+memory grows faster than the number of locations.
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.config_entries import ConfigSubentryData
+from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.google_pollen.const import DOMAIN
+from custom_components.google_pollen.google_pollen_api import _parse_payload
+from tests.test_google_pollen_api import REAL_API_RESPONSE
+
+MAX_LOCATIONS = 5000
+DEFAULT_LOCATIONS = "10"
+
+# Steady-state memory a location may add, sensors and registry entries included,
+# 55 to 75 KB were measured for counts from 10 to 500
+LOCATION_MEMORY_BUDGET = 96 * 1024
+
+_PACKAGE_DIR = Path(__file__).parents[1] / "custom_components" / DOMAIN
+
+# Files whose allocations are attributed to each per-location object
+_COMPONENTS = {
+    "coordinator": "coordinator.py",
+    "sensor_entity": "sensor.py",
+    "conditions_data": "google_pollen_api.py",
+}
+
+
+def _location_counts() -> list[int]:
+    """Return the location counts to measure."""
+    counts = [
+        int(count)
+        for count in os.environ.get(
+            "GOOGLE_POLLEN_SCALING_LOCATIONS", DEFAULT_LOCATIONS
+        ).split(",")
+    ]
+    if any(not 1 < count <= MAX_LOCATIONS for count in counts):
+        raise ValueError(f"Location counts must be between 2 and {MAX_LOCATIONS}")
+    return counts
+
+
+@dataclass
+class ScalingReport:
+    """Measurements of one setup and teardown."""
+
+    locations: int
+    setup_seconds: float
+    teardown_seconds: float
+    peak_bytes: int
+    steady_bytes: int
+    per_location_bytes: float
+    per_added_location_bytes: float
+    per_coordinator_bytes: float
+    per_sensor_entity_bytes: float
+    per_conditions_data_bytes: float
+
+    def format(self) -> str:
+        """Return the report as text."""
+        return "\n".join(
+            (
+                f"{self.locations} locations:",
+                f"  setup            {self.setup_seconds * 1000:10.1f} ms",
+                f"  teardown         {self.teardown_seconds * 1000:10.1f} ms",
+                f"  peak memory      {self.peak_bytes / 1024:10.1f} KiB",
+                f"  steady memory    {self.steady_bytes / 1024:10.1f} KiB",
+                f"  per location     {self.per_location_bytes:10.0f} B",
+                f"  per added        {self.per_added_location_bytes:10.0f} B",
+                f"  per coordinator  {self.per_coordinator_bytes:10.0f} B",
+                f"  per entity       {self.per_sensor_entity_bytes:10.0f} B",
+                f"  per data         {self.per_conditions_data_bytes:10.0f} B",
+            )
+        )
+
+
+def _component_bytes(
+    snapshot: tracemalloc.Snapshot, baseline: tracemalloc.Snapshot
+) -> dict[str, int]:
+    """Return the memory still allocated by each integration module.
+
+    Allocations are attributed to the innermost frame in the integration, so
+    what Home Assistant allocates on behalf of a sensor counts for sensor.py.
+    """
+    sizes: dict[str, int] = defaultdict(int)
+    for stat in snapshot.compare_to(baseline, "traceback"):
+        for frame in reversed(stat.traceback):
+            path = Path(frame.filename)
+            if path.parent == _PACKAGE_DIR:
+                sizes[path.name] += stat.size_diff
+                break
+    return sizes
+
+
+def _mock_api() -> MagicMock:
+    """Return a client mock that parses a new response for every location."""
+    body = json.dumps(REAL_API_RESPONSE).encode()
+    api = MagicMock()
+    api.async_get_current_conditions = AsyncMock(
+        side_effect=lambda lat, lon, selection, previous: _parse_payload(
+            body, selection
+        )
+    )
+    return api
+
+
+def _create_entry(hass: HomeAssistant, api_key: str, locations: int) -> MockConfigEntry:
+    """Add an entry with the given number of locations."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: api_key},
+        unique_id=api_key,
+        subentries_data=[
+            ConfigSubentryData(
+                data={
+                    CONF_LATITUDE: -60 + index // 360 * 0.5,
+                    CONF_LONGITUDE: -180 + index % 360,
+                },
+                subentry_id=f"{api_key}_location_{index}",
+                subentry_type="location",
+                title=f"Location {index}",
+                unique_id=None,
+            )
+            for index in range(locations)
+        ],
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+async def _async_trace_setup(
+    hass: HomeAssistant, entry: MockConfigEntry
+) -> tuple[tracemalloc.Snapshot, tracemalloc.Snapshot, int, int]:
+    """Set up and tear down an entry while memory allocations are traced.
+
+    Return the snapshots before and after the setup, the peak memory and
+    the number of sensors of the locations.
+    """
+    # The test harness keeps a copy of whatever the registries and other
+    # stores write, which would count for the entry traced at the time
+    with patch.object(Store, "_async_write_data"):
+        tracemalloc.start(25)
+        try:
+            baseline = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            assert await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            # The sensors of the locations, trends and plants included
+            sensor_entities = sum(
+                entity.config_subentry_id is not None
+                for entity in er.async_entries_for_config_entry(
+                    er.async_get(hass), entry.entry_id
+                )
+            )
+            assert await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_block_till_done()
+        finally:
+            tracemalloc.stop()
+    return baseline, snapshot, peak_bytes, sensor_entities
+
+
+def _steady_bytes(
+    snapshot: tracemalloc.Snapshot, baseline: tracemalloc.Snapshot
+) -> int:
+    """Return the memory still allocated since the baseline."""
+    return sum(stat.size_diff for stat in snapshot.compare_to(baseline, "filename"))
+
+
+async def _async_measure(hass: HomeAssistant, locations: int) -> ScalingReport:
+    """Set up and tear down an entry with the given number of locations."""
+    with patch(
+        "custom_components.google_pollen.GooglePollenApi", return_value=_mock_api()
+    ):
+        # Time a first entry without tracing, which also keeps the platform,
+        # translations and other one-time costs out of the memory figures
+        entry = _create_entry(hass, "timed_api_key", locations)
+        start = time.perf_counter()
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        setup_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
+        teardown_seconds = time.perf_counter() - start
+
+        # The entities of the earlier entries stay registered, the
+        # subentries of these entries have other IDs
+        half = locations // 2
+        baseline, snapshot, _, _ = await _async_trace_setup(
+            hass, _create_entry(hass, "reference_api_key", half)
+        )
+        half_bytes = _steady_bytes(snapshot, baseline)
+        entry = _create_entry(hass, "traced_api_key", locations)
+        baseline, snapshot, peak_bytes, sensor_entities = await _async_trace_setup(
+            hass, entry
+        )
+
+    steady_bytes = _steady_bytes(snapshot, baseline)
+    components = _component_bytes(snapshot, baseline)
+    return ScalingReport(
+        locations=locations,
+        setup_seconds=setup_seconds,
+        teardown_seconds=teardown_seconds,
+        peak_bytes=peak_bytes,
+        steady_bytes=steady_bytes,
+        per_location_bytes=steady_bytes / locations,
+        per_added_location_bytes=(steady_bytes - half_bytes) / (locations - half),
+        per_coordinator_bytes=components[_COMPONENTS["coordinator"]] / locations,
+        per_sensor_entity_bytes=components[_COMPONENTS["sensor_entity"]]
+        / sensor_entities,
+        per_conditions_data_bytes=components[_COMPONENTS["conditions_data"]]
+        / locations,
+    )
+
+
+@pytest.mark.parametrize("locations", _location_counts())
+async def test_location_scaling(hass: HomeAssistant, locations: int) -> None:
+    """Test the memory each location adds stays within its budget."""
+    report = await _async_measure(hass, locations)
+    print(report.format())
+    if path := os.environ.get("GOOGLE_POLLEN_SCALING_REPORT"):
+        reports = []
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                reports = json.load(file)
+        reports.append(asdict(report))
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(reports, file, indent=2)
+
+    assert report.per_added_location_bytes < LOCATION_MEMORY_BUDGET, report.format()
@@ -1,10 +1,13 @@
 """Test the Google Pollen sensor platform."""
 
+from datetime import timedelta
 
-
-from homeassistant.const import STATE_UNKNOWN
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
 
 
 async def test_sensor_setup(
@@ -28,7 +31,9 @@ async def test_sensor_setup(
 
     # Get all entities for the integration
     entities = er.async_entries_for_config_entry(entity_registry, config_entry.entry_id)
-    assert len(entities) == 5  # pollen_index, pollen_category, tree, grass, weed
+    # pollen_index, its trend, pollen_category, tree, grass, weed and three API
+    # usage sensors
+    assert len(entities) == 9
 
     # Get entity IDs
     entity_ids = [entity.entity_id for entity in entities]
@@ -36,6 +41,8 @@ async def test_sensor_setup(
     # Verify sensors exist and have correct values
     for entity_id in entity_ids:
         state = hass.states.get(entity_id)
+        if entity_id.endswith("_trend"):
+            continue
         assert state is not None
         if "pollen_index" in entity_id:
             assert state.state == "3"
@@ -81,8 +88,9 @@ async def test_sensor_missing_data(
     entity_registry = er.async_get(hass)
     entities = er.async_entries_for_config_entry(entity_registry, config_entry.entry_id)
 
-    # Only pollen_index and pollen_category should exist
-    assert len(entities) == 2
+    # Only pollen_index, its trend, pollen_category and the API usage sensors
+    # should exist
+    assert len(entities) == 6
 
     # Check that sensors have unknown state
     for entity in entities:
@@ -113,7 +121,170 @@ async def test_sensor_attributes(
     entities = er.async_entries_for_config_entry(entity_registry, config_entry.entry_id)
     assert len(entities) > 0
 
-    # Check attribution on first entity
-    state = hass.states.get(entities[0].entity_id)
+    # Check attribution on a pollen entity
+    entity_id = next(e.entity_id for e in entities if "pollen_index" in e.entity_id)
+    state = hass.states.get(entity_id)
     assert state is not None
     assert state.attributes.get("attribution") == "Data provided by Google Pollen"
+
+
+async def test_usage_sensors(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_google_pollen_api_class,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test the API usage sensors follow the ledger."""
+    from custom_components.google_pollen.usage import DATA_USAGE_LEDGER, usage_key_id
+    from tests.conftest import create_mock_entry_with_subentry
+
+    config_entry, _ = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    entity_id = entity_registry.async_get_entity_id(
+        "sensor",
+        "google_pollen",
+        f"api_calls_today_{usage_key_id(mock_config_entry_data['api_key'])}",
+    )
+    assert entity_id is not None
+    assert hass.states.get(entity_id).state == "0"
+
+    hass.data[DATA_USAGE_LEDGER].async_record(
+        usage_key_id(mock_config_entry_data["api_key"]), 37.7749, -122.4194
+    )
+    await hass.async_block_till_done()
+
+    assert hass.states.get(entity_id).state == "1"
+
+    # The count starts over at midnight without a call
+    midnight = dt_util.start_of_local_day(dt_util.now() + timedelta(days=1))
+    freezer.move_to(midnight)
+    async_fire_time_changed(hass, midnight)
+    await hass.async_block_till_done()
+
+    assert hass.states.get(entity_id).state == "0"
+
+
+async def test_sensors_follow_pollen_types(
+    hass: HomeAssistant,
+    mock_google_pollen_api_class,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test sensors are added for pollen types appearing after setup."""
+    from custom_components.google_pollen.google_pollen_api import (
+        PollenCurrentConditionsData,
+    )
+    from tests.conftest import create_mock_entry_with_subentry
+
+    mock_api = mock_google_pollen_api_class.async_get_current_conditions
+    mock_api.return_value = PollenCurrentConditionsData(
+        index=1, category="Low", types={"grass": {"value": 1, "category": "Low"}}
+    )
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    entity_registry = er.async_get(hass)
+    assert len(er.async_entries_for_config_entry(entity_registry, "test_entry_id")) == 7
+    assert hass.states.get("sensor.test_location_tree_pollen") is None
+
+    mock_api.return_value = PollenCurrentConditionsData(
+        index=4, category="High", types={"tree": {"value": 4, "category": "High"}}
+    )
+    coordinator = config_entry.runtime_data.subentries_runtime_data[subentry_id]
+    coordinator.shared_location.fetched_at = None
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert len(er.async_entries_for_config_entry(entity_registry, "test_entry_id")) == 8
+    assert hass.states.get("sensor.test_location_tree_pollen").state == "4"
+    assert (
+        hass.states.get("sensor.test_location_grass_pollen").state == STATE_UNAVAILABLE
+    )
+    assert mock_api.call_count == 2
+
+
+async def test_sensors_follow_selection(
+    hass: HomeAssistant, mock_google_pollen_api_class, mock_config_entry_data
+) -> None:
+    """Test only the selected pollen types and plants get sensors."""
+    from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE
+
+    from custom_components.google_pollen.const import (
+        CONF_PLANTS,
+        CONF_POLLEN_TYPES,
+        DOMAIN,
+    )
+    from custom_components.google_pollen.google_pollen_api import (
+        PollenCurrentConditionsData,
+        PollenSelection,
+    )
+    from tests.conftest import create_mock_entry_with_subentry
+
+    mock_api = mock_google_pollen_api_class.async_get_current_conditions
+    mock_api.return_value = PollenCurrentConditionsData(
+        index=4,
+        category="High",
+        types={"grass": {"value": 1, "category": "Low"}},
+        plants={"birch": {"name": "Birch", "value": 4, "category": "High"}},
+    )
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass,
+        mock_config_entry_data,
+        {
+            CONF_LATITUDE: 37.7749,
+            CONF_LONGITUDE: -122.4194,
+            CONF_POLLEN_TYPES: ["grass"],
+            CONF_PLANTS: ["birch"],
+        },
+    )
+    entity_registry = er.async_get(hass)
+    stale = entity_registry.async_get_or_create(
+        "sensor", DOMAIN, f"tree_pollen_{subentry_id}"
+    )
+    # Registered before the sensors were identified by their subentry
+    replaced_trend = entity_registry.async_get_or_create(
+        "sensor",
+        DOMAIN,
+        "grass_pollen_trend_37.7749_-122.4194",
+        config_entry=config_entry,
+        config_subentry_id=subentry_id,
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    mock_api.assert_awaited_once_with(
+        37.7749,
+        -122.4194,
+        PollenSelection(types=frozenset({"grass"}), plants=frozenset({"birch"})),
+        None,
+    )
+    assert entity_registry.async_get(stale.entity_id) is None
+    assert entity_registry.async_get(replaced_trend.entity_id) is None
+    assert hass.states.get("sensor.test_location_birch_pollen").state == "4"
+    assert {
+        entity.unique_id
+        for entity in er.async_entries_for_config_entry(
+            entity_registry, "test_entry_id"
+        )
+        if entity.config_subentry_id is not None
+    } == {
+        "pollen_index_test_subentry_id",
+        "pollen_index_trend_test_subentry_id",
+        "pollen_category_test_subentry_id",
+        "grass_pollen_test_subentry_id",
+        "birch_pollen_test_subentry_id",
+    }
+    # The trends of the selected types are attributes of the trend sensor
+    trend = hass.states.get("sensor.test_location_pollen_index_trend")
+    assert trend.attributes["grass_trend"] is None
+    assert "tree_trend" not in trend.attributes
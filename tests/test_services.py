@@ -0,0 +1,459 @@
+"""Test the Google Pollen service actions."""
+
+import itertools
+import json
+import pstats
+from dataclasses import replace
+from datetime import date, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.config_entries import ConfigSubentryData
+from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.setup import async_setup_component
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components import google_pollen
+from custom_components.google_pollen.const import (
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_CYCLES,
+    ATTR_FILENAME,
+    DOMAIN,
+)
+from custom_components.google_pollen.google_pollen_api import (
+    GooglePollenApiError,
+    GooglePollenUnsupportedRegionError,
+    PollenCurrentConditionsData,
+    PollenForecastDay,
+)
+from custom_components.google_pollen.services import (
+    SERVICE_EXPORT,
+    SERVICE_GET_FORECAST,
+    SERVICE_IMPORT_LOCATIONS,
+    SERVICE_PROFILE,
+)
+
+FORECAST_DATA = PollenCurrentConditionsData(
+    index=3,
+    category="High",
+    types={"tree": {"value": 3, "category": "High"}},
+    forecast=[
+        PollenForecastDay(
+            date=date(2024, 4, 1),
+            index=3,
+            category="High",
+            types={"tree": {"value": 3, "category": "High"}},
+        )
+    ],
+)
+
+
+async def test_get_forecast_from_cache(
+    hass: HomeAssistant,
+    mock_google_pollen_api_class,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test configured locations are answered from the coordinator data."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    mock_google_pollen_api_class.async_get_current_conditions.return_value = (
+        FORECAST_DATA
+    )
+    config_entry, _ = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert mock_google_pollen_api_class.async_get_current_conditions.call_count == 1
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_GET_FORECAST,
+        {ATTR_CONFIG_ENTRY_ID: config_entry.entry_id},
+        blocking=True,
+        return_response=True,
+    )
+
+    assert mock_google_pollen_api_class.async_get_current_conditions.call_count == 1
+    assert response == {
+        "locations": [
+            {
+                "name": "Test Location",
+                CONF_LATITUDE: 37.7749,
+                CONF_LONGITUDE: -122.4194,
+                "forecast": [
+                    {
+                        "date": "2024-04-01",
+                        "index": 3,
+                        "category": "High",
+                        "types": {"tree": {"value": 3, "category": "High"}},
+                    }
+                ],
+            }
+        ]
+    }
+
+
+async def test_get_forecast_coordinates(
+    hass: HomeAssistant,
+    mock_google_pollen_api_class,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test unknown coordinates are fetched and known ones served from cache."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    mock_google_pollen_api_class.async_get_current_conditions.return_value = (
+        FORECAST_DATA
+    )
+    config_entry, _ = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_GET_FORECAST,
+        {
+            ATTR_CONFIG_ENTRY_ID: config_entry.entry_id,
+            "locations": [
+                mock_subentry_data,
+                {CONF_LATITUDE: 52.37, CONF_LONGITUDE: 4.89},
+                {CONF_LATITUDE: 52.37, CONF_LONGITUDE: 4.89},
+            ],
+        },
+        blocking=True,
+        return_response=True,
+    )
+
+    mock_google_pollen_api_class.async_get_current_conditions.assert_called_with(
+        52.37, 4.89
+    )
+    assert mock_google_pollen_api_class.async_get_current_conditions.call_count == 2
+    assert [location["name"] for location in response["locations"]] == [
+        "Test Location",
+        None,
+    ]
+
+
+async def test_get_forecast_refresh_and_errors(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_google_pollen_api_class,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test outdated locations are refreshed and failures kept per location."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    mock_get = mock_google_pollen_api_class.async_get_current_conditions
+    mock_get.return_value = FORECAST_DATA
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = config_entry.runtime_data.subentries_runtime_data[subentry_id]
+
+    freezer.tick(coordinator.update_interval + timedelta(minutes=1))
+    refreshed = replace(FORECAST_DATA, index=4)
+
+    async def _get(lat, lon, *args):
+        if lat == 52.37:
+            raise GooglePollenApiError("Invalid response")
+        return refreshed
+
+    mock_get.side_effect = _get
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_GET_FORECAST,
+        {
+            ATTR_CONFIG_ENTRY_ID: config_entry.entry_id,
+            "locations": [
+                mock_subentry_data,
+                {CONF_LATITUDE: 52.37, CONF_LONGITUDE: 4.89},
+            ],
+        },
+        blocking=True,
+        return_response=True,
+    )
+
+    assert coordinator.data is refreshed
+    assert coordinator.last_update_success_time == dt_util.utcnow()
+    assert "forecast" in response["locations"][0]
+    assert response["locations"][1] == {
+        "name": None,
+        CONF_LATITUDE: 52.37,
+        CONF_LONGITUDE: 4.89,
+        "error": "Invalid response",
+    }
+
+
+async def test_get_forecast_invalid_entry(hass: HomeAssistant) -> None:
+    """Test an unknown config entry is rejected."""
+    assert await async_setup_component(hass, DOMAIN, {})
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_GET_FORECAST,
+            {ATTR_CONFIG_ENTRY_ID: "missing"},
+            blocking=True,
+            return_response=True,
+        )
+
+
+async def test_profile(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    tmp_path,
+    mock_google_pollen_api_class,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test the next scheduled refreshes are profiled into the config directory."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    hass.config.config_dir = str(tmp_path)
+    # Every refresh returns new data, so the sensors write their states
+    indexes = itertools.count()
+    mock_get = mock_google_pollen_api_class.async_get_current_conditions
+    mock_get.side_effect = lambda *args: PollenCurrentConditionsData(
+        index=next(indexes), category="Low", types={}
+    )
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = config_entry.runtime_data.subentries_runtime_data[subentry_id]
+
+    data = {ATTR_CONFIG_ENTRY_ID: config_entry.entry_id, ATTR_CYCLES: 2}
+    response = await hass.services.async_call(
+        DOMAIN, SERVICE_PROFILE, data, blocking=True, return_response=True
+    )
+    profile = Path(response["profile"])
+    assert profile.parent == tmp_path
+    # Nothing is fetched for the profile
+    assert mock_get.call_count == 1
+    assert not profile.exists()
+    with pytest.raises(HomeAssistantError) as exc_info:
+        await hass.services.async_call(DOMAIN, SERVICE_PROFILE, data, blocking=True)
+    assert exc_info.value.translation_key == "profiler_busy"
+
+    for _ in range(2):
+        freezer.tick(coordinator.update_interval + timedelta(minutes=1))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    assert mock_get.call_count == 3
+    assert coordinator.refresh_profiler is None
+    # The sensor state writes triggered by the refreshes are included
+    functions = {name for _, _, name in pstats.Stats(str(profile)).stats}
+    assert "async_write_ha_state" in functions
+    summary = Path(response["summary"]).read_text(encoding="utf-8")
+    assert "functions by cumulative time" in summary
+
+
+async def test_profile_stopped_on_unload(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    tmp_path,
+    mock_google_pollen_api_class,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test the refreshes profiled before the entry unloads are written."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    hass.config.config_dir = str(tmp_path)
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    data = {ATTR_CONFIG_ENTRY_ID: config_entry.entry_id, ATTR_CYCLES: 2}
+
+    # Nothing is written when no refresh was profiled
+    await hass.services.async_call(DOMAIN, SERVICE_PROFILE, data, blocking=True)
+    coordinator = config_entry.runtime_data.subentries_runtime_data[subentry_id]
+    assert await hass.config_entries.async_reload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert coordinator.refresh_profiler is None
+    assert not list(tmp_path.glob("*.prof"))
+
+    freezer.tick(timedelta(seconds=1))
+    response = await hass.services.async_call(
+        DOMAIN, SERVICE_PROFILE, data, blocking=True, return_response=True
+    )
+    coordinator = config_entry.runtime_data.subentries_runtime_data[subentry_id]
+    freezer.tick(coordinator.update_interval + timedelta(minutes=1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert not Path(response["profile"]).exists()
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert coordinator.refresh_profiler is None
+    assert Path(response["profile"]).exists()
+
+
+async def test_export(
+    hass: HomeAssistant,
+    tmp_path,
+    mock_google_pollen_api_class,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test the data of the locations is exported as NDJSON."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    hass.config.config_dir = str(tmp_path)
+    mock_google_pollen_api_class.async_get_current_conditions.return_value = (
+        FORECAST_DATA
+    )
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_EXPORT,
+        {ATTR_FILENAME: "pollen.ndjson"},
+        blocking=True,
+        return_response=True,
+    )
+
+    assert response == {"path": str(tmp_path / "pollen.ndjson"), "locations": 1}
+    lines = (tmp_path / "pollen.ndjson").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record["subentry_id"] == subentry_id
+    assert record["name"] == "Test Location"
+    assert record["index"] == 3
+    assert record["forecast"][0]["date"] == "2024-04-01"
+    assert not list(tmp_path.glob("*.tmp"))
+    assert mock_google_pollen_api_class.async_get_current_conditions.call_count == 1
+
+    # A failed export leaves no temporary file behind
+    with (
+        patch(
+            "custom_components.google_pollen.services.os.replace",
+            side_effect=OSError("Disk full"),
+        ),
+        pytest.raises(HomeAssistantError),
+    ):
+        await hass.services.async_call(
+            DOMAIN, SERVICE_EXPORT, {ATTR_FILENAME: "pollen.ndjson"}, blocking=True
+        )
+    assert not list(tmp_path.glob("*.tmp"))
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_EXPORT,
+            {ATTR_FILENAME: "../pollen.ndjson"},
+            blocking=True,
+        )
+
+
+async def test_import_locations(
+    hass: HomeAssistant,
+    tmp_path,
+    mock_google_pollen_api_class,
+) -> None:
+    """Test locations are deduplicated, validated and added with one reload."""
+    hass.config.config_dir = str(tmp_path)
+    (tmp_path / "locations.csv").write_text(
+        "name,latitude,longitude\nUtrecht,52.09,5.12\nRotterdam,51.92,4.48\n",
+        encoding="utf-8",
+    )
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        unique_id="test_api_key",
+        subentries_data=[
+            ConfigSubentryData(
+                data={CONF_LATITUDE: 37.7749, CONF_LONGITUDE: -122.4194},
+                subentry_id="location_subentry",
+                subentry_type="location",
+                title="Test Location",
+                unique_id=None,
+            )
+        ],
+    )
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    mock_get = mock_google_pollen_api_class.async_get_current_conditions
+    data = mock_get.return_value
+
+    def _get_conditions(lat, lon, selection=None, previous=None):
+        if lat == 51.92:
+            raise GooglePollenUnsupportedRegionError("No data")
+        return data
+
+    mock_get.side_effect = _get_conditions
+    mock_get.reset_mock()
+
+    with patch(
+        "custom_components.google_pollen.async_setup_entry",
+        wraps=google_pollen.async_setup_entry,
+    ) as mock_setup_entry:
+        response = await hass.services.async_call(
+            DOMAIN,
+            SERVICE_IMPORT_LOCATIONS,
+            {
+                ATTR_CONFIG_ENTRY_ID: config_entry.entry_id,
+                "locations": [
+                    {"name": "Amsterdam", "latitude": 52.37, "longitude": 4.89},
+                    {"name": "Home", "latitude": 37.7749, "longitude": -122.4194},
+                    {"name": "amsterdam", "latitude": 52.0, "longitude": 4.0},
+                ],
+                ATTR_FILENAME: "locations.csv",
+            },
+            blocking=True,
+            return_response=True,
+        )
+        await hass.async_block_till_done()
+
+    assert response == {
+        "added": ["Amsterdam", "Utrecht"],
+        "skipped": [
+            {"name": "Home", "reason": "location_already_configured"},
+            {"name": "amsterdam", "reason": "location_name_already_configured"},
+            {"name": "Rotterdam", "reason": "unsupported_region"},
+        ],
+    }
+    assert mock_setup_entry.call_count == 1
+    assert sorted(subentry.title for subentry in config_entry.subentries.values()) == [
+        "Amsterdam",
+        "Test Location",
+        "Utrecht",
+    ]
+    assert len(config_entry.runtime_data.subentries_runtime_data) == 3
+    # The reload is served the data of the validation and of the entry
+    assert mock_get.call_count == 3
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_IMPORT_LOCATIONS,
+            {
+                ATTR_CONFIG_ENTRY_ID: config_entry.entry_id,
+                "locations": [{"name": "Nowhere", "latitude": 123}],
+            },
+            blocking=True,
+        )
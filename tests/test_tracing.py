@@ -0,0 +1,125 @@
+"""Test the Google Pollen request tracing."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+from homeassistant.config_entries import ConfigSubentryData
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components import google_pollen
+from custom_components.google_pollen.const import CONF_TRACE_REQUESTS, DOMAIN
+from custom_components.google_pollen.google_pollen_api import GooglePollenApi
+from custom_components.google_pollen.tracing import (
+    RequestTiming,
+    RequestTracer,
+    RollingPercentiles,
+)
+
+
+def test_rolling_percentiles() -> None:
+    """Test percentiles only cover the most recent samples."""
+    percentiles = RollingPercentiles(window=10)
+    assert percentiles.percentile(95) is None
+
+    for value in range(1, 21):
+        percentiles.add(float(value))
+
+    assert len(percentiles) == 10
+    assert percentiles.percentile(50) == 15
+    assert percentiles.percentile(95) == 20
+    assert percentiles.percentile(0) == 11
+
+
+def test_request_timing_phases() -> None:
+    """Test the phases are derived from the signal timestamps."""
+    timing = RequestTiming(
+        start=0.0,
+        queued_start=0.0,
+        queued_end=0.5,
+        dns_start=0.5,
+        dns_end=0.75,
+        connect_start=0.5,
+        connect_end=1.0,
+        headers_sent=1.0,
+        response_start=2.0,
+        end=2.5,
+    )
+
+    assert timing.phases() == {
+        "connection_queue": 0.5,
+        "dns": 0.25,
+        "connect_tls": 0.25,
+        "time_to_first_byte": 1.0,
+        "body_read": 0.5,
+        "total": 2.5,
+    }
+
+
+def test_reused_connection_phases() -> None:
+    """Test a request on a pooled connection has no connect phases."""
+    timing = RequestTiming(start=0.0, headers_sent=0.0, response_start=1.0, end=1.0)
+
+    assert set(timing.phases()) == {"time_to_first_byte", "body_read", "total"}
+
+
+async def test_api_records_timing() -> None:
+    """Test the client passes a timing to the session and records it."""
+    tracer = RequestTracer()
+    session = MagicMock(spec=aiohttp.ClientSession)
+    response = MagicMock()
+    response.status = 200
+    response.read = AsyncMock(return_value=b'{"dailyInfo": [{}]}')
+    session.get.return_value.__aenter__ = AsyncMock(return_value=response)
+    session.get.return_value.__aexit__ = AsyncMock(return_value=None)
+    api = GooglePollenApi(session, "test_api_key", tracer=tracer)
+
+    await api.async_get_current_conditions(37.7749, -122.4194)
+
+    timing = session.get.call_args[1]["trace_request_ctx"]
+    assert isinstance(timing, RequestTiming)
+    assert timing.end is not None
+    # Trace signals do not fire on a mocked session, so no phase is complete
+    assert tracer.percentile("total", 50) is None
+
+
+async def test_tracing_session_closed_on_unload(
+    hass: HomeAssistant,
+    mock_google_pollen_api_class,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test the session created for tracing is closed with the entry."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=mock_config_entry_data,
+        options={CONF_TRACE_REQUESTS: True},
+        subentries_data=[
+            ConfigSubentryData(
+                data=mock_subentry_data,
+                subentry_type="location",
+                title="Test Location",
+                unique_id=None,
+            )
+        ],
+    )
+    entry.add_to_hass(hass)
+    sessions: list[aiohttp.ClientSession] = []
+    create_session = google_pollen.async_create_clientsession
+
+    def _create_session(*args, **kwargs) -> aiohttp.ClientSession:
+        sessions.append(create_session(*args, **kwargs))
+        return sessions[-1]
+
+    with patch(
+        "custom_components.google_pollen.async_create_clientsession",
+        side_effect=_create_session,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        assert await hass.config_entries.async_reload(entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert [session.closed for session in sessions] == [True, False]
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert sessions[1].closed
@@ -0,0 +1,112 @@
+"""Test Google Pollen locations following a tracked entity."""
+
+from homeassistant.config_entries import ConfigSubentryData
+from homeassistant.const import CONF_API_KEY, CONF_ENTITY_ID
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.google_pollen.const import DOMAIN, SUBENTRY_TYPE_TRACKER
+from custom_components.google_pollen.google_pollen_api import (
+    ALL_POLLEN_TYPES,
+    PollenCurrentConditionsData,
+)
+from custom_components.google_pollen.tracker import tracker_cell, tracker_cell_center
+
+TRACKED_ENTITY = "person.alice"
+
+
+def _add_entry(hass: HomeAssistant) -> MockConfigEntry:
+    """Add a config entry following the tracked entity."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        unique_id="test_api_key",
+        subentries_data=[
+            ConfigSubentryData(
+                data={CONF_ENTITY_ID: TRACKED_ENTITY},
+                subentry_id="tracker",
+                subentry_type=SUBENTRY_TYPE_TRACKER,
+                title="Alice",
+                unique_id=None,
+            )
+        ],
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+def _set_position(hass: HomeAssistant, lat: float, lon: float) -> None:
+    """Report a position of the tracked entity."""
+    hass.states.async_set(
+        TRACKED_ENTITY, "not_home", {"latitude": lat, "longitude": lon}
+    )
+
+
+def test_tracker_cell() -> None:
+    """Test positions are fetched for the center of their grid cell."""
+    assert tracker_cell(37.7749, -122.4194) == tracker_cell(37.71, -122.49)
+    assert tracker_cell(37.7749, -122.4194) != tracker_cell(37.81, -122.4194)
+    assert tracker_cell_center(tracker_cell(37.7749, -122.4194)) == (37.75, -122.45)
+
+
+async def test_fetch_on_cell_change(
+    hass: HomeAssistant, mock_google_pollen_api_class
+) -> None:
+    """Test data is only fetched when the entity moves to another cell."""
+    mock_get = mock_google_pollen_api_class.async_get_current_conditions
+    first = PollenCurrentConditionsData(index=1, category="Low", types={})
+    second = PollenCurrentConditionsData(index=4, category="High", types={})
+    mock_get.side_effect = [first, second]
+    _set_position(hass, 37.7749, -122.4194)
+    entry = _add_entry(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    mock_get.assert_awaited_once_with(37.75, -122.45, ALL_POLLEN_TYPES, None)
+    coordinator = entry.runtime_data.subentries_runtime_data["tracker"]
+    assert coordinator.data is first
+
+    _set_position(hass, 37.71, -122.49)
+    await hass.async_block_till_done()
+    assert mock_get.await_count == 1
+
+    _set_position(hass, 37.81, -122.4194)
+    await hass.async_block_till_done()
+    assert mock_get.await_count == 2
+    mock_get.assert_awaited_with(37.85, -122.45, ALL_POLLEN_TYPES, None)
+    assert coordinator.data is second
+
+    # Back in the first cell its data is still fresh
+    _set_position(hass, 37.7749, -122.4194)
+    await hass.async_block_till_done()
+    assert mock_get.await_count == 2
+    assert coordinator.data is first
+    assert (coordinator.lat, coordinator.long) == (37.75, -122.45)
+
+
+async def test_position_unknown_at_setup(
+    hass: HomeAssistant,
+    entity_registry: er.EntityRegistry,
+    mock_google_pollen_api_class,
+) -> None:
+    """Test the sensors are added once the entity reports a position."""
+    mock_get = mock_google_pollen_api_class.async_get_current_conditions
+    entry = _add_entry(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    mock_get.assert_not_awaited()
+    assert not any(
+        entity.unique_id == "pollen_index_tracker"
+        for entity in er.async_entries_for_config_entry(entity_registry, entry.entry_id)
+    )
+
+    hass.states.async_set(TRACKED_ENTITY, "unknown")
+    await hass.async_block_till_done()
+    mock_get.assert_not_awaited()
+
+    _set_position(hass, 37.7749, -122.4194)
+    await hass.async_block_till_done()
+    mock_get.assert_awaited_once_with(37.75, -122.45, ALL_POLLEN_TYPES, None)
+    assert entity_registry.async_get_entity_id("sensor", DOMAIN, "pollen_index_tracker")
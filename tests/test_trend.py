@@ -0,0 +1,106 @@
+"""Test the Google Pollen trend sensors."""
+
+from datetime import timedelta
+
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.const import STATE_UNKNOWN
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.google_pollen.google_pollen_api import (
+    PollenCurrentConditionsData,
+)
+from custom_components.google_pollen.trend import (
+    TREND_CAPACITY,
+    TREND_FALLING,
+    TREND_RISING,
+    TREND_STEADY,
+    PollenTrendBuffer,
+)
+
+
+def _data(index: int | None, tree: int | None = None) -> PollenCurrentConditionsData:
+    """Return data with an overall index and a tree pollen value."""
+    types = {} if tree is None else {"tree": {"value": tree, "category": "Low"}}
+    return PollenCurrentConditionsData(index=index, category=None, types=types)
+
+
+def test_trend_buffer() -> None:
+    """Test the change is measured against the value of a day earlier."""
+    buffer = PollenTrendBuffer()
+    now = dt_util.utcnow()
+    assert buffer.trend("index") is None
+
+    assert not buffer.add(now, _data(2, tree=1))
+    assert not buffer.add(now + timedelta(hours=12), _data(3))
+    assert buffer.change("index") is None
+
+    assert buffer.add(now + timedelta(hours=24), _data(4, tree=3))
+    assert buffer.change("index") == 2
+    assert buffer.trend("index") == TREND_RISING
+    assert buffer.change("tree") == 2
+
+    # Missing values have no change
+    assert buffer.add(now + timedelta(hours=36), _data(1))
+    assert buffer.trend("index") == TREND_FALLING
+    assert buffer.change("tree") is None
+
+    assert buffer.add(now + timedelta(hours=48), _data(4))
+    assert buffer.trend("index") == TREND_STEADY
+
+
+def test_trend_buffer_frequent_updates() -> None:
+    """Test frequent updates share samples, so a day always fits the buffer."""
+    buffer = PollenTrendBuffer()
+    now = dt_util.utcnow()
+    for minute in range(0, 3 * 24 * 60, 10):
+        buffer.add(now + timedelta(minutes=minute), _data(minute // (24 * 60)))
+
+    assert buffer._count == TREND_CAPACITY
+    assert buffer.change("index") == 1
+
+
+async def test_trend_sensor(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    mock_google_pollen_api_class,
+    mock_config_entry_data,
+    mock_subentry_data,
+) -> None:
+    """Test the trend sensor follows unchanged data as the day moves on."""
+    from tests.conftest import create_mock_entry_with_subentry
+
+    mock_api = mock_google_pollen_api_class.async_get_current_conditions
+    mock_api.return_value = _data(2, tree=3)
+    config_entry, subentry_id = create_mock_entry_with_subentry(
+        hass, mock_config_entry_data, mock_subentry_data
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = config_entry.runtime_data.subentries_runtime_data[subentry_id]
+
+    state = hass.states.get("sensor.test_location_pollen_index_trend")
+    assert state.state == STATE_UNKNOWN
+    assert state.attributes["change"] is None
+
+    freezer.tick(timedelta(hours=24))
+    mock_api.return_value = _data(5, tree=2)
+    coordinator.shared_location.async_invalidate()
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.test_location_pollen_index_trend")
+    assert state.state == TREND_RISING
+    assert state.attributes["change"] == 3
+    assert state.attributes["tree_trend"] == TREND_FALLING
+    assert state.attributes["tree_change"] == -1
+
+    # The client returns the same data for an unchanged response
+    freezer.tick(timedelta(hours=24))
+    coordinator.shared_location.async_invalidate()
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.test_location_pollen_index_trend")
+    assert state.state == TREND_STEADY
+    assert state.attributes["change"] == 0
@@ -0,0 +1,173 @@
+"""Test the Google Pollen API usage ledger."""
+
+from datetime import date, timedelta
+
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.config_entries import ConfigSubentryData
+from homeassistant.const import CONF_API_KEY, CONF_LATITUDE, CONF_LONGITUDE
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.google_pollen.const import DOMAIN, SUBENTRY_TYPE_LOCATION
+from custom_components.google_pollen.usage import (
+    LEDGER_DAYS,
+    LISTENER_COOLDOWN,
+    MAX_UNCONFIGURED_LOCATIONS,
+    DailyCounter,
+    GooglePollenUsageLedger,
+)
+
+
+def test_daily_counter_ring() -> None:
+    """Test the counter forgets days that fall out of the ring."""
+    day = date(2024, 4, 1).toordinal()
+    counter = DailyCounter(day, day)
+    counter.increment(day)
+    counter.increment(day)
+    counter.increment(day + 1)
+
+    assert counter.count(day) == 2
+    assert counter.count(day + 1) == 1
+    assert counter.total(day, day + 1) == 3
+
+    counter.increment(day + LEDGER_DAYS)
+
+    assert counter.count(day) == 0
+    assert counter.count(day + 1) == 1
+    assert counter.count(day + LEDGER_DAYS) == 1
+    assert len(counter.counts) == LEDGER_DAYS
+
+
+def test_daily_counter_roundtrip() -> None:
+    """Test the counter survives its storage form."""
+    day = date(2024, 4, 1).toordinal()
+    counter = DailyCounter(day, day)
+    counter.increment(day)
+
+    restored = DailyCounter.from_dict(counter.as_dict())
+
+    assert restored.count(day) == 1
+    assert restored.first_day == day
+
+
+async def test_ledger_counts_and_projection(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """Test the ledger month totals and projection."""
+    await hass.config.async_set_time_zone("UTC")
+    ledger = GooglePollenUsageLedger(hass)
+
+    freezer.move_to("2024-04-01 12:00:00+00:00")
+    for _ in range(4):
+        ledger.async_record("key", 1.0, 2.0)
+    freezer.move_to("2024-04-02 12:00:00+00:00")
+    ledger.async_record("key", 1.0, 2.0)
+
+    assert ledger.calls_today("key") == 1
+    assert ledger.calls_this_month("key") == 5
+    # One complete day with 4 calls, 28 days left in April
+    assert ledger.projected_month_calls("key") == 5 + 4 * 28
+    assert ledger.calls_today("other") == 0
+
+    freezer.move_to("2024-05-01 12:00:00+00:00")
+    assert ledger.calls_this_month("key") == 0
+
+
+async def test_ledger_unscheduled_calls(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """Test the calls of scheduled refreshes are told from the others."""
+    ledger = GooglePollenUsageLedger(hass)
+    for _ in range(3):
+        ledger.async_record("key", 1.0, 2.0)
+    ledger.async_record_scheduled("key")
+    assert ledger.daily_unscheduled_calls("key") == 2
+
+    freezer.tick(timedelta(days=1))
+    ledger.async_record_scheduled("key")
+    # Only complete days are averaged
+    assert ledger.daily_calls("key") == 3
+    assert ledger.daily_unscheduled_calls("key") == 2
+    assert ledger.daily_unscheduled_calls("other") == 0
+
+
+async def test_ledger_persists(hass: HomeAssistant, hass_storage: dict) -> None:
+    """Test the ledger is restored from storage."""
+    ledger = GooglePollenUsageLedger(hass)
+    ledger.async_record("key", 1.0, 2.0)
+    hass_storage["google_pollen.usage"] = {
+        "version": 1,
+        "key": "google_pollen.usage",
+        "data": ledger._data_to_save(),
+    }
+
+    restored = GooglePollenUsageLedger(hass)
+    await restored.async_load()
+
+    assert restored.calls_today("key") == 1
+
+
+async def test_ledger_drops_locations(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """Test expired, unconfigured and removed locations are dropped."""
+    MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_API_KEY: "test_api_key"},
+        subentries_data=[
+            ConfigSubentryData(
+                data={CONF_LATITUDE: 1.0, CONF_LONGITUDE: 2.0},
+                subentry_type=SUBENTRY_TYPE_LOCATION,
+                title="Home",
+                unique_id=None,
+            )
+        ],
+    ).add_to_hass(hass)
+    ledger = GooglePollenUsageLedger(hass)
+    ledger.async_record("key", 1.0, 2.0)
+    ledger.async_record("key", 3.0, 4.0)
+
+    freezer.tick(timedelta(days=LEDGER_DAYS))
+    ledger.async_record("key", 1.0, 2.0)
+    assert list(ledger._data_to_save()["locations"]) == ["1.0000,2.0000"]
+
+    for lat in range(MAX_UNCONFIGURED_LOCATIONS + 5):
+        ledger.async_record("key", lat / 100, 5.0)
+    locations = list(ledger._data_to_save()["locations"])
+    assert len(locations) == MAX_UNCONFIGURED_LOCATIONS + 1
+    assert "1.0000,2.0000" in locations
+    # The least recently used are dropped first
+    assert "0.0000,5.0000" not in locations
+    assert f"{(MAX_UNCONFIGURED_LOCATIONS + 4) / 100:.4f},5.0000" in locations
+
+    # Locations still configured are kept
+    ledger.async_remove_location(1.0, 2.0)
+    ledger.async_remove_location(0.1, 5.0)
+    locations = list(ledger._data_to_save()["locations"])
+    assert "1.0000,2.0000" in locations
+    assert "0.1000,5.0000" not in locations
+
+
+async def test_ledger_listeners(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """Test listeners of a key are called at most once per cooldown."""
+    ledger = GooglePollenUsageLedger(hass)
+    calls: list[str] = []
+    remove_listener = ledger.async_add_listener("key", lambda: calls.append("key"))
+
+    ledger.async_record("other", 1.0, 2.0)
+    for _ in range(5):
+        ledger.async_record("key", 1.0, 2.0)
+    await hass.async_block_till_done()
+    assert calls == ["key"]
+
+    freezer.tick(timedelta(seconds=LISTENER_COOLDOWN))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert calls == ["key", "key"]
+
+    remove_listener()